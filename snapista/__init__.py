@@ -3,9 +3,63 @@
 This version of snapista is my personal take on what is originally presented here:
     https://github.com/snap-contrib/snapista
 
+ Everything is imported lazily, on first access, so that `import snapista` stays fast.
+
 """
 
-from snapista import operators
+import importlib
+
+# name -> module that defines it
+_CLASSES = {
+    "Adaptive": "snapista.adaptive",
+    "AuxiliaryCache": "snapista.auxiliary",
+    "GPT": "snapista.gpt",
+    "Graph": "snapista.graph",
+    "Metrics": "snapista.metrics",
+    "Placement": "snapista.placement",
+    "Result": "snapista.gpt",
+    "RunHistory": "snapista.history",
+    "Scheduler": "snapista.scheduler",
+    "Watcher": "snapista.watch",
+}
+
+_MODULES = (
+    "dimap",
+    "operators",
+    "stacking",
+    "checkpoint",
+    "staging",
+    "history",
+    "watch",
+    "cube",
+    "footprint",
+    "auxiliary",
+    "autotune",
+    "placement",
+    "metrics",
+    "fanout",
+    "preflight",
+    "adaptive",
+    "spec",
+    "pipeline",
+    "grid",
+    "quicklook",
+    "stats",
+    "scheduler",
+)
+
+
+def __getattr__(name):
+    if name in _CLASSES:
+        value = getattr(importlib.import_module(_CLASSES[name]), name)
+    elif name in _MODULES:
+        value = importlib.import_module(f"snapista.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value  # next time it's found without __getattr__
+    return value
+
 
-from snapista.gpt import GPT
-from snapista.graph import Graph
+def __dir__():
+    return sorted({*globals(), *_CLASSES, *_MODULES})
@@ -0,0 +1,401 @@
+""" This file contains the command line interface of snapista, for batch runs (e.g. SLURM array jobs).
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ python -m snapista run graph.json 'Data/raw/*.zip' --gpt ~/.esa-snap/bin/gpt --shard 3/16
+ python -m snapista merge summaries/*.json --output summary.json
+ python -m snapista queue --slots 8
+ python -m snapista footprints 'POLYGON((12.2 45.2, ...))' 'Data/raw/*.zip' | python -m snapista run graph.json --list -
+
+ Every task of an array job is given the same inputs and its shard. An input belongs to the shard picked by
+ the hash of its name, so every task picks the same inputs on every run, no matter the order or the location
+ the inputs are listed in. Each task writes a JSON summary of its shard, and the summaries are merged later.
+
+ Only the standard library is imported before the graph is loaded, so a task starts in a fraction of a second.
+
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import pathlib
+import argparse
+
+# the arguments of run that override the options of the run in the spec
+_RUN_ARGUMENTS = (
+    "output_folder",
+    "format",
+    "date_only",
+    "date_time_only",
+    "prefix",
+    "suffix",
+    "workers",
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m snapista", description="Run SNAP gpt graphs on batches."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run a graph on the inputs of a shard.")
+    run.add_argument("graph", help="A JSON spec, or an xml graph saved by Graph.save.")
+    run.add_argument("inputs", nargs="*", help="Inputs, or glob patterns of inputs.")
+    run.add_argument(
+        "--list",
+        dest="lists",
+        action="append",
+        default=[],
+        help="A file with an input per line ('-' for stdin). Can be repeated.",
+    )
+    run.add_argument(
+        "--gpt",
+        default=os.environ.get("SNAPISTA_GPT"),
+        help="Path to gpt ($SNAPISTA_GPT by default).",
+    )
+    run.add_argument(
+        "--shard",
+        default="0/1",
+        help="i/n: run only the i-th (from 0) of n shards, e.g. $SLURM_ARRAY_TASK_ID/$SLURM_ARRAY_TASK_COUNT.",
+    )
+    run.add_argument("--output-folder")
+    run.add_argument("--format", help="e.g. BEAM-DIMAP, GeoTIFF.")
+    run.add_argument("--date-only", action="store_true", default=None)
+    run.add_argument("--date-time-only", action="store_true", default=None)
+    run.add_argument("--prefix")
+    run.add_argument("--suffix")
+    run.add_argument("--workers", type=int)
+    run.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Skip the inputs done in the previous summary of the shard, to resume it.",
+    )
+    run.add_argument(
+        "--summary",
+        help="Where to write the summary of the shard. By default, summary-<i>-of-<n>.json in the output folder.",
+    )
+    run.add_argument(
+        "--preflight", action="store_true", help="Check the shard before running it."
+    )
+    run.add_argument(
+        "--dry-run", action="store_true", help="Only list the inputs of the shard."
+    )
+    run.add_argument(
+        "--batch",
+        help="Share the host with other batches: queue every gpt run as this batch (see queue).",
+    )
+    run.add_argument("--priority", type=int, default=0)
+    run.add_argument("--weight", type=float, default=1.0)
+
+    merge = commands.add_parser("merge", help="Merge the summaries of the shards.")
+    merge.add_argument("summaries", nargs="+")
+    merge.add_argument("--output", help="Where to write the merged summary.")
+
+    footprints = commands.add_parser(
+        "footprints", help="List the inputs whose footprint overlaps an area."
+    )
+    footprints.add_argument("aoi", help="The area of interest, a WKT polygon.")
+    footprints.add_argument(
+        "inputs", nargs="*", help="Inputs, or glob patterns of inputs."
+    )
+    footprints.add_argument(
+        "--list",
+        dest="lists",
+        action="append",
+        default=[],
+        help="A file with an input per line ('-' for stdin). Can be repeated.",
+    )
+    footprints.add_argument(
+        "--index",
+        help="The footprint index. By default, footprints.sqlite in the snapista cache folder.",
+    )
+
+    queue = commands.add_parser(
+        "queue", help="Show the batches sharing the host, or set its slots."
+    )
+    queue.add_argument(
+        "--scheduler",
+        help="The queue database ($SNAPISTA_SCHEDULER or /var/tmp/snapista-scheduler.sqlite by default).",
+    )
+    queue.add_argument(
+        "--slots", type=int, help="Set the number of gpt runs at once on the host."
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        return _run(args, parser)
+
+    if args.command == "footprints":
+        return _footprints(args, parser)
+
+    if args.command == "queue":
+        from snapista.scheduler import Scheduler
+
+        Scheduler(args.scheduler, slots=args.slots).report()
+        return 0
+
+    return _merge(args)
+
+
+def get_shard(name, shards):
+    """Get the shard of an input by the hash of its name, the same on every run and machine."""
+
+    return int(hashlib.sha1(name.encode()).hexdigest(), 16) % shards
+
+
+def parse_shard(text):
+    """Parse i/n into (i, n).
+
+    Raises:
+        ValueError: If the shard is not i/n with 0 <= i < n.
+
+    """
+
+    try:
+        index, shards = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"The shard must be i/n, got {text!r}!")
+
+    if not 0 <= index < shards:
+        raise ValueError(f"The shard index must be within [0, {shards}), got {index}!")
+
+    return index, shards
+
+
+def get_inputs(patterns, lists=()):
+    """Get the inputs from glob patterns and lists of inputs, without duplicates, sorted by name.
+
+    Returns:
+        list: The inputs (pathlib.Path).
+
+    """
+
+    inputs = set()
+
+    for pattern in patterns:
+        matches = glob.glob(os.path.expanduser(pattern))
+        inputs.update(matches if len(matches) > 0 else [pattern])
+
+    for file in lists:
+        lines = sys.stdin if file == "-" else open(file)
+        with lines:
+            inputs.update(line.strip() for line in lines if line.strip())
+
+    return sorted((pathlib.Path(input_) for input_ in inputs), key=lambda p: p.name)
+
+
+def merge_summaries(summaries):
+    """Merge the summaries of shards into one, a later summary of a shard replaces an earlier one.
+
+    Args:
+        summaries (list): The summaries (dict, as written by run).
+
+    Returns:
+        dict: The merged summary, with the shards that are missing.
+
+    """
+
+    counts = {summary["shard"][1] for summary in summaries}
+    if len(counts) > 1:
+        raise ValueError(f"The summaries are of different shardings: {sorted(counts)}!")
+    count = counts.pop() if len(counts) > 0 else 0
+
+    # an unfinished summary sorts first, the one of a rerun replaces it
+    shards = {}
+    for summary in sorted(summaries, key=lambda summary: summary["finished"] or 0):
+        shards[summary["shard"][0]] = summary
+
+    results = [result for summary in shards.values() for result in summary["results"]]
+    status = {}
+    for result in results:
+        status[result["status"]] = status.get(result["status"], 0) + 1
+
+    return {
+        "graphs": sorted({summary["graph"] for summary in shards.values()}),
+        "shards": count,
+        "missing": sorted(set(range(count)) - set(shards)),
+        "unfinished": sorted(
+            index for index, summary in shards.items() if summary["finished"] is None
+        ),
+        "status": status,
+        "results": sorted(results, key=lambda result: result["input"]),
+    }
+
+
+def _run(args, parser):
+    try:
+        index, shards = parse_shard(args.shard)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.gpt is None and not args.dry_run:
+        parser.error("the path to gpt is needed, see --gpt")
+
+    inputs = [
+        input_
+        for input_ in get_inputs(args.inputs, args.lists)
+        if get_shard(input_.name, shards) == index
+    ]
+
+    # only now snapista is imported, nothing of it is needed to parse the arguments
+    from snapista import spec
+    from snapista.gpt import GPT
+
+    try:
+        graph, options = spec.load(args.graph)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    for name in _RUN_ARGUMENTS:
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+
+    format_ = options.pop("format", "BEAM-DIMAP")
+    workers = options.pop("workers", 1)
+    options.setdefault("output_folder", "proc")
+
+    summary_file = pathlib.Path(
+        args.summary
+        or pathlib.Path(options["output_folder"]) / f"summary-{index}-of-{shards}.json"
+    )
+
+    # an output can exist and still be incomplete (gpt writes the .dim first), only the summary says it's done
+    done = _get_done(summary_file, graph) if args.skip_existing else {}
+    inputs = [input_ for input_ in inputs if _get_key(input_) not in done]
+
+    print(f"shard {index}/{shards}: {len(inputs)} input(s)")
+    if args.dry_run:
+        for input_ in inputs:
+            print(f"  {input_}")
+        return 0
+
+    gpt = GPT(args.gpt)
+    if args.batch is not None:
+        from snapista.scheduler import Scheduler
+
+        gpt.scheduler = Scheduler(
+            batch=args.batch, weight=args.weight, priority=args.priority
+        )
+
+    if args.preflight and len(gpt.preflight(graph, inputs, **options)) > 0:
+        return 2
+
+    summary = {
+        "shard": [index, shards],
+        "graph": graph.get_hash(),
+        "host": os.uname().nodename,
+        "started": time.time(),
+        "finished": None,
+        # the inputs done before are kept, so that the summary covers the whole shard
+        "results": list(done.values()),
+    }
+
+    # written after every input, so that a task that is killed still leaves what it did
+    _write_summary(summary_file, summary)
+    for result in gpt.run_iter(
+        graph, inputs, format_=format_, workers=workers, **options
+    ):
+        GPT._report(result)
+        record = {
+            field: str(value) if isinstance(value, pathlib.Path) else value
+            for field, value in result._asdict().items()
+        }
+        # the same key however the inputs are given on the next run, see _get_done
+        record["input"] = _get_key(result.input)
+        summary["results"].append(record)
+        _write_summary(summary_file, summary)
+
+    summary["finished"] = time.time()
+    _write_summary(summary_file, summary)
+
+    failed = [result for result in summary["results"] if result["status"] != "done"]
+    return 1 if len(failed) > 0 else 0
+
+
+def _merge(args):
+    summaries = [json.loads(pathlib.Path(file).read_text()) for file in args.summaries]
+    merged = merge_summaries(summaries)
+
+    text = json.dumps(merged, indent=4)
+    if args.output is None:
+        print(text)
+    else:
+        pathlib.Path(args.output).write_text(text)
+
+    print(
+        f"{merged['shards']} shard(s), missing {merged['missing'] or 'none'}, "
+        f"unfinished {merged['unfinished'] or 'none'}: "
+        + ", ".join(f"{count} {status}" for status, count in merged["status"].items()),
+        file=sys.stderr,
+    )
+
+    return 0 if len(merged["missing"]) == 0 and len(merged["unfinished"]) == 0 else 1
+
+
+def _footprints(args, parser):
+    from snapista.footprint import FootprintIndex
+
+    inputs = get_inputs(args.inputs, args.lists)
+
+    try:
+        selected = FootprintIndex(args.index).select(inputs, args.aoi)
+    except ValueError as error:
+        parser.error(str(error))
+
+    for input_, _ in selected:
+        print(input_)
+
+    print(
+        f"{len(selected)} of {len(inputs)} input(s) overlap the area", file=sys.stderr
+    )
+
+    return 0
+
+
+def _get_done(summary_file, graph):
+    """Get the results of the inputs done in a previous summary of the shard, for the same graph.
+
+    Returns:
+        dict: Input (see _get_key) -> result.
+
+    """
+
+    try:
+        summary = json.loads(summary_file.read_text())
+    except (OSError, ValueError):
+        return {}
+
+    if summary.get("graph") != graph.get_hash():
+        return {}
+
+    return {
+        _get_key(result["input"]): result
+        for result in summary["results"]
+        if result["status"] == "done"
+    }
+
+
+def _get_key(input_):
+    """The input as it is in the summaries: the absolute path, however it was given (relative, with ./ or ..).
+
+    Symbolic links are not followed, the name of the input stays the one its output and shard are named after.
+
+    """
+
+    return pathlib.Path(os.path.abspath(input_)).as_posix()
+
+
+def _write_summary(file, summary):
+    file.parent.mkdir(parents=True, exist_ok=True)
+    temporary = file.with_name(f".{file.name}.tmp")
+    temporary.write_text(json.dumps(summary, indent=4))
+    temporary.replace(file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+""" This file contains the location of the files snapista keeps between sessions.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+"""
+
+import os
+import pathlib
+
+
+def get_cache_folder():
+    """Get the folder snapista keeps its caches in, creating it if needed.
+
+    The folder is $SNAPISTA_CACHE if set, otherwise snapista in $XDG_CACHE_HOME (~/.cache by default).
+
+    Returns:
+        pathlib.Path: The cache folder.
+
+    """
+
+    if "SNAPISTA_CACHE" in os.environ:
+        folder = pathlib.Path(os.environ["SNAPISTA_CACHE"])
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", pathlib.Path("~/.cache").expanduser())
+        folder = pathlib.Path(base) / "snapista"
+
+    folder.mkdir(parents=True, exist_ok=True)
+
+    return folder
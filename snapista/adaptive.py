@@ -0,0 +1,219 @@
+""" This file contains the definition of the Adaptive class – a number of workers that follows the load of the host.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ On a shared host, a fixed number of workers is wrong for part of the day: other users come and go, and the
+ I/O wait on network storage swings a lot. Instead, the number of concurrent gpt runs is adjusted at regular
+ intervals, additive increase and multiplicative decrease (as TCP does): one more worker while the CPUs have
+ room and the throughput keeps up, half of them when the I/O wait or the memory pressure (PSI) is too high.
+
+"""
+
+import os
+import time
+import pathlib
+
+_PROC_STAT = pathlib.Path("/proc/stat")
+_MEMORY_PRESSURE = pathlib.Path("/proc/pressure/memory")
+
+
+class Adaptive:
+    """A number of workers for GPT.run and GPT.run_iter that is adjusted to the load of the host.
+
+    The workers are never stopped: when the number goes down, no new gpt run starts until enough of the running
+    ones have finished.
+
+    Examples:
+        ```python
+        workers = snapista.Adaptive(min_workers=1, max_workers=8)
+        gpt.run(graph, products, workers=workers)
+
+        for decision in workers.decisions:
+            print(decision)
+        ```
+
+    """
+
+    def __init__(
+        self,
+        min_workers=1,
+        max_workers=None,
+        start=None,
+        interval=60.0,
+        target_cpu=0.9,
+        max_iowait=0.25,
+        max_memory_pressure=10.0,
+        decrease=0.5,
+        min_jobs=3,
+        verbose=True,
+    ):
+        """Create an adaptive number of workers.
+
+        Args:
+            min_workers (int): The lowest number of workers.
+            max_workers (int): The highest number of workers. By default, the number of CPUs.
+            start (int): The number of workers to start with. By default, min_workers.
+            interval (float): Seconds between the decisions.
+            target_cpu (float): Add workers while the CPU utilization (0–1) is below this.
+            max_iowait (float): Remove workers when the share of CPU time waiting for I/O (0–1) is above this.
+            max_memory_pressure (float): Remove workers when the memory pressure (the share of time some tasks
+                were stalled on memory over the last minute, in percent) is above this.
+            decrease (float): The factor the workers are multiplied by when removing workers.
+            min_jobs (int): The number of finished jobs needed before the throughput at a number of workers
+                is compared with the throughput at one worker less.
+            verbose (bool): Print every change of the number of workers.
+
+        """
+
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers or os.cpu_count() or 1, min_workers)
+        self.workers = min(max(start or min_workers, min_workers), self.max_workers)
+        self.interval = interval
+        self.target_cpu = target_cpu
+        self.max_iowait = max_iowait
+        self.max_memory_pressure = max_memory_pressure
+        self.decrease = decrease
+        self.min_jobs = min_jobs
+        self.verbose = verbose
+
+        self.decisions = []  # (time, workers, new workers, reason)
+        # workers -> [seconds, finished jobs] spent at that number of workers
+        self._levels = {}
+        self.reset()
+
+    def __repr__(self):
+        return f"Adaptive({self.workers} of {self.min_workers}–{self.max_workers})"
+
+    def reset(self):
+        """Start measuring from now, called at the beginning of a batch."""
+
+        self._sample = _read_cpu_times()
+        self._last = time.monotonic()
+        self._finished = 0
+
+    def update(self, finished, running):
+        """Count finished jobs, and decide on the number of workers when the interval has passed.
+
+        Args:
+            finished (int): Jobs finished since the last call.
+            running (int): Jobs running now.
+
+        Returns:
+            int: The number of workers.
+
+        """
+
+        self._finished += finished
+
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return self.workers
+
+        sample = _read_cpu_times()
+        cpu, iowait = _get_utilization(self._sample, sample)
+        pressure = _read_memory_pressure()
+
+        level = self._levels.setdefault(self.workers, [0.0, 0])
+        level[0] += now - self._last
+        level[1] += self._finished
+
+        self._sample, self._last, self._finished = sample, now, 0
+
+        workers, reason = self._decide(cpu, iowait, pressure, running)
+        self.decisions.append((time.time(), self.workers, workers, reason))
+
+        if workers != self.workers and self.verbose:
+            print(f"⚙ workers {self.workers} → {workers}: {reason}")
+        self.workers = workers
+
+        return workers
+
+    def _decide(self, cpu, iowait, pressure, running):
+        """Decide on the number of workers from the measurements of the last interval.
+
+        Returns:
+            tuple: The number of workers, and the reason.
+
+        """
+
+        load = []
+        if cpu is not None:
+            load.append(f"cpu {cpu:.0%}, iowait {iowait:.0%}")
+        if pressure is not None:
+            load.append(f"memory pressure {pressure:.1f}%")
+        load = ", ".join(load) or "no load measurements"
+
+        overloaded = (pressure is not None and pressure > self.max_memory_pressure) or (
+            iowait is not None and iowait > self.max_iowait
+        )
+
+        # a decrease takes effect only as the running jobs finish, don't decrease again before it did
+        if overloaded and running <= self.workers:
+            workers = min(int(self.workers * self.decrease), self.workers - 1)
+            return max(workers, self.min_workers), load
+
+        throughput = self._get_throughput(self.workers)
+        lower = self._get_throughput(self.workers - 1)
+        if throughput is not None and lower is not None and throughput < lower:
+            return (
+                max(self.workers - 1, self.min_workers),
+                f"{throughput:.1f} jobs/h, {lower:.1f} jobs/h with a worker less",
+            )
+
+        # add a worker only when all the workers are busy, an idle one says nothing about the load
+        if (
+            not overloaded
+            and (cpu is None or cpu < self.target_cpu)
+            and running >= self.workers
+        ):
+            return min(self.workers + 1, self.max_workers), load
+
+        return self.workers, load
+
+    def _get_throughput(self, workers):
+        """Get the jobs per hour finished with the number of workers, None if there are not enough of them yet."""
+
+        seconds, jobs = self._levels.get(workers, (0.0, 0))
+        if jobs < self.min_jobs or seconds == 0:
+            return None
+
+        return jobs / seconds * 3600
+
+
+def _read_cpu_times():
+    """Read the total and the iowait CPU time of the host, None if /proc/stat can't be read."""
+
+    try:
+        with open(_PROC_STAT) as file:
+            values = [int(value) for value in file.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+
+    # user, nice, system, idle, iowait, irq, softirq, steal (guest is already included in user)
+    values = values[:8]
+    return sum(values), values[3], values[4]
+
+
+def _get_utilization(previous, current):
+    """Get the CPU utilization and the iowait (0–1) between two samples of the CPU times."""
+
+    if previous is None or current is None or current[0] <= previous[0]:
+        return None, None
+
+    total, idle, iowait = (now - then for now, then in zip(current, previous))
+    return (total - idle - iowait) / total, iowait / total
+
+
+def _read_memory_pressure():
+    """Read the share of time some tasks were stalled on memory over the last minute, None without PSI."""
+
+    try:
+        for line in _MEMORY_PRESSURE.read_text().splitlines():
+            if line.startswith("some"):
+                fields = dict(field.split("=") for field in line.split()[1:])
+                return float(fields["avg60"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return None
@@ -0,0 +1,224 @@
+""" This file contains functions to find the best gpt parallelism (-q) and tile cache (-c) for a graph.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The best settings depend a lot on the graph: C2RCC_MSI wants different settings than Reproject or Collocate.
+ A graph is run on a sample product with different settings, and the fastest ones are saved, keyed by the hash
+ of the graph. GPT.run uses the saved settings of a graph automatically.
+
+"""
+
+import os
+import math
+import json
+import pathlib
+import tempfile
+import threading
+
+from snapista._cache import get_cache_folder
+
+_lock = threading.Lock()
+_settings = {"mtime": None, "values": {}}
+
+
+def tune(
+    gpt,
+    graph,
+    product,
+    parallelism=None,
+    tile_cache=None,
+    search="coordinate",
+    max_memory=None,
+    format_="BEAM-DIMAP",
+):
+    """Run the graph on a sample product with different settings and save the fastest ones.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        graph (Graph): The graph to tune.
+        product (str or os.PathLike): A sample input, representative of the products the graph is used for.
+        parallelism (list): The values of -q to try. By default, powers of two up to the number of CPUs.
+        tile_cache (list): The values of -c to try (e.g. '1024M'). By default, from 512M to half of the memory.
+        search (str): 'grid' tries every combination. 'coordinate' tunes the parallelism first and then the tile
+            cache with the best parallelism, which takes a lot fewer runs.
+        max_memory (int): Settings with a higher peak memory (in bytes) are not chosen.
+        format_ (str): The format of the output, as it will be used.
+
+    Returns:
+        dict: The best settings: parallelism, tile_cache, wall_time, and peak_memory.
+
+    Raises:
+        RuntimeError: If gpt fails with every setting, or no settings are within max_memory.
+
+    """
+
+    parallelism = _get_default_parallelism() if parallelism is None else parallelism
+    tile_cache = _get_default_tile_cache() if tile_cache is None else tile_cache
+    product = pathlib.Path(product)
+
+    measurements = {}
+    errors = {}
+
+    def measure(q, c):
+        if (q, c) not in measurements:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                process = gpt._process(
+                    graph=graph,
+                    input_=product,
+                    output_file=pathlib.Path(temp_dir) / "tuning",
+                    format_=format_,
+                    suppress_stdout=True,
+                    options=["-q", str(q), "-c", str(c)],
+                )
+
+            if process.returncode != 0:
+                # e.g. a tile cache too large for the JVM, the setting is just not feasible
+                errors[(q, c)] = gpt._get_error(process)
+                measurements[(q, c)] = (math.inf, math.inf)
+                print(f"  -q {q:<3} -c {c:<6} failed: {errors[(q, c)]}")
+                return measurements[(q, c)]
+
+            measurements[(q, c)] = (process.wall_time, process.peak_memory)
+            print(
+                f"  -q {q:<3} -c {c:<6} {process.wall_time:8.1f} s"
+                f" {process.peak_memory / 2 ** 30:6.1f} GiB"
+            )
+
+        return measurements[(q, c)]
+
+    def best(candidates):
+        feasible = [
+            candidate for candidate in candidates if measure(*candidate)[0] != math.inf
+        ]
+        if len(feasible) == 0:
+            raise RuntimeError(
+                f"gpt failed with every setting: {errors[candidates[-1]]}"
+            )
+
+        allowed = [
+            candidate
+            for candidate in feasible
+            if max_memory is None or measure(*candidate)[1] <= max_memory
+        ]
+        if len(allowed) == 0:
+            raise RuntimeError(
+                f"No settings of {graph.suffix or 'the graph'} fit in {max_memory} bytes!"
+            )
+        return min(allowed, key=lambda candidate: measure(*candidate))
+
+    print(f"⏱ tuning {graph.get_hash()[:12]} on {product.name}")
+
+    if search == "grid":
+        q, c = best([(q, c) for q in parallelism for c in tile_cache])
+    elif search == "coordinate":
+        # the middle tile cache, or a smaller one if gpt fails with it whatever the parallelism
+        for c in tile_cache[len(tile_cache) // 2 :: -1]:
+            candidates = [(q, c) for q in parallelism]
+            if any(measure(*candidate)[0] != math.inf for candidate in candidates):
+                break
+        q = best(candidates)[0]
+        q, c = best([(q, c) for c in tile_cache])
+    else:
+        raise ValueError(f"search must be 'grid' or 'coordinate', got {search!r}!")
+
+    wall_time, peak_memory = measure(q, c)
+    settings = {
+        "parallelism": q,
+        "tile_cache": c,
+        "wall_time": wall_time,
+        "peak_memory": peak_memory,
+    }
+    save_settings(graph, settings)
+
+    return settings
+
+
+def get_options(graph):
+    """Get the gpt options (-q and -c) saved for the graph.
+
+    Returns:
+        list: The options to add to the gpt command, empty if the graph has not been tuned.
+
+    """
+
+    settings = get_settings(graph)
+    if settings is None:
+        return []
+
+    return ["-q", str(settings["parallelism"]), "-c", str(settings["tile_cache"])]
+
+
+def get_settings(graph):
+    """Get the settings saved for the graph, None if it has not been tuned."""
+
+    file = _get_file()
+
+    with _lock:
+        # read only when the file changed, this is called for every gpt run
+        mtime = file.stat().st_mtime_ns if file.exists() else None
+        if mtime != _settings["mtime"]:
+            _settings["values"] = json.loads(file.read_text()) if mtime else {}
+            _settings["mtime"] = mtime
+
+        return _settings["values"].get(graph.get_hash())
+
+
+def save_settings(graph, settings):
+    """Save the settings for the graph (see tune)."""
+
+    file = _get_file()
+
+    with _lock:
+        values = json.loads(file.read_text()) if file.exists() else {}
+        values[graph.get_hash()] = settings
+        _write(file, values)
+
+
+def forget(graph):
+    """Remove the saved settings of the graph, so that gpt runs it with its defaults again."""
+
+    file = _get_file()
+
+    with _lock:
+        values = json.loads(file.read_text()) if file.exists() else {}
+        if values.pop(graph.get_hash(), None) is not None:
+            _write(file, values)
+
+
+def _get_file():
+    return get_cache_folder() / "tuning.json"
+
+
+def _write(file, values):
+    # replaced at once, so that a gpt run starting at the same time never reads half a file
+    temporary = file.with_suffix(".tmp")
+    temporary.write_text(json.dumps(values, indent=4))
+    temporary.replace(file)
+
+
+def _get_default_parallelism():
+    cpus = os.cpu_count() or 1
+
+    values = [1]
+    while values[-1] * 2 <= cpus:
+        values.append(values[-1] * 2)
+    if values[-1] != cpus:
+        values.append(cpus)
+
+    return values
+
+
+def _get_default_tile_cache():
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError):
+        memory = 8 * 2**30
+
+    values = []
+    size = 512
+    while size * 2**20 <= memory // 2 or len(values) == 0:
+        values.append(f"{size}M")
+        size *= 2
+
+    return values
@@ -0,0 +1,239 @@
+""" This file contains the definition of the AuxiliaryCache class – auxiliary files clipped to the scenes.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Operators like ImportVector, AddElevation, or AddLandCover get paths to whole files (a continental coastline,
+ a country-wide DEM), and gpt reads and reprojects all of it for every scene. With an AuxiliaryCache set on GPT,
+ these files are clipped to the footprint of each scene (plus a buffer) before gpt runs, and the graph uses
+ the clipped copies instead. The clipped copies are cached, so the scenes of the same area share them.
+
+ Clipping is done with ogr2ogr (vectors) and gdal_translate (rasters) from GDAL.
+
+"""
+
+import copy
+import math
+import shutil
+import hashlib
+import pathlib
+import tempfile
+import warnings
+import threading
+import subprocess
+
+from snapista import footprint
+from snapista._cache import get_cache_folder
+
+_VECTORS = (".shp", ".gpkg", ".geojson", ".json", ".kml", ".gml")
+_RASTERS = (".tif", ".tiff", ".img", ".vrt", ".hgt", ".dem", ".nc", ".jp2")
+
+
+class AuxiliaryCache:
+    """Clip the files used by operators to the scene footprints, and keep the clipped copies.
+
+    Every file parameter of the operators in a graph (see snapista.operators.Parameter) that points to a vector
+    or a raster GDAL can read is replaced by a copy clipped to the scene. When the footprint of a scene is not
+    known, or the clipping fails, the original file is used.
+
+    Examples:
+        ```python
+        gpt = snapista.GPT(gpt_path)
+        gpt.auxiliary = snapista.AuxiliaryCache(buffer=0.2)
+
+        import_vector.vector_file = 'Vectors/Europe-coastline.shp'
+        gpt.run(graph, products)  # every scene imports only the coastline around it
+        ```
+
+    """
+
+    def __init__(self, folder=None, buffer=0.1, grid=0.05):
+        """Create a new cache.
+
+        Args:
+            folder (str): Where to keep the clipped files. By default, auxiliary in the snapista cache folder.
+            buffer (float): Degrees added around the footprint of a scene.
+            grid (float): The clipping bounds are rounded outwards to this grid (in degrees), so that scenes
+                with almost the same footprint (e.g. the same tile on different dates) share the clipped files.
+
+        """
+
+        self.folder = pathlib.Path(
+            get_cache_folder() / "auxiliary" if folder is None else folder
+        )
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.buffer = buffer
+        self.grid = grid
+
+        self._lock = threading.Lock()
+        # cache key -> lock, so that a file is clipped once even with several workers
+        self._locks = {}
+
+    def __repr__(self):
+        return f"AuxiliaryCache({self.folder.as_posix()})"
+
+    def prepare(self, graph, input_):
+        """Get a graph for the input, with the auxiliary files replaced by the clipped copies.
+
+        Args:
+            graph (Graph): A snapista Graph object. It is not changed.
+            input_ (pathlib.Path): The input product.
+
+        Returns:
+            Graph: The graph to run for the input (the graph itself, if nothing is clipped).
+
+        """
+
+        bounds = footprint.get_bounds(input_, self.buffer)
+        if bounds is None:
+            return graph
+
+        bounds = self._snap(bounds)
+        prepared = None
+
+        for node, operator in zip(graph._xml.iterfind("node"), graph._operators):
+            for parameter in operator._parameters:
+                value = getattr(operator, parameter.slot)
+                if not parameter.file or not value:
+                    continue
+
+                files = value if isinstance(value, list) else [value]
+                clipped = [self.get(file, bounds) for file in files]
+                if clipped == files:
+                    continue
+
+                if prepared is None:
+                    prepared = _copy_graph(graph)
+
+                # the nodes of the copy are in the same order
+                index = graph._xml.index(node)
+                element = prepared._xml[index].find(f"parameters/{parameter.xml_name}")
+                element.text = parameter.to_text(
+                    clipped if isinstance(value, list) else clipped[0]
+                )
+
+        return graph if prepared is None else prepared
+
+    def get(self, file, bounds):
+        """Get the file clipped to the bounds, clipping it if it is not in the cache yet.
+
+        Args:
+            file (str): The auxiliary file.
+            bounds (tuple): (min longitude, min latitude, max longitude, max latitude).
+
+        Returns:
+            str: The clipped file, or the file itself if it can't be clipped.
+
+        """
+
+        source = pathlib.Path(file)
+        extension = source.suffix.lower()
+        if extension not in _VECTORS + _RASTERS or not source.is_file():
+            return file
+
+        stat = source.stat()
+        key = hashlib.sha1(
+            repr(
+                (str(source.resolve()), stat.st_size, stat.st_mtime_ns, bounds)
+            ).encode()
+        ).hexdigest()[:16]
+
+        folder = self.folder / key
+        clipped = folder / (source.stem + (".shp" if extension in _VECTORS else ".tif"))
+
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if clipped.exists():
+                return str(clipped)
+
+            # clipped in a temporary folder and moved at once, so that a half-written file is never used
+            temporary = pathlib.Path(tempfile.mkdtemp(dir=self.folder, prefix=".clip-"))
+            try:
+                _clip(source, temporary / clipped.name, bounds, extension in _VECTORS)
+                temporary.rename(folder)
+            except (OSError, subprocess.CalledProcessError) as error:
+                shutil.rmtree(temporary, ignore_errors=True)
+                warnings.warn(
+                    f"Could not clip {source.name}, using the whole file ({error})"
+                )
+                return file
+
+        return str(clipped)
+
+    def clear(self):
+        """Remove all the clipped files."""
+
+        with self._lock:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self.folder.mkdir(parents=True, exist_ok=True)
+            self._locks.clear()
+
+    def _snap(self, bounds):
+        """Round the bounds outwards to the grid."""
+
+        if not self.grid:
+            return bounds
+
+        min_lon, min_lat, max_lon, max_lat = (value / self.grid for value in bounds)
+        return tuple(
+            round(value * self.grid, 6)
+            for value in (
+                math.floor(min_lon),
+                math.floor(min_lat),
+                math.ceil(max_lon),
+                math.ceil(max_lat),
+            )
+        )
+
+
+def _clip(source, target, bounds, vector):
+    """Clip a vector with ogr2ogr or a raster with gdal_translate. The bounds are in WGS84."""
+
+    min_lon, min_lat, max_lon, max_lat = (str(value) for value in bounds)
+
+    if vector:
+        command = [
+            "ogr2ogr",
+            "-f",
+            "ESRI Shapefile",
+            "-spat",
+            min_lon,
+            min_lat,
+            max_lon,
+            max_lat,
+            "-spat_srs",
+            "EPSG:4326",
+            "-clipsrc",
+            "spat_extent",
+            str(target),
+            str(source),
+        ]
+    else:
+        command = [
+            "gdal_translate",
+            "-of",
+            "GTiff",
+            "-co",
+            "COMPRESS=DEFLATE",
+            "-projwin",
+            min_lon,
+            max_lat,
+            max_lon,
+            min_lat,
+            "-projwin_srs",
+            "EPSG:4326",
+            str(source),
+            str(target),
+        ]
+
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def _copy_graph(graph):
+    """A copy of the graph with its own xml, so that the parameters can be changed."""
+
+    prepared = copy.copy(graph)
+    prepared._xml = copy.deepcopy(graph._xml)
+    return prepared
@@ -0,0 +1,288 @@
+""" This file contains the tools to reuse an intermediate product across graphs that share a prefix.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Graphs often share an expensive common beginning (e.g. Resample -> Subset -> c2rcc) followed by different steps.
+ The shared nodes are run once per product, the result is cached as BEAM-DIMAP,
+ and only the differing tails of the graphs are run from the cached product, in parallel.
+
+"""
+
+import os
+import shutil
+import hashlib
+import pathlib
+import zipfile
+import tempfile
+import subprocess
+import concurrent.futures
+
+from snapista.graph import Graph
+
+# the errors of a gpt run that fails to start, as in GPT._try_job
+_ERRORS = (OSError, ValueError, zipfile.BadZipFile, subprocess.SubprocessError)
+
+
+def get_shared_prefix_length(graphs):
+    """Find the number of nodes at the beginning of the graphs that do the same processing.
+
+    If any of the graphs has a checkpoint (see Graph.add_checkpoint), the checkpoint is used instead of
+    the longest shared prefix. At least one node is always left for every graph to run from the checkpoint.
+
+    Args:
+        graphs (list): snapista Graph objects.
+
+    Returns:
+        int: Number of shared nodes, 0 if the graphs have nothing in common.
+
+    """
+
+    if not all(graph._is_linear() for graph in graphs):
+        raise ValueError(
+            "Only graphs where every node takes the previous one can share a checkpoint!"
+        )
+
+    keys = [graph._get_node_keys() for graph in graphs]
+
+    length = 0
+    for nodes in zip(*keys):
+        if any(node != nodes[0] for node in nodes[1:]):
+            break
+        length += 1
+
+    length = min(length, *(len(nodes) - 1 for nodes in keys))
+
+    checkpoints = [
+        graph._checkpoint for graph in graphs if graph._checkpoint is not None
+    ]
+    if len(checkpoints) > 0:
+        checkpoint = min(checkpoints)
+        if checkpoint > length:
+            raise ValueError(
+                f"The graphs do not share the first {checkpoint} nodes, can't checkpoint there!"
+            )
+        length = checkpoint
+
+    return length
+
+
+def run_from_checkpoint(
+    gpt,
+    graphs,
+    input_,
+    output_folder="proc",
+    cache_folder="cache",
+    format_="BEAM-DIMAP",
+    date_only=False,
+    date_time_only=False,
+    prefix=None,
+    suffixes=None,
+    suppress_stderr=True,
+    workers=2,
+):
+    """Run several graphs for the inputs, computing the nodes they share only once per input.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        graphs (list): snapista Graph objects that share a prefix.
+        input_ (str, os.PathLike, or list): Input or list of inputs.
+        output_folder (str): Folder to save the outputs to.
+        cache_folder (str): Folder to keep the products at the checkpoint in. Products already in it are reused,
+            as long as the input (its path, size, and modification time) and the shared nodes are the same.
+        format_ (str): The extension of the outputs, e.g. 'GeoTIFF', 'HDF5', 'BEAM-DIMAP'.
+        date_only (bool): Drop everything except the date (and suffix) from the output names.
+        date_time_only (bool): Drop everything except the date and time (and suffix) from the output names.
+        prefix (str): Prefix to use for outputs.
+        suffixes (list): Suffix to use for the output of each graph. By default, the suffixes of the graphs.
+        suppress_stderr (bool): Capture stderr without printing it.
+        workers (int): Number of gpt runs executed in parallel.
+
+    Examples:
+        ```python
+        graphs = []
+        for chl_exp in (0.9, 1.04, 1.2):
+            c2rcc = snapista.operators.C2RCC_MSI()
+            c2rcc.chl_exp = chl_exp
+
+            graph = snapista.Graph()
+            graph.add_node(resample)
+            graph.add_node(subset)
+            graph.add_checkpoint()
+            graph.add_node(c2rcc)
+            graphs.append(graph)
+
+        snapista.checkpoint.run_from_checkpoint(
+            gpt, graphs, products, suffixes=['_c2rcc_0.9', '_c2rcc_1.04', '_c2rcc_1.2'], workers=3
+        )
+        ```
+
+    """
+
+    inputs = input_ if isinstance(input_, list) else [input_]
+    inputs = [pathlib.Path(product) for product in inputs]
+    suffixes = [graph.suffix for graph in graphs] if suffixes is None else suffixes
+
+    length = get_shared_prefix_length(graphs)
+    shared = _build_graph(graphs[0]._operators[:length])
+    tails = [_build_graph(graph._operators[length:]) for graph in graphs]
+
+    cache_folder = pathlib.Path(cache_folder)
+    cache_folder.mkdir(exist_ok=True)
+
+    jobs = {}
+    for product in inputs:
+        output_files = [
+            gpt._get_output_file(
+                graph=graph,
+                input_=product,
+                output_folder=output_folder,
+                date_only=date_only,
+                date_time_only=date_time_only,
+                prefix=prefix,
+                suffix=suffix,
+            )
+            for graph, suffix in zip(graphs, suffixes)
+        ]
+
+        if len(set(output_files)) < len(output_files):
+            raise ValueError(
+                f"The graphs produce outputs with the same names for {product.name}, use suffixes to tell them apart!"
+            )
+
+        jobs[product] = output_files
+
+    if length == 0:
+        print("⚠ The graphs share no nodes, running them in full")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        checkpoints = {}
+        for product in inputs:
+            if length == 0:
+                checkpoints[
+                    executor.submit(lambda product=product: (product, None))
+                ] = product
+            else:
+                checkpoints[
+                    executor.submit(
+                        _run_to_checkpoint,
+                        gpt,
+                        shared,
+                        product,
+                        cache_folder,
+                        suppress_stderr,
+                    )
+                ] = product
+
+        tails_futures = {}
+        for future in concurrent.futures.as_completed(checkpoints):
+            product = checkpoints[future]
+            cached, error = future.result()
+
+            if cached is None:
+                gpt._print_status(
+                    f"{product.name} (before the checkpoint)", False, error
+                )
+                continue
+
+            for tail, graph, output_file in zip(tails, graphs, jobs[product]):
+                tail = graph if length == 0 else tail
+                tails_futures[
+                    executor.submit(
+                        gpt._process,
+                        graph=tail,
+                        input_=cached,
+                        output_file=output_file,
+                        format_=format_,
+                        suppress_stderr=suppress_stderr,
+                        suppress_stdout=True,
+                    )
+                ] = output_file
+
+        for future in concurrent.futures.as_completed(tails_futures):
+            output_file = tails_futures[future]
+            try:
+                gpt._print_result(output_file, future.result(), suppress_stderr)
+            except _ERRORS as error:
+                gpt._print_status(output_file.name, False, str(error))
+
+
+def _run_to_checkpoint(gpt, shared, product, cache_folder, suppress_stderr):
+    """Run the shared nodes for the product, unless the result is already cached.
+
+    gpt writes into a temporary folder that is renamed into the cache only when it succeeded, so a killed run
+    never leaves a partial product that later runs would take for a checkpoint.
+
+    Returns:
+        tuple: The cached product (None if the shared nodes failed), and the error.
+
+    """
+
+    try:
+        key = _get_cache_key(product, shared)
+    except OSError as error:
+        return None, str(error)
+
+    # every cached product is in its own folder, named as the product
+    cached = cache_folder / key
+    dim = cached / f"{key}.dim"
+
+    if dim.exists():
+        return dim, None
+
+    temp_dir = pathlib.Path(tempfile.mkdtemp(prefix=f".{key}-", dir=cache_folder))
+    try:
+        try:
+            process = gpt._process(
+                graph=shared,
+                input_=product,
+                output_file=temp_dir / key,
+                format_="BEAM-DIMAP",
+                suppress_stderr=suppress_stderr,
+                suppress_stdout=True,
+            )
+        except _ERRORS as error:
+            return None, str(error)
+
+        if process.returncode != 0:
+            return None, gpt._get_error(process) if suppress_stderr else None
+
+        try:
+            os.rename(temp_dir, cached)
+        except OSError as error:
+            # another run made the same checkpoint meanwhile, use that one
+            if not dim.exists():
+                return None, str(error)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return dim, None
+
+
+def _get_cache_key(product, shared):
+    """Name the product at the checkpoint after the input and the shared nodes.
+
+    Inputs with the same name in different folders, or an input that was replaced, don't share a checkpoint.
+
+    """
+
+    stat = product.stat()
+    source = f"{product.resolve().as_posix()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    return "_".join(
+        (
+            product.stem,
+            hashlib.sha1(source.encode()).hexdigest()[:8],
+            shared.get_hash()[:12],
+        )
+    )
+
+
+def _build_graph(operators):
+    """Build a linear graph out of operators."""
+
+    graph = Graph()
+    for operator in operators:
+        graph.add_node(operator)
+
+    return graph
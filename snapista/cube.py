@@ -0,0 +1,313 @@
+""" This file contains functions to build analysis-ready time-series cubes out of processed products.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The bands of BEAM-DIMAP outputs (e.g. chl of every date) are written into a Zarr store as time × y × x arrays.
+ The store is written directly (Zarr v2 with zlib compression), so neither zarr nor netCDF is needed to make it,
+ while xarray.open_zarr or zarr.open read it as usual.
+
+ The bands are memory-mapped and copied one chunk at a time by a few threads, with a limited number of chunks
+ in flight, so the memory used does not depend on the length of the series or the size of the scenes.
+
+"""
+
+import re
+import json
+import zlib
+import shutil
+import pathlib
+import datetime
+import concurrent.futures
+
+import numpy
+import lxml.etree
+
+from snapista import dimap
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def build_cube(
+    products,
+    output,
+    bands,
+    chunks=(1, 512, 512),
+    level=5,
+    workers=4,
+    overwrite=False,
+):
+    """Stack bands of BEAM-DIMAP products into a chunked and compressed time × y × x Zarr store.
+
+    Args:
+        products (iterable): The .dim files, or the results of GPT.run_iter / GPT.run (only the done ones are used).
+        output (str or os.PathLike): Path to the Zarr store (a folder, e.g. 'chl.zarr').
+        bands (str or list): The band(s) to stack, each becomes a variable of the store.
+        chunks (tuple): The chunk shape (time, y, x).
+        level (int): The zlib compression level.
+        workers (int): Number of threads reading, compressing, and writing chunks.
+        overwrite (bool): Replace the store if it already exists.
+
+    Returns:
+        list: The times of the cube, in order.
+
+    Raises:
+        ValueError: If the products do not have the same size, or the time of a product can't be found,
+            or two products have the same time.
+
+    Examples:
+        ```python
+        results = gpt.run(graph, products, workers=4, date_only=True)
+        snapista.cube.build_cube(results, 'Data/chl.zarr', bands='chl')
+
+        cube = xarray.open_zarr('Data/chl.zarr')
+        ```
+
+    """
+
+    bands = [bands] if isinstance(bands, str) else list(bands)
+    output = pathlib.Path(output)
+
+    dims = []
+    for product in products:
+        if hasattr(product, "status"):
+            if product.status != "done":
+                continue
+            product = product.output
+        dims.append(pathlib.Path(product))
+
+    if len(dims) == 0:
+        raise ValueError("There are no products to build a cube from!")
+
+    series = sorted(((get_time(dim), dim) for dim in dims), key=lambda item: item[0])
+    times = [time for time, _ in series]
+    dims = [dim for _, dim in series]
+
+    # xarray can't select by a time that is in the cube twice
+    for (time, dim), (next_time, next_dim) in zip(series, series[1:]):
+        if time == next_time:
+            raise ValueError(
+                f"{dim.name} and {next_dim.name} have the same time ({time.isoformat()}), a cube has one slice per time!"
+            )
+
+    if output.exists():
+        if not overwrite:
+            raise FileExistsError(f"{output.as_posix()} already exists!")
+        shutil.rmtree(output)
+    output.mkdir(parents=True)
+
+    metadata = {".zgroup": {"zarr_format": 2}, ".zattrs": {}}
+
+    metadata["time/.zarray"] = _get_array_metadata(
+        (len(times),), (len(times),), "<i8", None, level
+    )
+    metadata["time/.zattrs"] = {
+        "_ARRAY_DIMENSIONS": ["time"],
+        "units": "seconds since 1970-01-01 00:00:00",
+        "calendar": "proleptic_gregorian",
+    }
+    seconds = numpy.array(
+        [int((time - _EPOCH).total_seconds()) for time in times], dtype="<i8"
+    )
+    (output / "time").mkdir()
+    _write_chunk(output / "time" / "0", seconds, level)
+
+    for band in bands:
+        metadata.update(_build_variable(dims, output, band, chunks, level, workers))
+
+    # consolidated metadata, so that the store is opened with a single read
+    for key, value in metadata.items():
+        file = output / key
+        file.parent.mkdir(exist_ok=True)
+        file.write_text(json.dumps(value, indent=4, allow_nan=False))
+    (output / ".zmetadata").write_text(
+        json.dumps(
+            {"zarr_consolidated_format": 1, "metadata": metadata},
+            indent=4,
+            allow_nan=False,
+        )
+    )
+
+    return times
+
+
+def get_time(dim):
+    """Get the time of a product from its name (e.g. 20200101T101010 or 2020-01-01), or its start time.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+
+    Returns:
+        datetime.datetime: The time of the product.
+
+    Raises:
+        ValueError: If neither the name nor the metadata has a time.
+
+    """
+
+    name = pathlib.Path(dim).name
+
+    match = re.search(
+        r"(\d{4})-?(\d{2})-?(\d{2})(?:T(\d{2})[-:]?(\d{2})[-:]?(\d{2}))?", name
+    )
+    if match is not None:
+        return datetime.datetime(*(int(group or 0) for group in match.groups()))
+
+    start_time = dimap.get_start_time(dim)
+    if start_time is not None:
+        return start_time
+
+    raise ValueError(f"There is no time in {name}!")
+
+
+def _build_variable(dims, output, band, chunks, level, workers):
+    """Write the chunks of one band and return the metadata of the variable."""
+
+    first = dimap.read_band(dims[0], band)
+    shape = (len(dims), *first.shape)
+    dtype = first.dtype.newbyteorder("<")
+
+    for dim in dims[1:]:
+        if dimap.read_band(dim, band).shape != first.shape:
+            raise ValueError(
+                f"{band} of {dim.name} is not the same size as in {dims[0].name}!"
+            )
+
+    no_data = dimap.get_no_data_value(dims[0], band)
+    if no_data is None and dtype.kind == "f":
+        no_data = numpy.nan
+    fill_value = _get_fill_value(dtype, 0 if no_data is None else no_data)
+
+    chunks = tuple(min(chunk, size) for chunk, size in zip(chunks, shape))
+    folder = output / band
+    folder.mkdir()
+
+    tasks = (
+        (t, y, x)
+        for t in range(0, shape[0], chunks[0])
+        for y in range(0, shape[1], chunks[1])
+        for x in range(0, shape[2], chunks[2])
+    )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        running = set()
+        for t, y, x in tasks:
+            # keep a few chunks in flight, not the whole cube
+            if len(running) >= 2 * workers:
+                finished, running = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    future.result()
+
+            running.add(
+                executor.submit(
+                    _copy_chunk,
+                    dims[t : t + chunks[0]],
+                    band,
+                    (y, x),
+                    chunks,
+                    dtype,
+                    dtype.type(0) if fill_value is None else fill_value,
+                    folder / f"{t // chunks[0]}.{y // chunks[1]}.{x // chunks[2]}",
+                    level,
+                )
+            )
+
+        for future in running:
+            future.result()
+
+    return {
+        f"{band}/.zarray": _get_array_metadata(
+            shape, chunks, dtype.str, fill_value, level
+        ),
+        f"{band}/.zattrs": _get_variable_attributes(dims[0], band),
+    }
+
+
+def _get_fill_value(dtype, no_data):
+    """The no-data value as the type of the band, None if the type can't hold it (e.g. NaN for an integer band)."""
+
+    if dtype.kind in "iu":
+        info = numpy.iinfo(dtype)
+        if (
+            not numpy.isfinite(no_data)
+            or no_data != int(no_data)
+            or not info.min <= no_data <= info.max
+        ):
+            return None
+
+    return dtype.type(no_data)
+
+
+def _copy_chunk(dims, band, origin, chunks, dtype, fill_value, file, level):
+    """Read a chunk from the bands of the products and write it to the store."""
+
+    y, x = origin
+
+    # chunks at the edges are stored whole, filled with the fill value
+    chunk = numpy.full(chunks, fill_value, dtype=dtype)
+
+    for t, dim in enumerate(dims):
+        data = dimap.read_band(dim, band)[y : y + chunks[1], x : x + chunks[2]]
+        chunk[t, : data.shape[0], : data.shape[1]] = data
+
+    _write_chunk(file, chunk, level)
+
+
+def _write_chunk(file, chunk, level):
+    file.write_bytes(zlib.compress(numpy.ascontiguousarray(chunk).tobytes(), level))
+
+
+def _get_array_metadata(shape, chunks, dtype, fill_value, level):
+    """The .zarray of a Zarr v2 array."""
+
+    if fill_value is not None:
+        fill_value = fill_value.item()
+        if isinstance(fill_value, float) and not numpy.isfinite(fill_value):
+            fill_value = "NaN" if numpy.isnan(fill_value) else str(fill_value)
+
+    return {
+        "zarr_format": 2,
+        "shape": list(shape),
+        "chunks": list(chunks),
+        "dtype": dtype,
+        "compressor": {"id": "zlib", "level": level},
+        "fill_value": fill_value,
+        "order": "C",
+        "filters": None,
+    }
+
+
+def _get_variable_attributes(dim, band):
+    """The .zattrs of a band: the dimensions (as xarray expects them) and the georeferencing of the product."""
+
+    attributes = {"_ARRAY_DIMENSIONS": ["time", "y", "x"]}
+
+    document = lxml.etree.parse(str(dim))
+
+    wkt = document.findtext("Coordinate_Reference_System/WKT")
+    if wkt:
+        attributes["crs_wkt"] = wkt.strip()
+
+    transform = document.findtext("Geoposition/IMAGE_TO_MODEL_TRANSFORM")
+    if transform:
+        attributes["image_to_model_transform"] = [
+            float(value) for value in transform.split(",")
+        ]
+
+    for info in document.iterfind("Image_Interpretation/Spectral_Band_Info"):
+        if info.findtext("BAND_NAME") == band:
+            for tag, key in (
+                ("PHYSICAL_UNIT", "units"),
+                ("BAND_DESCRIPTION", "long_name"),
+            ):
+                if info.findtext(tag):
+                    attributes[key] = info.findtext(tag).strip()
+
+            if info.findtext("SCALING_FACTOR", "1") not in ("1", "1.0"):
+                attributes["scale_factor"] = float(info.findtext("SCALING_FACTOR"))
+            if info.findtext("SCALING_OFFSET", "0") not in ("0", "0.0"):
+                attributes["add_offset"] = float(info.findtext("SCALING_OFFSET"))
+
+    return attributes
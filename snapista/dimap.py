@@ -0,0 +1,519 @@
+""" This file contains helpers to work with products saved by gpt in the BEAM-DIMAP format.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ A BEAM-DIMAP product is a .dim xml header and a .data folder next to it with an ENVI .hdr/.img pair per band.
+ Some post-processing steps (renaming or appending bands) are cheap to do directly on these files,
+ without starting a JVM.
+
+"""
+
+import re
+import datetime
+import pathlib
+
+import lxml.etree
+
+
+def get_data_folder(dim):
+    """Get the .data folder of a BEAM-DIMAP product.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+
+    Returns:
+        pathlib.Path: Path to the .data folder.
+
+    """
+
+    return pathlib.Path(dim).with_suffix(".data")
+
+
+def get_product_name(dim):
+    """Get the name of a BEAM-DIMAP product (the name SNAP knows it by, not the name of the file).
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+
+    Returns:
+        str: Name of the product.
+
+    """
+
+    document = lxml.etree.parse(str(dim))
+    return document.findtext("Dataset_Id/DATASET_NAME")
+
+
+def get_band_names(dim):
+    """Get the names of the bands in a BEAM-DIMAP product.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+
+    Returns:
+        list: Band names in the order of their band indices.
+
+    """
+
+    document = lxml.etree.parse(str(dim))
+    return [
+        element.text
+        for element in document.iterfind(
+            "Image_Interpretation/Spectral_Band_Info/BAND_NAME"
+        )
+    ]
+
+
+def rename_bands(dim, mapping):
+    """Rename bands of a BEAM-DIMAP product in place.
+
+    Band names are replaced in the band info, in the data file references, in the band expressions
+    (valid pixel expressions, virtual bands, masks), in the ENVI headers, and the band files are renamed.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        mapping (dict): Old band name -> new band name.
+
+    """
+
+    mapping = {old: new for old, new in mapping.items() if old != new}
+
+    if len(mapping) == 0:
+        return
+
+    dim = pathlib.Path(dim)
+    data = get_data_folder(dim)
+    document = lxml.etree.parse(str(dim))
+
+    # whole-word replacement in one pass, so that swapping names (a -> b, b -> a) works as expected
+    names_regex = re.compile(
+        r"\b({})\b".format(
+            "|".join(map(re.escape, sorted(mapping, key=len, reverse=True)))
+        )
+    )
+
+    def replace_in_expression(text):
+        return names_regex.sub(lambda match: mapping[match.group(1)], text)
+
+    for element in document.iterfind(
+        "Image_Interpretation/Spectral_Band_Info/BAND_NAME"
+    ):
+        element.text = mapping.get(element.text, element.text)
+
+    for tag in ("VALID_MASK_TERM", "EXPRESSION"):
+        for element in document.iter(tag):
+            if element.text is not None:
+                element.text = replace_in_expression(element.text)
+
+    for element in document.iterfind("Data_Access/Data_File/DATA_FILE_PATH"):
+        href = pathlib.PurePosixPath(element.get("href"))
+        if href.stem in mapping:
+            element.set("href", str(href.with_name(mapping[href.stem] + href.suffix)))
+
+    # two steps, so that a band never overwrites the file of another band that is renamed later
+    renamed = []
+    for old, new in mapping.items():
+        for extension in (".hdr", ".img"):
+            file = data / (old + extension)
+            if file.exists():
+                temporary = file.with_name(f".{new}{extension}.renaming")
+                file.rename(temporary)
+                renamed.append((temporary, data / (new + extension)))
+
+    for temporary, file in renamed:
+        temporary.rename(file)
+        if file.suffix == ".hdr":
+            header = file.read_text()
+            header = re.sub(
+                r"(band names = \{\s*)(.*?)(\s*\})",
+                lambda match: match.group(1)
+                + replace_in_expression(match.group(2))
+                + match.group(3),
+                header,
+                flags=re.DOTALL,
+            )
+            file.write_text(header)
+
+    document.write(
+        str(dim), pretty_print=True, xml_declaration=True, encoding="ISO-8859-1"
+    )
+
+
+# ENVI data type -> numpy type
+_ENVI_TYPES = {
+    "1": "u1",
+    "2": "i2",
+    "3": "i4",
+    "4": "f4",
+    "5": "f8",
+    "12": "u2",
+    "13": "u4",
+    "14": "i8",
+    "15": "u8",
+}
+
+# the data types of bands SNAP writes to BEAM-DIMAP
+_DIMAP_TYPES = ("uint8", "int16", "uint16", "int32", "uint32", "float32", "float64")
+
+
+def read_header(hdr):
+    """Read an ENVI header.
+
+    Args:
+        hdr (str or os.PathLike): Path to the .hdr file.
+
+    Returns:
+        dict: Header field -> value, both as strings (the braces of the values are removed).
+
+    """
+
+    text = pathlib.Path(hdr).read_text()
+    return {
+        key.strip(): value.strip().strip("{}").strip()
+        for key, value in re.findall(
+            r"^\s*([^=\n]+?)\s*=\s*(\{.*?\}|[^\n]*)",
+            text,
+            flags=re.MULTILINE | re.DOTALL,
+        )
+    }
+
+
+def read_band(dim, band, mode="r"):
+    """Memory-map a band of a BEAM-DIMAP product, so that only the parts that are used are read from the disk.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        band (str): Name of the band.
+        mode (str): 'r' for a read-only band, 'r+' to change the band in place.
+
+    Returns:
+        numpy.memmap: The band, with a shape of (lines, samples).
+
+    Raises:
+        ValueError: If the band is not in the product, or it is a virtual band without data.
+
+    """
+
+    import numpy
+
+    hdr = get_data_folder(dim) / f"{band}.hdr"
+    if not hdr.exists():
+        raise ValueError(
+            f"There is no data for {band} in {pathlib.Path(dim).name} (virtual bands are not written)!"
+        )
+
+    header = read_header(hdr)
+    byte_order = ">" if header.get("byte order", "0") == "1" else "<"
+
+    return numpy.memmap(
+        hdr.with_suffix(".img"),
+        dtype=byte_order + _ENVI_TYPES[header["data type"]],
+        mode=mode,
+        offset=int(header.get("header offset", "0")),
+        shape=(int(header["lines"]), int(header["samples"])),
+    )
+
+
+def add_band(
+    dim,
+    band,
+    dtype="float32",
+    like=None,
+    description=None,
+    unit=None,
+    no_data_value=None,
+):
+    """Add a band to a BEAM-DIMAP product in place, and memory-map it to fill it in.
+
+    The band is written big-endian, as SNAP writes (and expects) the band files.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        band (str): Name of the new band.
+        dtype (str): The data type, one of uint8, int16, uint16, int32, uint32, float32, float64.
+        like (str): A band to take the size from. By default, the size of the product.
+        description (str): Description of the band.
+        unit (str): Unit of the band.
+        no_data_value (float): The no-data value, None if the band does not use one.
+
+    Returns:
+        numpy.memmap: The new band (filled with zeros), with a shape of (lines, samples).
+
+    Raises:
+        ValueError: If there is already a band with the name, or the data type is not supported.
+
+    """
+
+    import numpy
+
+    dim = pathlib.Path(dim)
+    dtype = numpy.dtype(dtype).newbyteorder(">")
+    if dtype.name not in _DIMAP_TYPES:
+        raise ValueError(f"BEAM-DIMAP does not support {dtype.name} bands!")
+
+    document = lxml.etree.parse(str(dim))
+    names = [
+        element.text
+        for element in document.iterfind(
+            "Image_Interpretation/Spectral_Band_Info/BAND_NAME"
+        )
+    ]
+    if band in names:
+        raise ValueError(f"There is already a band {band} in {dim.name}!")
+
+    if like is not None:
+        lines, samples = read_band(dim, like).shape
+    else:
+        lines = int(document.findtext("Raster_Dimensions/NROWS"))
+        samples = int(document.findtext("Raster_Dimensions/NCOLS"))
+
+    index = str(len(names))
+    envi_type = {value: key for key, value in _ENVI_TYPES.items()}[dtype.str[1:]]
+
+    def add(parent, tag, text=None, **attributes):
+        element = lxml.etree.SubElement(parent, tag, **attributes)
+        element.text = text
+        return element
+
+    count = document.find("Raster_Dimensions/NBANDS")
+    if count is not None:
+        count.text = str(len(names) + 1)
+
+    data_file = add(document.find("Data_Access"), "Data_File")
+    add(data_file, "DATA_FILE_PATH", href=f"{dim.stem}.data/{band}.hdr")
+    add(data_file, "BAND_INDEX", index)
+
+    info = add(document.find("Image_Interpretation"), "Spectral_Band_Info")
+    add(info, "BAND_INDEX", index)
+    add(info, "BAND_DESCRIPTION", description or "")
+    add(info, "BAND_NAME", band)
+    add(info, "BAND_RASTER_WIDTH", str(samples))
+    add(info, "BAND_RASTER_HEIGHT", str(lines))
+    add(info, "DATA_TYPE", dtype.name)
+    add(info, "PHYSICAL_UNIT", unit or "")
+    add(info, "SCALING_FACTOR", "1.0")
+    add(info, "SCALING_OFFSET", "0.0")
+    add(info, "LOG10_SCALED", "false")
+    add(info, "NO_DATA_VALUE_USED", "false" if no_data_value is None else "true")
+    add(info, "NO_DATA_VALUE", str(0.0 if no_data_value is None else no_data_value))
+
+    data = get_data_folder(dim)
+    data.mkdir(exist_ok=True)
+    (data / f"{band}.hdr").write_text(
+        "ENVI\n"
+        f"description = {{Sentinel Application Platform (SNAP) Image - {band}}}\n"
+        f"samples = {samples}\n"
+        f"lines = {lines}\n"
+        "bands = 1\n"
+        "header offset = 0\n"
+        "file type = ENVI Standard\n"
+        f"data type = {envi_type}\n"
+        "interleave = bsq\n"
+        "byte order = 1\n"
+        f"band names = {{ {band} }}\n"
+    )
+    with open(data / f"{band}.img", "wb") as file:
+        file.truncate(lines * samples * dtype.itemsize)
+
+    document.write(
+        str(dim), pretty_print=True, xml_declaration=True, encoding="ISO-8859-1"
+    )
+
+    return read_band(dim, band, mode="r+")
+
+
+def append_bands(dim, source):
+    """Move the bands of a BEAM-DIMAP product into another one with the same size, in place.
+
+    The band files are moved (not copied) when both products are on the same file system, and the band info
+    (unit, no-data value, valid pixel expression, ...) is kept. The source product is left without bands.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file to add the bands to.
+        source (str or os.PathLike): Path to the .dim file with the bands to add.
+
+    Returns:
+        list: The names of the added bands.
+
+    Raises:
+        ValueError: If one of the bands is already in the product.
+
+    """
+
+    import shutil
+
+    dim, source = pathlib.Path(dim), pathlib.Path(source)
+    document = lxml.etree.parse(str(dim))
+    source_document = lxml.etree.parse(str(source))
+
+    names = get_band_names(dim)
+    added = get_band_names(source)
+    duplicates = [band for band in added if band in names]
+    if len(duplicates) > 0:
+        raise ValueError(f"{', '.join(duplicates)} already in {dim.name}!")
+
+    data_files = {
+        element.findtext("BAND_INDEX"): element
+        for element in source_document.iterfind("Data_Access/Data_File")
+    }
+
+    for i, info in enumerate(
+        source_document.iterfind("Image_Interpretation/Spectral_Band_Info")
+    ):
+        band, index = info.findtext("BAND_NAME"), str(len(names) + i)
+
+        data_file = data_files.get(info.findtext("BAND_INDEX"))
+        if data_file is not None:
+            for extension in (".hdr", ".img"):
+                shutil.move(
+                    get_data_folder(source) / (band + extension),
+                    get_data_folder(dim) / (band + extension),
+                )
+            data_file.find("DATA_FILE_PATH").set("href", f"{dim.stem}.data/{band}.hdr")
+            data_file.find("BAND_INDEX").text = index
+            document.find("Data_Access").append(data_file)
+
+        info.find("BAND_INDEX").text = index
+        document.find("Image_Interpretation").append(info)
+
+    count = document.find("Raster_Dimensions/NBANDS")
+    if count is not None:
+        count.text = str(len(names) + len(added))
+
+    # replaced at once, a product is never left with half of the band info
+    temporary = dim.with_name(f".{dim.name}.appending")
+    document.write(
+        str(temporary), pretty_print=True, xml_declaration=True, encoding="ISO-8859-1"
+    )
+    temporary.replace(dim)
+
+    return added
+
+
+def copy_product(dim, target):
+    """Copy a BEAM-DIMAP product (the .dim file and the .data folder).
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        target (str or os.PathLike): Path to the new .dim file (with the extension).
+
+    Returns:
+        pathlib.Path: Path to the new .dim file.
+
+    """
+
+    import shutil
+
+    dim, target = pathlib.Path(dim), pathlib.Path(target)
+
+    shutil.copytree(get_data_folder(dim), get_data_folder(target))
+    _write_renamed(dim, target)
+
+    return target
+
+
+def move_product(dim, target):
+    """Move a BEAM-DIMAP product (the .dim file and the .data folder).
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        target (str or os.PathLike): Path to the new .dim file (with the extension).
+
+    Returns:
+        pathlib.Path: Path to the new .dim file.
+
+    """
+
+    import shutil
+
+    dim, target = pathlib.Path(dim), pathlib.Path(target)
+
+    shutil.move(get_data_folder(dim), get_data_folder(target))
+    _write_renamed(dim, target)
+    if dim != target:
+        dim.unlink()
+
+    return target
+
+
+def _write_renamed(dim, target):
+    """Write the .dim file of a product to the target, with the data file paths in the new .data folder."""
+
+    document = lxml.etree.parse(str(dim))
+
+    for element in document.iterfind("Data_Access/Data_File/DATA_FILE_PATH"):
+        href = pathlib.PurePosixPath(element.get("href"))
+        element.set(
+            "href", str(pathlib.PurePosixPath(f"{target.stem}.data") / href.name)
+        )
+
+    document.write(
+        str(target), pretty_print=True, xml_declaration=True, encoding="ISO-8859-1"
+    )
+
+
+def get_no_data_value(dim, band):
+    """Get the no-data value of a band in a BEAM-DIMAP product.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        band (str): Name of the band.
+
+    Returns:
+        float: The no-data value, None if the band does not use one.
+
+    """
+
+    document = lxml.etree.parse(str(dim))
+    for info in document.iterfind("Image_Interpretation/Spectral_Band_Info"):
+        if info.findtext("BAND_NAME") == band:
+            if info.findtext("NO_DATA_VALUE_USED", "false").lower() == "true":
+                return float(info.findtext("NO_DATA_VALUE"))
+            return None
+
+    return None
+
+
+def get_scaling(dim, band):
+    """Get the scaling of a band in a BEAM-DIMAP product, the physical value is raw * factor + offset.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        band (str): Name of the band.
+
+    Returns:
+        tuple: The scaling factor and offset, (1.0, 0.0) if the band is not scaled.
+
+    """
+
+    document = lxml.etree.parse(str(dim))
+    for info in document.iterfind("Image_Interpretation/Spectral_Band_Info"):
+        if info.findtext("BAND_NAME") == band:
+            return (
+                float(info.findtext("SCALING_FACTOR", "1")),
+                float(info.findtext("SCALING_OFFSET", "0")),
+            )
+
+    return 1.0, 0.0
+
+
+def get_start_time(dim):
+    """Get the sensing start time of a BEAM-DIMAP product.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+
+    Returns:
+        datetime.datetime: The start time, None if the product does not have one.
+
+    """
+
+    document = lxml.etree.parse(str(dim))
+    text = document.findtext("Production/PRODUCT_SCENE_RASTER_START_TIME")
+
+    if not text:
+        return None
+
+    # e.g. 01-JAN-2020 10:10:10.000000
+    return datetime.datetime.strptime(text.strip().title(), "%d-%b-%Y %H:%M:%S.%f")
@@ -0,0 +1,219 @@
+""" This file contains the drivers for writing several outputs from one read of the input.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Several products from the same scene (subsets of different areas, the same product as BEAM-DIMAP and GeoTIFF)
+ would take a gpt run each, and the input would be read and decoded every time. Instead, the branches are
+ attached to the end of the graph, each with its own Write node, and a single gpt run writes all of them.
+
+"""
+
+import copy
+import time
+import pathlib
+import zipfile
+import subprocess
+import concurrent.futures
+
+from snapista.gpt import GPT, Result, _EXTENSIONS
+from snapista.operators import Write
+
+
+class Branch:
+    """An output of a fan-out run: the operators applied after the shared graph, the format, and the naming.
+
+    Args:
+        *operators (Operator): Operators applied to the output of the shared graph, in order (e.g. a Subset).
+        format_ (str): The format of the output, e.g. 'GeoTIFF', 'HDF5', 'BEAM-DIMAP'.
+        output_folder (str): Folder to save the output to.
+        date_only (bool): Drop everything except the date (and suffix) from the output name.
+        date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+        prefix (str): Prefix to use for output.
+        suffix (str): Suffix to use for output. By default, the suffix of the shared graph followed by the short
+            names of the operators of the branch.
+        output_file_name (str): If given, the automatically generated name will be replaced by this.
+
+    Examples:
+        ```python
+        north, south = snapista.operators.Subset(), snapista.operators.Subset()
+        north.geo_region = 'POLYGON((...))'
+        south.geo_region = 'POLYGON((...))'
+
+        snapista.fanout.run_fanout(
+            gpt,
+            graph,
+            products,
+            branches=[
+                snapista.fanout.Branch(north, date_only=True, prefix='north_'),
+                snapista.fanout.Branch(south, date_only=True, prefix='south_', format_='GeoTIFF'),
+            ],
+        )
+        ```
+
+    """
+
+    def __init__(
+        self,
+        *operators,
+        format_="BEAM-DIMAP",
+        output_folder="proc",
+        date_only=False,
+        date_time_only=False,
+        prefix=None,
+        suffix=None,
+        output_file_name=None,
+    ):
+        self.operators = list(operators)
+        self.format_ = format_
+        self.naming = {
+            "output_folder": output_folder,
+            "date_only": date_only,
+            "date_time_only": date_time_only,
+            "prefix": prefix,
+            "suffix": suffix,
+            "output_file_name": output_file_name,
+        }
+
+    def __repr__(self):
+        return f"Branch({', '.join(map(repr, self.operators))} -> {self.format_})"
+
+    def get_suffix(self, graph):
+        """Get the suffix of the output of the branch after the graph."""
+
+        if self.naming["suffix"] is not None:
+            return self.naming["suffix"]
+
+        return graph.suffix + "".join(
+            f"_{operator._short_name.lower()}"
+            for operator in self.operators
+            if operator._short_name is not None
+        )
+
+
+def run_fanout(gpt, graph, input_, branches, workers=1, suppress_stderr=True):
+    """Run the graph once per input and write the outputs of all the branches.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        graph (Graph): The shared part of the processing. Its last node feeds all the branches.
+        input_ (str, os.PathLike, or list): Input or list of inputs.
+        branches (list): snapista.fanout.Branch objects.
+        workers (int): Number of gpt runs executed in parallel.
+        suppress_stderr (bool): Capture stderr without printing it.
+
+    Returns:
+        list: A snapista.Result per input and branch. The branches of an input share the status of the gpt run.
+            Only when the graph of an input can't be built, there is a single error Result for it, without output.
+
+    """
+
+    inputs = input_ if isinstance(input_, list) else [input_]
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _run, gpt, graph, pathlib.Path(product), branches, suppress_stderr
+            )
+            for product in inputs
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            for result in future.result():
+                GPT._report(result)
+                results.append(result)
+
+    return results
+
+
+def build_graph(gpt, graph, input_, branches):
+    """Build the graph for an input: the shared graph, then every branch with a Write node.
+
+    Returns:
+        tuple: The graph, and the output files of the branches (with extensions).
+
+    """
+
+    job = copy.deepcopy(graph)
+    last = job._node_ids[-1]
+
+    output_files = []
+    for branch in branches:
+        naming = dict(branch.naming, suffix=branch.get_suffix(graph))
+        output_file = gpt._get_output_file(graph=graph, input_=input_, **naming)
+        output_file = output_file.parent / (
+            output_file.name + _EXTENSIONS.get(branch.format_, "")
+        )
+        output_files.append(output_file)
+
+        source = last
+        for operator in branch.operators:
+            source = job.add_node(operator, sources=source)
+
+        write = Write()
+        write.file = str(output_file)
+        write.format_name = branch.format_
+        job.add_node(write, sources=source)
+
+    if len(set(output_files)) < len(output_files):
+        raise ValueError(f"Several branches write to the same file for {input_.name}!")
+
+    return job, output_files
+
+
+def _run(gpt, graph, input_, branches, suppress_stderr):
+    """Run all the branches for one input, the errors end up in the results (one per branch output)."""
+
+    started = time.time()
+
+    try:
+        job, output_files = build_graph(gpt, graph, input_, branches)
+    except (OSError, ValueError) as error:
+        # there are no outputs to report the error for
+        return [
+            Result(input_, None, "error", str(error), started, time.time(), None, None)
+        ]
+
+    try:
+        process = gpt._process(
+            graph=job,
+            input_=input_,
+            output_file=None,
+            format_=None,
+            suppress_stderr=suppress_stderr,
+            suppress_stdout=True,
+        )
+    # SubprocessError: e.g. the memory limit of the placement could not be applied in the child
+    except (
+        OSError,
+        ValueError,
+        zipfile.BadZipFile,
+        subprocess.SubprocessError,
+    ) as error:
+        return [
+            Result(
+                input_,
+                output_file,
+                "error",
+                str(error),
+                started,
+                time.time(),
+                None,
+                None,
+            )
+            for output_file in output_files
+        ]
+
+    return [
+        Result(
+            input=input_,
+            output=output_file,
+            status="done" if process.returncode == 0 else "failed",
+            error=gpt._get_error(process),
+            started=started,
+            finished=time.time(),
+            wall_time=process.wall_time,
+            peak_memory=process.peak_memory,
+        )
+        for output_file in output_files
+    ]
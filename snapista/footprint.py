@@ -0,0 +1,583 @@
+""" This file contains functions to get the footprints of Sentinel products without opening them in SNAP.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Sentinel-2 products have the footprint in the MTD_MSIL*.xml metadata, Sentinel-3 products in xfdumanifest.xml.
+ Both are read directly from the .zip archives or the product folders.
+
+ The footprints can be kept in a FootprintIndex (SQLite with an R*Tree), so that a batch drops the products that
+ don't overlap an area of interest before any gpt starts, and cuts the others to the part inside it (run_aoi).
+
+"""
+
+import re
+import copy
+import json
+import sqlite3
+import pathlib
+import zipfile
+import threading
+import contextlib
+import concurrent.futures
+
+import lxml.etree
+
+from snapista._cache import get_cache_folder
+
+
+def get_footprint(product):
+    """Get the footprint of a Sentinel-2 or Sentinel-3 product.
+
+    Args:
+        product (str or os.PathLike): The product: a .zip archive, a .SAFE or .SEN3 folder, or the metadata file.
+
+    Returns:
+        list: The (longitude, latitude) vertices of the footprint, None if the product has no known metadata.
+
+    """
+
+    document = read_metadata(pathlib.Path(product))
+    if document is None:
+        return None
+
+    # Sentinel-2: <EXT_POS_LIST>, Sentinel-3: <gml:posList>, both are "lat lon lat lon ..."
+    text = document.findtext(".//EXT_POS_LIST") or document.findtext(".//{*}posList")
+    if not text:
+        return None
+
+    values = [float(value) for value in text.split()]
+    return [(lon, lat) for lat, lon in zip(values[0::2], values[1::2])]
+
+
+def get_bounds(product, buffer=0.0):
+    """Get the bounding box of the footprint of a product.
+
+    Args:
+        product (str or os.PathLike): The product (see get_footprint).
+        buffer (float): Degrees to add on every side.
+
+    Returns:
+        tuple: (min longitude, min latitude, max longitude, max latitude), None if the footprint is not known.
+
+    """
+
+    footprint = get_footprint(product)
+    if footprint is None:
+        return None
+
+    lons = [lon for lon, _ in footprint]
+    lats = [lat for _, lat in footprint]
+
+    return (
+        max(min(lons) - buffer, -180.0),
+        max(min(lats) - buffer, -90.0),
+        min(max(lons) + buffer, 180.0),
+        min(max(lats) + buffer, 90.0),
+    )
+
+
+def _is_metadata(name):
+    name = pathlib.PurePath(name).name
+    return name == "xfdumanifest.xml" or (
+        name.startswith("MTD_MSIL") and name.endswith(".xml")
+    )
+
+
+def read_metadata(product):
+    """Parse the metadata of a Sentinel-2 (MTD_MSIL*.xml) or Sentinel-3 (xfdumanifest.xml) product.
+
+    Args:
+        product (pathlib.Path): The product: a .zip archive, a .SAFE or .SEN3 folder, or the metadata file.
+
+    Returns:
+        lxml.etree._ElementTree: The parsed metadata, None if the product has no known metadata.
+
+    """
+
+    try:
+        if product.is_file() and _is_metadata(product.name):
+            return lxml.etree.parse(str(product))
+
+        if product.is_dir():
+            for file in product.iterdir():
+                if _is_metadata(file.name):
+                    return lxml.etree.parse(str(file))
+            return None
+
+        if zipfile.is_zipfile(product):
+            with zipfile.ZipFile(product) as zf:
+                # the metadata is at the top of the product folder, not in the granules
+                names = sorted(
+                    (name for name in zf.namelist() if _is_metadata(name)),
+                    key=lambda name: name.count("/"),
+                )
+                if len(names) > 0:
+                    with zf.open(names[0]) as file:
+                        return lxml.etree.parse(file)
+    except (OSError, lxml.etree.XMLSyntaxError):
+        return None
+
+    return None
+
+
+class FootprintIndex:
+    """A SQLite database of product footprints, with an R*Tree of their bounding boxes.
+
+    Examples:
+        ```python
+        index = snapista.footprint.FootprintIndex()
+        index.add(products)
+
+        aoi = 'POLYGON((12.2 45.2, 12.6 45.2, 12.6 45.5, 12.2 45.5, 12.2 45.2))'
+        products = index.query(aoi)
+        ```
+
+    """
+
+    def __init__(self, file=None):
+        """Open (or create) a footprint index.
+
+        Args:
+            file (str): Path to the database. By default, footprints.sqlite in the snapista cache folder.
+
+        """
+
+        self.file = (
+            get_cache_folder() / "footprints.sqlite"
+            if file is None
+            else pathlib.Path(file)
+        )
+        self._lock = threading.Lock()
+
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE,
+                    mtime INTEGER,
+                    size INTEGER,
+                    footprint TEXT
+                )
+                """)
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS bounds "
+                "USING rtree(id, min_lon, max_lon, min_lat, max_lat)"
+            )
+
+    def __repr__(self):
+        return f"FootprintIndex({self.file.as_posix()})"
+
+    def add(self, products):
+        """Add the footprints of products, reading the metadata only of new or changed products.
+
+        Products without a known footprint are remembered as such, so their metadata is not read again.
+
+        Args:
+            products (list): The products (see get_footprint).
+
+        Returns:
+            dict: Product -> footprint (None if not known).
+
+        """
+
+        footprints = {}
+
+        with self._lock, self._connect() as connection:
+            for product in products:
+                path = pathlib.Path(product).resolve()
+                if not path.exists():
+                    # the run reports the missing input
+                    footprints[product] = None
+                    continue
+
+                path, stat = str(path), path.stat()
+
+                row = connection.execute(
+                    "SELECT id, mtime, size, footprint FROM products WHERE path = ?",
+                    (path,),
+                ).fetchone()
+                if row is not None and row[1:3] == (stat.st_mtime_ns, stat.st_size):
+                    footprints[product] = None if row[3] is None else json.loads(row[3])
+                    continue
+
+                if row is not None:
+                    connection.execute("DELETE FROM products WHERE id = ?", (row[0],))
+                    connection.execute("DELETE FROM bounds WHERE id = ?", (row[0],))
+
+                footprint = get_footprint(path)
+                if footprint is not None:
+                    footprint = parse_polygon(footprint)
+                cursor = connection.execute(
+                    "INSERT INTO products (path, mtime, size, footprint) VALUES (?, ?, ?, ?)",
+                    (
+                        path,
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        None if footprint is None else json.dumps(footprint),
+                    ),
+                )
+                if footprint is not None:
+                    lons, lats = zip(*footprint)
+                    connection.execute(
+                        "INSERT INTO bounds VALUES (?, ?, ?, ?, ?)",
+                        (cursor.lastrowid, min(lons), max(lons), min(lats), max(lats)),
+                    )
+
+                footprints[product] = footprint
+
+        return footprints
+
+    def query(self, aoi):
+        """Find the indexed products whose footprint overlaps the area of interest.
+
+        Args:
+            aoi (str or list): A WKT polygon, or its (longitude, latitude) vertices.
+
+        Returns:
+            list: The products (pathlib.Path), sorted by name.
+
+        """
+
+        aoi = parse_polygon(aoi)
+        lons, lats = zip(*aoi)
+
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(
+                "SELECT path, footprint FROM products JOIN bounds USING (id) "
+                "WHERE max_lon >= ? AND min_lon <= ? AND max_lat >= ? AND min_lat <= ?",
+                (min(lons), max(lons), min(lats), max(lats)),
+            ).fetchall()
+
+        # the R*Tree only compares the bounding boxes
+        return sorted(
+            (
+                pathlib.Path(path)
+                for path, footprint in rows
+                if intersects(aoi, json.loads(footprint))
+            ),
+            key=lambda path: path.name,
+        )
+
+    def select(self, products, aoi):
+        """Keep the products that overlap the area of interest, with the part of it they cover.
+
+        Products without a known footprint are kept, with the whole area of interest.
+
+        Args:
+            products (list): The products.
+            aoi (str or list): A WKT polygon, or its (longitude, latitude) vertices.
+
+        Returns:
+            list: (product, WKT polygon of the area of interest within the footprint) pairs.
+
+        """
+
+        aoi = parse_polygon(aoi)
+        selected = []
+
+        for product, footprint in self.add(products).items():
+            if footprint is None:
+                selected.append((product, to_wkt(aoi)))
+                continue
+
+            if not intersects(aoi, footprint):
+                continue
+
+            region = intersect(aoi, footprint)
+            selected.append((product, to_wkt(region if region is not None else aoi)))
+
+        return selected
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open a connection, commit when the block succeeds (roll back otherwise), and close it."""
+
+        connection = sqlite3.connect(self.file, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def run_aoi(
+    gpt,
+    graph,
+    input_,
+    aoi,
+    index=None,
+    output_folder="proc",
+    format_="BEAM-DIMAP",
+    date_only=False,
+    date_time_only=False,
+    prefix=None,
+    suffix=None,
+    suppress_stderr=True,
+    output_file_name=None,
+    workers=1,
+):
+    """Run the graph only for the inputs that overlap the area of interest, cut to the part they cover.
+
+    The geo_region of the Subsets that read the input is set to the area of interest within the footprint of the
+    input (see set_region). If there is none, one is added in front of the graph. The names of the outputs are not
+    changed by it.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        graph (Graph): A snapista Graph object.
+        input_ (str, os.PathLike, or list): Input or list of inputs.
+        aoi (str or list): A WKT polygon, or its (longitude, latitude) vertices.
+        index (FootprintIndex): The index to keep the footprints in. By default, the one in the cache folder.
+        workers (int): Number of gpt runs executed in parallel.
+        The other arguments are as in GPT.run.
+
+    Returns:
+        list: A snapista.Result per input that overlaps the area of interest.
+
+    """
+
+    inputs = input_ if isinstance(input_, list) else [input_]
+    index = FootprintIndex() if index is None else index
+
+    selected = index.select([pathlib.Path(product) for product in inputs], aoi)
+    if len(selected) < len(inputs):
+        print(
+            f"⏭ {len(inputs) - len(selected)} of {len(inputs)} inputs don't overlap the area of interest"
+        )
+
+    output_kwargs = {
+        "output_folder": output_folder,
+        "date_only": date_only,
+        "date_time_only": date_time_only,
+        "prefix": prefix,
+        "suffix": graph.suffix if suffix is None else suffix,
+        "output_file_name": output_file_name,
+    }
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                gpt._run_job,
+                graph=set_region(graph, region),
+                input_=product,
+                format_=format_,
+                suppress_stderr=suppress_stderr,
+                suppress_stdout=True,
+                output_kwargs=output_kwargs,
+            )
+            for product, region in selected
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            gpt._report(result)
+            results.append(result)
+
+    return results
+
+
+def set_region(graph, region):
+    """Get a copy of the graph with the geo_region of the Subsets that read the input set to the region.
+
+    Only the Subsets fed directly by the input are changed, the ones further down (e.g. after a Reproject, or in
+    a branch) keep their regions. If no Subset reads the input, one is added in front of the nodes that do.
+
+    Args:
+        graph (Graph): A snapista Graph object.
+        region (str): A WKT polygon.
+
+    Returns:
+        Graph: The new graph, with the suffix and the hash of the original one. Adding a node to it makes
+            it a graph of its own, with its own hash.
+
+    """
+
+    from snapista.graph import Graph
+    from snapista.operators import Subset
+
+    prepared = Graph()
+    nodes = list(zip(graph._node_ids, graph._operators, graph._sources))
+
+    def reads_input(operator, sources):
+        return operator._name == "Subset" and any(
+            refid == Graph.INPUT for _, refid in sources
+        )
+
+    source = Graph.INPUT
+    if not any(reads_input(operator, sources) for _, operator, sources in nodes):
+        subset = Subset()
+        subset.geo_region = region
+        source = prepared.add_node(subset, node_id="AreaOfInterest")
+
+    for node_id, operator, sources in nodes:
+        if reads_input(operator, sources):
+            operator = copy.copy(operator)
+            operator.geo_region = region
+
+        prepared.add_node(
+            operator,
+            node_id=node_id,
+            sources={
+                name: source if refid == Graph.INPUT else refid
+                for name, refid in sources
+            },
+        )
+
+    prepared.suffix = graph.suffix
+    # the region is different for every input, the tuned settings and the history of the graph still apply
+    prepared._hash = graph.get_hash()
+
+    return prepared
+
+
+def parse_polygon(polygon):
+    """Parse a WKT polygon (its outer ring) into (longitude, latitude) vertices, without the closing vertex.
+
+    Args:
+        polygon (str or list): A WKT polygon, or already the vertices.
+
+    Returns:
+        list: The (longitude, latitude) vertices.
+
+    Raises:
+        ValueError: If the text is not a WKT polygon.
+
+    """
+
+    if not isinstance(polygon, str):
+        vertices = [tuple(map(float, vertex)) for vertex in polygon]
+    else:
+        match = re.match(
+            r"\s*POLYGON\s*\(\s*\(([^()]*)\)", polygon, flags=re.IGNORECASE
+        )
+        if match is None:
+            raise ValueError(f"{polygon[:50]} is not a WKT polygon!")
+        vertices = [
+            tuple(float(value) for value in vertex.split()[:2])
+            for vertex in match.group(1).split(",")
+        ]
+
+    if len(vertices) > 1 and vertices[0] == vertices[-1]:
+        vertices = vertices[:-1]
+
+    if len(vertices) < 3:
+        raise ValueError("A polygon needs at least three vertices!")
+
+    return vertices
+
+
+def to_wkt(polygon):
+    """Format (longitude, latitude) vertices as a WKT polygon."""
+
+    ring = list(polygon) + [polygon[0]]
+    return "POLYGON(({}))".format(
+        ", ".join(f"{lon:.6f} {lat:.6f}" for lon, lat in ring)
+    )
+
+
+def intersects(a, b):
+    """Whether two polygons overlap: an edge of one crosses an edge of the other, or one is inside the other."""
+
+    edges_a, edges_b = _get_edges(a), _get_edges(b)
+
+    if any(_cross(p, q, r, s) for p, q in edges_a for r, s in edges_b):
+        return True
+
+    return _contains(a, b[0]) or _contains(b, a[0])
+
+
+def intersect(a, b):
+    """Get the intersection of two polygons, when one of them is convex.
+
+    Returns:
+        list: The vertices of the intersection, None if neither polygon is convex (or they don't overlap).
+
+    """
+
+    if _is_convex(b):
+        subject, clipper = a, b
+    elif _is_convex(a):
+        subject, clipper = b, a
+    else:
+        return None
+
+    # Sutherland–Hodgman: cut the subject with every edge of the (convex) clipper
+    orientation = 1 if _get_area(clipper) > 0 else -1
+    result = list(subject)
+
+    for p, q in _get_edges(clipper):
+        if len(result) == 0:
+            return None
+
+        def inside(point):
+            return orientation * _get_side(p, q, point) >= 0
+
+        vertices, result = result, []
+        for current, following in zip(vertices, vertices[1:] + vertices[:1]):
+            if inside(current):
+                result.append(current)
+                if not inside(following):
+                    result.append(_get_crossing(current, following, p, q))
+            elif inside(following):
+                result.append(_get_crossing(current, following, p, q))
+
+    return result if len(result) >= 3 else None
+
+
+def _get_edges(polygon):
+    return list(zip(polygon, polygon[1:] + polygon[:1]))
+
+
+def _get_side(p, q, point):
+    """Positive if the point is left of the line from p to q, negative if right, zero if on it."""
+
+    return (q[0] - p[0]) * (point[1] - p[1]) - (q[1] - p[1]) * (point[0] - p[0])
+
+
+def _cross(p, q, r, s):
+    """Whether the segments pq and rs cross."""
+
+    d1, d2 = _get_side(r, s, p), _get_side(r, s, q)
+    d3, d4 = _get_side(p, q, r), _get_side(p, q, s)
+
+    return ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0)) and d1 != d2 and d3 != d4
+
+
+def _get_crossing(p, q, r, s):
+    """The point where the line through p and q crosses the line through r and s."""
+
+    d1, d2 = _get_side(r, s, p), _get_side(r, s, q)
+    t = d1 / (d1 - d2)
+
+    return (p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+
+
+def _contains(polygon, point):
+    """Whether the point is inside the polygon (ray casting)."""
+
+    x, y = point
+    inside = False
+
+    for (x1, y1), (x2, y2) in _get_edges(polygon):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+
+    return inside
+
+
+def _get_area(polygon):
+    """The signed area (shoelace), positive for counter-clockwise polygons."""
+
+    return sum(p[0] * q[1] - q[0] * p[1] for p, q in _get_edges(polygon)) / 2
+
+
+def _is_convex(polygon):
+    sides = [
+        _get_side(p, q, r)
+        for p, q, r in zip(
+            polygon, polygon[1:] + polygon[:1], polygon[2:] + polygon[:2]
+        )
+    ]
+
+    return all(side >= 0 for side in sides) or all(side <= 0 for side in sides)
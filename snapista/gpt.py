@@ -9,12 +9,64 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
+import os
 import re
+import time
 import pathlib
 import zipfile
 import tempfile
 import textwrap
+import contextlib
 import subprocess
+import collections
+import concurrent.futures
+
+# gpt adds these extensions to the target file
+_EXTENSIONS = {
+    "BEAM-DIMAP": ".dim",
+    "GeoTIFF": ".tif",
+    "GeoTIFF-BigTIFF": ".tif",
+    "NetCDF-CF": ".nc",
+    "NetCDF-BEAM": ".nc",
+    "NetCDF4-CF": ".nc",
+    "NetCDF4-BEAM": ".nc",
+    "HDF5": ".h5",
+    "ENVI": ".hdr",
+}
+
+
+class Result(
+    collections.namedtuple(
+        "Result",
+        [
+            "input",
+            "output",
+            "status",
+            "error",
+            "started",
+            "finished",
+            "wall_time",
+            "peak_memory",
+        ],
+    )
+):
+    """The outcome of running a graph for one input.
+
+    Attributes:
+        input (pathlib.Path): The input product.
+        output (pathlib.Path): The output file (with the extension gpt adds for known formats),
+            None if the output name could not be made.
+        status (str): 'done', 'failed' (gpt returned an error), or 'error' (gpt could not be started,
+            e.g. there is no date in the name of the input).
+        error (str): The error message, None when done.
+        started (float): When the job started, as time.time().
+        finished (float): When the job finished, as time.time().
+        wall_time (float): Wall time of gpt in seconds, None if gpt did not run.
+        peak_memory (int): Peak resident memory of gpt in bytes, None if gpt did not run.
+
+    """
+
+    __slots__ = ()
 
 
 class GPT:
@@ -41,9 +93,81 @@ class GPT:
         except (AssertionError, PermissionError):
             raise ValueError(f"{self.gpt.as_posix()} is not gpt!")
 
+        # set to a snapista.RunHistory to record the runs and schedule parallel batches by the estimated run time
+        self.history = None
+
+        # use the settings found by autotune for the graphs that have been tuned
+        self.apply_tuning = True
+
+        # set to a snapista.Placement to pin concurrent gpt runs to their own CPUs and limit their memory
+        self.placement = None
+
+        # set to a snapista.Metrics to count the jobs and record the timeline of their phases
+        self.metrics = None
+
+        # set to a snapista.AuxiliaryCache to clip the auxiliary files (vectors, DEMs) to every scene
+        self.auxiliary = None
+
+        # set to a snapista.Scheduler to share the gpt runs of the host fairly with the batches of others
+        self.scheduler = None
+
     def __repr__(self):
         return f"{self.gpt.as_posix()}"
 
+    def describe_operators(self, refresh=False):
+        """Parse the descriptions of all operators of this SNAP installation and cache them on disk.
+
+        After this, every gpt operator is available in snapista.operators, even the ones that are not defined
+        by hand (for example, snapista.operators.Mosaic). The descriptions are parsed only once per SNAP
+        installation, later sessions read them from the cache without calling gpt.
+
+        Args:
+            refresh (bool): Call gpt even if this installation has already been described.
+
+        Returns:
+            dict: Operator name -> description.
+
+        """
+
+        from snapista.operators import _registry
+
+        return _registry.describe_operators(self.gpt, refresh=refresh)
+
+    def autotune(self, graph, product, **kwargs):
+        """Find the fastest gpt parallelism (-q) and tile cache (-c) for the graph on a sample product.
+
+        The settings are saved by the hash of the graph, and used by every later run of the graph.
+        See snapista.autotune.tune for the arguments.
+
+        Returns:
+            dict: The best settings: parallelism, tile_cache, wall_time, and peak_memory.
+
+        """
+
+        from snapista import autotune
+
+        return autotune.tune(self, graph, product, **kwargs)
+
+    def preflight(self, graph, input_, **kwargs):
+        """Check a batch before running it: the graph, the parameters, the auxiliary files, the bands named in the
+        parameters, and the output names. Takes milliseconds per product, no gpt is started.
+
+        See snapista.preflight.check for the arguments, they are the naming arguments of run.
+
+        Returns:
+            list: The problems found (snapista.preflight.Problem), empty if the batch looks fine.
+
+        """
+
+        from snapista import preflight
+
+        problems = preflight.check(
+            self, graph, input_ if isinstance(input_, list) else [input_], **kwargs
+        )
+        preflight.report(problems)
+
+        return problems
+
     def run(
         self,
         graph,
@@ -56,6 +180,9 @@ class GPT:
         suffix=None,
         suppress_stderr=True,
         output_file_name=None,
+        workers=1,
+        dry_run=False,
+        preflight=False,
     ):
         """Run the graph for the input.
 
@@ -70,105 +197,563 @@ class GPT:
             suffix (str): Suffix to use for output. By default, will consist of a list of applied operators.
             suppress_stderr (bool): Capture stderr without printing it.
             output_file_name (str): If given, the automatically generated name will be replaced by this.
+            workers (int or Adaptive): Number of gpt runs executed in parallel for a list of inputs,
+                or a snapista.Adaptive to adjust it to the load of the host.
+            dry_run (bool): Only print the order the inputs would be run in, with the estimated run times
+                (needs a history, see the history attribute).
+            preflight (bool): Check all the inputs first, and run none of them if there is a problem (see preflight).
+
+        Returns:
+            Result or list: The result for a single input, a list of results for a list of inputs.
+                For a dry run, the planned (input, estimated seconds) pairs.
 
            Notes:
                To keep the name of the product the same, pass an empty strung as the suffix.
 
+               With a history, a list of inputs is run longest processing time first.
+
+               A product that fails does not stop the others. See also run_iter.
+
+        Raises:
+            ValueError: If preflight is set and the checks found problems.
+
         """
 
-        if isinstance(input_, list):
-            for product in input_:
-                self.run(
-                    graph=graph,
-                    input_=product,
-                    output_folder=output_folder,
-                    format_=format_,
-                    date_only=date_only,
-                    date_time_only=date_time_only,
-                    prefix=prefix,
-                    suffix=suffix,
-                    suppress_stderr=suppress_stderr,
-                    output_file_name=output_file_name,
+        if preflight:
+            problems = self.preflight(
+                graph,
+                input_,
+                output_folder=output_folder,
+                date_only=date_only,
+                date_time_only=date_time_only,
+                prefix=prefix,
+                suffix=suffix,
+                output_file_name=output_file_name,
+            )
+            if len(problems) > 0:
+                raise ValueError(
+                    f"Preflight found {len(problems)} problem(s), nothing was run!"
                 )
-            return
+
+        if isinstance(input_, list) and (
+            not isinstance(workers, int)
+            or workers > 1
+            or dry_run
+            or self.history is not None
+        ):
+            return self._run_parallel(
+                graph=graph,
+                inputs=input_,
+                workers=workers,
+                dry_run=dry_run,
+                output_folder=output_folder,
+                format_=format_,
+                date_only=date_only,
+                date_time_only=date_time_only,
+                prefix=prefix,
+                suffix=suffix,
+                suppress_stderr=suppress_stderr,
+                output_file_name=output_file_name,
+            )
+
+        output_kwargs = {
+            "output_folder": output_folder,
+            "date_only": date_only,
+            "date_time_only": date_time_only,
+            "prefix": prefix,
+            "suffix": suffix,
+            "output_file_name": output_file_name,
+        }
+
+        results = []
+        for product in input_ if isinstance(input_, list) else [input_]:
+            # one at a time, with the progress of gpt visible
+            result = self._run_job(
+                graph=graph,
+                input_=product,
+                format_=format_,
+                suppress_stderr=suppress_stderr,
+                suppress_stdout=False,
+                output_kwargs=output_kwargs,
+            )
+            self._report(result)
+            results.append(result)
+
+        if self.metrics is not None:
+            self.metrics.write()
+
+        return results if isinstance(input_, list) else results[0]
+
+    def run_iter(
+        self,
+        graph,
+        inputs,
+        output_folder="proc",
+        format_="BEAM-DIMAP",
+        date_only=False,
+        date_time_only=False,
+        prefix=None,
+        suffix=None,
+        suppress_stderr=True,
+        output_file_name=None,
+        workers=1,
+    ):
+        """Run the graph for the inputs and yield the results as the jobs finish.
+
+        The inputs are taken one at a time, only when a worker is free, so they can come from a generator
+        (e.g. products that are still being downloaded). The next jobs are started before a result is yielded,
+        so gpt keeps running while the results are used. A product that fails does not stop the others,
+        its result has the error instead. Nothing is printed.
+
+        Args:
+            graph (Graph): A snapista Graph object.
+            inputs (iterable): The inputs, or a single input.
+            output_folder (str): Folder to save the outputs to.
+            format_ (str): The extension of the output, e.g. 'GeoTIFF', 'HDF5', 'BEAM-DIMAP'.
+            date_only (bool): Drop everything except the date (and suffix) from the output name.
+            date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+            prefix (str): Prefix to use for output.
+            suffix (str): Suffix to use for output. By default, will consist of a list of applied operators.
+            suppress_stderr (bool): Capture stderr, so that the error is included in the result.
+            output_file_name (str): If given, the automatically generated name will be replaced by this.
+            workers (int or Adaptive): Number of gpt runs executed in parallel, or a snapista.Adaptive
+                to adjust it to the load of the host while the jobs run.
+
+        Yields:
+            Result: The result of each input, in the order the jobs finish.
+
+        Examples:
+            ```python
+            for result in gpt.run_iter(graph, products, workers=2, date_only=True):
+                if result.status == 'done':
+                    analyse(result.output)
+                else:
+                    print(result.input.name, result.error)
+            ```
+
+        """
+
+        if isinstance(inputs, (str, os.PathLike)):
+            inputs = [inputs]
+
+        inputs = iter(inputs)
+        output_kwargs = {
+            "output_folder": output_folder,
+            "date_only": date_only,
+            "date_time_only": date_time_only,
+            "prefix": prefix,
+            "suffix": suffix,
+            "output_file_name": output_file_name,
+        }
+
+        adaptive = None if isinstance(workers, int) else workers
+        if adaptive is not None:
+            adaptive.reset()
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers if adaptive is None else adaptive.max_workers
+        ) as executor:
+            running = set()
+
+            def fill():
+                while len(running) < (
+                    workers if adaptive is None else adaptive.workers
+                ):
+                    product = next(inputs, None)
+                    if product is None:
+                        return
+                    if self.metrics is not None:
+                        self.metrics.job_queued()
+                    running.add(
+                        executor.submit(
+                            self._run_job,
+                            graph=graph,
+                            input_=product,
+                            format_=format_,
+                            suppress_stderr=suppress_stderr,
+                            suppress_stdout=True,
+                            output_kwargs=output_kwargs,
+                            queued=True,
+                        )
+                    )
+
+            fill()
+            while len(running) > 0:
+                finished, _ = concurrent.futures.wait(
+                    running,
+                    timeout=None if adaptive is None else adaptive.interval,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                running.difference_update(finished)
+                if adaptive is not None:
+                    adaptive.update(len(finished), len(running))
+                fill()
+
+                for future in finished:
+                    yield future.result()
+
+        if self.metrics is not None:
+            self.metrics.write()
+
+    def _run_job(
+        self,
+        graph,
+        input_,
+        format_,
+        suppress_stderr,
+        suppress_stdout,
+        output_kwargs,
+        queued=False,
+    ):
+        """Run the graph for one input. The errors of this input end up in the result instead of being raised.
+
+        Returns:
+            Result: The result of the job.
+
+        """
 
         input_ = pathlib.Path(input_)
 
+        if self.metrics is not None:
+            self.metrics.job_started(queued)
+
+        with self._span(input_.name, input_, category="job"):
+            result = self._try_job(
+                graph, input_, format_, suppress_stderr, suppress_stdout, output_kwargs
+            )
+
+        if self.metrics is not None:
+            self.metrics.job_finished(result)
+
+        return result
+
+    def _try_job(
+        self, graph, input_, format_, suppress_stderr, suppress_stdout, output_kwargs
+    ):
+        """Run the graph for one input, see _run_job."""
+
+        started = time.time()
+        output_file = None
+
+        try:
+            output_file = self._get_output_file(
+                graph=graph, input_=input_, **output_kwargs
+            )
+
+            if not suppress_stdout:
+                print(f"⏳ {output_file.stem}")
+
+            process = self._process(
+                graph=graph,
+                input_=input_,
+                output_file=output_file,
+                format_=format_,
+                suppress_stderr=suppress_stderr,
+                suppress_stdout=suppress_stdout,
+            )
+        # SubprocessError: e.g. the memory limit of the placement could not be applied in the child
+        except (
+            OSError,
+            ValueError,
+            zipfile.BadZipFile,
+            subprocess.SubprocessError,
+        ) as error:
+            return Result(
+                input_,
+                output_file,
+                "error",
+                str(error),
+                started,
+                time.time(),
+                None,
+                None,
+            )
+
+        if not suppress_stdout and suppress_stderr:
+            # move at the beginning of 3rd line up, clear line
+            print(f"\033[3F\033[J", end="")
+
+        return Result(
+            input=input_,
+            output=output_file.parent
+            / (output_file.name + _EXTENSIONS.get(format_, "")),
+            status="done" if process.returncode == 0 else "failed",
+            error=self._get_error(process),
+            started=started,
+            finished=time.time(),
+            wall_time=process.wall_time,
+            peak_memory=process.peak_memory,
+        )
+
+    def _span(self, name, product=None, category="phase"):
+        """Time a phase of a job when there are metrics (see snapista.Metrics.span)."""
+
+        if self.metrics is None:
+            return contextlib.nullcontext()
+
+        return self.metrics.span(name, product, category)
+
+    def _run_parallel(self, graph, inputs, workers, dry_run, **kwargs):
+        """Run a list of inputs on several workers, longest processing time first when there is a history."""
+
+        inputs = [pathlib.Path(product) for product in inputs]
+
+        # an adaptive number of workers is planned for with the number it starts with
+        count = workers if isinstance(workers, int) else workers.workers
+
+        if self.history is not None:
+            plan, makespan = self.history.plan(graph, inputs, count)
+        else:
+            plan, makespan = [(product, None) for product in inputs], None
+
+        if dry_run:
+            for product, estimate in plan:
+                estimate = "?" if estimate is None else f"{estimate:.0f} s"
+                print(f"{estimate:>10}  {product.name}")
+            if makespan is not None:
+                print(f"Estimated time on {count} worker(s): {makespan:.0f} s")
+            return plan
+
+        results = []
+        for result in self.run_iter(
+            graph, [product for product, _ in plan], workers=workers, **kwargs
+        ):
+            self._report(result)
+            results.append(result)
+
+        return results
+
+    @staticmethod
+    def _get_output_file(
+        graph,
+        input_,
+        output_folder,
+        date_only=False,
+        date_time_only=False,
+        prefix=None,
+        suffix=None,
+        output_file_name=None,
+    ):
+        """Generate the name of the output file (without the extension) for the input.
+
+        Args:
+            graph (Graph): A snapista Graph object. Its suffix is used when suffix is not given.
+            input_ (pathlib.Path): The input product.
+            output_folder (str): Folder to save the output to. Will be created if it does not exist.
+            date_only (bool): Drop everything except the date (and suffix) from the output name.
+            date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+            prefix (str): Prefix to use for output.
+            suffix (str): Suffix to use for output.
+            output_file_name (str): If given, the automatically generated name will be replaced by this.
+
+        Returns:
+            pathlib.Path: The output file.
+
+        """
+
+        prefix = "" if prefix is None else prefix
+        suffix = graph.suffix if suffix is None else suffix
+
+        output_file = pathlib.Path(output_folder)
+        output_file.mkdir(exist_ok=True)
+
+        if date_only:
+            date_regex = re.compile(r"(\d{4})(\d{2})(\d{2})T\d{6}")
+            dates = date_regex.findall(str(input_))
+            if len(dates) == 0:
+                raise ValueError(f"There is no date in {input_.name}!")
+            date = dates[0]
+            output_file = output_file / "{}{}-{}-{}{}".format(prefix, *date, suffix)
+        elif date_time_only:
+            date_time_regex = re.compile(r"(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})")
+            date_times = date_time_regex.findall(str(input_))
+            if len(date_times) == 0:
+                raise ValueError(f"There is no date and time in {input_.name}!")
+            date_time = date_times[0]
+            output_file = output_file / "{}{}-{}-{}T{}-{}-{}{}".format(
+                prefix, *date_time, suffix
+            )
+        elif output_file_name is not None:
+            output_file = output_file / output_file_name
+        else:
+            output_file = output_file / f"{prefix}{input_.stem}{suffix}"
+
+        return output_file
+
+    @staticmethod
+    def _print_result(output_file, process, suppress_stderr=True):
+        """Print a checkmark or a cross with the error for a finished gpt process."""
+
+        # when stderr is not suppressed, it is not captured and the error is visible anyway
+        GPT._print_status(
+            output_file.name,
+            process.returncode == 0,
+            GPT._get_error(process) if suppress_stderr else None,
+        )
+
+    @staticmethod
+    def _report(result):
+        """Print a checkmark or a cross with the error for a Result."""
+
+        name = (result.input if result.output is None else result.output).name
+        GPT._print_status(name, result.status == "done", result.error)
+
+    @staticmethod
+    def _print_status(name, succeeded, error=None):
+        if succeeded:
+            # green checkmark, reset color
+            print(f"\033[32m✔\033[0m {name}")
+        else:
+            # red cross, reset color
+            print(f"\033[31m✗\033[0m {name}")
+
+            if error is not None:
+                error = "\n".join(
+                    f"    {line}" for line in textwrap.wrap(error, width=66)
+                )
+                print(error)
+
+    @staticmethod
+    def _get_error(process):
+        """Get the error message of a finished gpt process, None if it succeeded."""
+
+        if process.returncode == 0:
+            return None
+
+        stderr = (
+            "" if process.stderr is None else process.stderr.decode(errors="replace")
+        )
+
+        errors = re.findall(r"Error: (.*)", stderr)
+        if len(errors) > 0:
+            return errors[0].strip()
+
+        # not all failures come with an "Error:" line (e.g. the JVM running out of memory)
+        lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+        if len(lines) > 0:
+            return lines[-1]
+
+        return f"gpt exited with code {process.returncode}"
+
+    def _process(
+        self,
+        graph,
+        input_,
+        output_file,
+        format_,
+        suppress_stderr=True,
+        suppress_stdout=False,
+        options=None,
+    ):
+        """Call gpt to process a single input.
+
+        Args:
+            graph (Graph): A snapista Graph object.
+            input_ (pathlib.Path): The input product.
+            output_file (pathlib.Path): The output file (without the extension). None if the graph has Write nodes.
+            format_ (str): The format of the output, e.g. 'GeoTIFF', 'HDF5', 'BEAM-DIMAP'.
+            suppress_stderr (bool): Capture stderr without printing it.
+            suppress_stdout (bool): Discard the progress gpt prints (used when several gpt run at once).
+            options (list): More gpt options, e.g. ['-q', '4']. By default, the tuned settings of the graph.
+
+        Returns:
+            subprocess.CompletedProcess: The finished gpt process, with two extra attributes:
+                wall_time (seconds) and peak_memory (the peak resident memory in bytes).
+
+        """
+
+        product = input_
+
         with tempfile.TemporaryDirectory() as temp_dir:
             base = pathlib.Path(temp_dir)
             graph_file = base / "graph.xml"
-            prefix = "" if prefix is None else prefix
-            suffix = graph.suffix if suffix is None else suffix
-
-            output_file = pathlib.Path(output_folder)
-            output_file.mkdir(exist_ok=True)
-
-            if date_only:
-                date_regex = re.compile(r"(\d{4})(\d{2})(\d{2})T\d{6}")
-                date = date_regex.findall(str(input_))[0]
-                output_file = output_file / "{}{}-{}-{}{}".format(prefix, *date, suffix)
-            elif date_time_only:
-                date_time_regex = re.compile(
-                    r"(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})"
-                )
-                date_time = date_time_regex.findall(str(input_))[0]
-                output_file = output_file / "{}{}-{}-{}T{}-{}-{}{}".format(
-                    prefix, *date_time, suffix
-                )
-            elif output_file_name is not None:
-                output_file = output_file / output_file_name
-            else:
-                output_file = output_file / f"{prefix}{input_.stem}{suffix}"
 
             # Sentinel-3 is a special snowflake in terms of reading in the products.
             # GPT and SNAP refuse to open Sentinel-3 archives and only open the xfdumanifest.xml
             # file that is within the product folder.
 
-            print(f"⏳ {output_file.stem}")
-
             if input_.match("*S3*.zip"):
-                with zipfile.ZipFile(input_) as zf:
-                    zf.extractall(temp_dir)
+                with self._span("extract", product):
+                    with zipfile.ZipFile(input_) as zf:
+                        zf.extractall(temp_dir)
                 input_ = base / (input_.stem + ".SEN3") / "xfdumanifest.xml"
             elif input_.match("*S3*.SEN3"):
                 input_ = input_ / "xfdumanifest.xml"
 
-            graph.save(graph_file)
+            with self._span("serialize", product):
+                if self.auxiliary is not None:
+                    self.auxiliary.prepare(graph, product).save(graph_file)
+                else:
+                    graph.save(graph_file)
 
-            gpt_command = [
-                self.gpt,
-                str(graph_file),
-                f"-Ssource={input_}",
-                "-t",
-                output_file,
-                "-f",
-                format_,
-            ]
+            gpt_command = [self.gpt, str(graph_file), f"-Ssource={input_}"]
+
+            # without an output file, the graph writes its outputs itself (with Write nodes)
+            if output_file is not None:
+                gpt_command.extend(["-t", output_file, "-f", format_])
 
             if len(graph._additional_sources) > 0:
                 for name, value in graph._additional_sources.items():
                     gpt_command.append(f"-S{name}={value}")
 
-            process = subprocess.run(
-                gpt_command, stderr=subprocess.PIPE if suppress_stderr else None
+            if options is None and self.apply_tuning:
+                from snapista import autotune
+
+                options = autotune.get_options(graph)
+
+            gpt_command.extend(options or [])
+
+            # released in the finally whatever fails, a lost ticket takes a slot of the host from everyone
+            ticket = slot = None
+            try:
+                if self.scheduler is not None:
+                    with self._span("queue", product):
+                        ticket = self.scheduler.acquire()
+
+                slot = None if self.placement is None else self.placement.acquire()
+                with self._span("gpt", product):
+                    start = time.perf_counter()
+                    process = subprocess.Popen(
+                        (
+                            gpt_command
+                            if slot is None
+                            else self.placement.wrap(gpt_command, slot)
+                        ),
+                        stdout=subprocess.DEVNULL if suppress_stdout else None,
+                        stderr=subprocess.PIPE if suppress_stderr else None,
+                        preexec_fn=(
+                            None if slot is None else self.placement.get_preexec(slot)
+                        ),
+                    )
+                    if slot is not None:
+                        self.placement.attach(process.pid, slot)
+                    stderr = process.stderr.read() if suppress_stderr else None
+
+                    # unlike Popen.wait, wait4 gives the resources used by gpt (and the JVM it starts)
+                    _, status, usage = os.wait4(process.pid, 0)
+                    process.returncode = os.waitstatus_to_exitcode(status)
+                    if suppress_stderr:
+                        process.stderr.close()
+            finally:
+                if slot is not None:
+                    self.placement.release(slot)
+                if ticket is not None:
+                    self.scheduler.release(ticket)
+
+            process = subprocess.CompletedProcess(
+                gpt_command, process.returncode, stderr=stderr
+            )
+            process.wall_time = time.perf_counter() - start
+            process.peak_memory = usage.ru_maxrss * 1024  # kilobytes on Linux
+            process.placement = None if slot is None else self.placement.describe(slot)
+
+        if self.history is not None:
+            self.history.record(
+                graph=graph,
+                input_=product,
+                wall_time=process.wall_time,
+                peak_memory=process.peak_memory,
+                returncode=process.returncode,
             )
 
-            if suppress_stderr:
-                # move at the beginning of 3rd line up, clear line
-                print(f"\033[3F\033[J", end="")
-
-            if process.returncode == 0:
-                # green checkmark, reset color
-                print(f"\033[32m✔\033[0m {output_file.name}")
-            else:
-                # red cross, reset color
-                print(f"\033[31m✗\033[0m {output_file.name}")
-
-                # when stderr is not suppressed, it is not captured and the error is visible anyway
-                if suppress_stderr:
-                    error_regex = re.compile(r"Error: (.*)")
-                    error = error_regex.findall(process.stderr.decode())[0]
-                    error = "\n".join(
-                        f"    {line}" for line in textwrap.wrap(error, width=66)
-                    )
-                    print(error)
+        return process
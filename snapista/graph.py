@@ -5,11 +5,34 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
+import copy
+import hashlib
+
 import lxml.etree
 
 
 class Graph:
-    """SNAP gpt graph."""
+    """SNAP gpt graph.
+
+    Attributes:
+        INPUT (str): Stands for the input product in the sources of a node.
+
+    Notes:
+        By default, every node takes the output of the previous one. To branch and merge, name the upstream
+        nodes with the sources argument of add_node. gpt writes the output of the last node.
+
+    Examples:
+        ```python
+        graph = snapista.Graph()
+        resample = graph.add_node(resample)
+        masked = graph.add_node(land_sea_mask, sources=resample)
+        chl = graph.add_node(band_maths, sources=resample)
+        graph.add_node(band_merge, sources=[masked, chl])
+        ```
+
+    """
+
+    INPUT = "${source}"
 
     def __init__(self):
         """Initiate a new Graph object."""
@@ -21,27 +44,55 @@ class Graph:
 
         self._node_ids = []
 
+        # (source name, node ID or Graph.INPUT) of each node
+        self._sources = []
+
+        # snapshots of the operators as they were when added, used to rebuild parts of the graph
+        self._operators = []
+
+        # number of nodes before the checkpoint (see add_checkpoint)
+        self._checkpoint = None
+
         # a suffix for the output file, listing the processing steps
         self.suffix = ""
 
         # keep track of special sources that some operators need to run properly
         self._additional_sources = {}
 
+        # the hash of the graph this one was derived from, when they only differ by a detail of the input
+        # (e.g. the region, see footprint.set_region), so that the tuned settings and the history apply.
+        # The nodes are snapshots, a graph only changes by add_node, which drops the hash.
+        self._hash = None
+
     def __str__(self):
         return lxml.etree.tostring(self._xml, pretty_print=True).decode()
 
-    def add_node(self, operator, node_id=None):
+    def add_node(self, operator, node_id=None, sources=None):
         """Add a processing step to the graph.
 
         Args:
             operator (Operator): The operator to be added.
             node_id (str): Optional. A unique ID for the processing step. Will be auto-generated if not provided.
+            sources (str, list, or dict): Optional. The IDs of the upstream nodes, the previous node by default
+                (the input for the first node). A list gives sources named sourceProduct, sourceProduct.1, ...,
+                a dict names them (e.g. {'master': 'Resample0', 'slave': 'Subset0'}). Graph.INPUT stands for
+                the input product. A node can be named before it is added, see validate.
+
+        Returns:
+            str: The ID of the node.
 
         """
 
+        # the graph is not the one it was derived from anymore
+        self._hash = None
+
         if node_id is None:
             index = sum([operator._name in node_id for node_id in self._node_ids])
             node_id = f"{operator._name}{index}"
+        elif node_id in self._node_ids:
+            raise ValueError(f"There is already a node {node_id} in the graph!")
+
+        sources = self._get_sources(operator, sources)
 
         node = lxml.etree.SubElement(self._xml, "node")
         node.set("id", node_id)
@@ -50,19 +101,18 @@ class Graph:
         name.text = operator._name
 
         # add sources
-        sources = lxml.etree.SubElement(node, "sources")
-        if len(self._node_ids) == 0:
-            # if it's the first operator added, its source is ${source}
-            source = lxml.etree.SubElement(sources, operator._mandatory_source_name)
-            source.text = "${source}"
-        else:
-            # if not, then its source is grabbed from the previous operator
-            source = lxml.etree.SubElement(sources, "sourceProduct")
-            source.set("refid", self._node_ids[-1])
+        sources_element = lxml.etree.SubElement(node, "sources")
+        for source_name, refid in sources:
+            source = lxml.etree.SubElement(sources_element, source_name)
+            if refid == self.INPUT:
+                source.text = self.INPUT
+            else:
+                source.set("refid", refid)
 
         if len(operator._additional_sources) > 0:
             for additional_source in operator._additional_sources:
-                sources.append(additional_source["lxml_element"])
+                # a copy, so that the operator can be added to several graphs
+                sources_element.append(copy.deepcopy(additional_source["lxml_element"]))
                 self._additional_sources[additional_source["name"]] = additional_source[
                     "value"
                 ]
@@ -72,16 +122,171 @@ class Graph:
         node.append(parameters)
 
         self._node_ids.append(node_id)
+        self._sources.append(sources)
+        self._operators.append(copy.copy(operator))
         if operator._short_name is not None:
             self.suffix += f"_{operator._short_name.lower()}"
 
+        return node_id
+
+    def validate(self):
+        """Check that gpt can run the graph: the sources exist, there are no cycles, and every node is used.
+
+        A node is used if another node takes its output, or it is the last node (gpt writes its output),
+        or it is a Write node.
+
+        Raises:
+            ValueError: If something is wrong with the graph.
+
+        """
+
+        if len(self._node_ids) == 0:
+            raise ValueError("The graph is empty!")
+
+        consumers = {node_id: [] for node_id in self._node_ids}
+        for node_id, sources in zip(self._node_ids, self._sources):
+            for _, refid in sources:
+                if refid == self.INPUT:
+                    continue
+                if refid not in consumers:
+                    raise ValueError(
+                        f"{node_id}: there is no node {refid} in the graph!"
+                    )
+                consumers[refid].append(node_id)
+
+        # depth-first search, a node met again while its descendants are visited closes a cycle
+        visiting, visited = set(), set()
+
+        def visit(node_id, path):
+            if node_id in visiting:
+                cycle = path[path.index(node_id) :] + [node_id]
+                raise ValueError(
+                    f"There is a cycle in the graph: {' -> '.join(cycle)}!"
+                )
+            if node_id in visited:
+                return
+            visiting.add(node_id)
+            for consumer in consumers[node_id]:
+                visit(consumer, path + [node_id])
+            visiting.remove(node_id)
+            visited.add(node_id)
+
+        for node_id in self._node_ids:
+            visit(node_id, [])
+
+        unused = [
+            node_id
+            for node_id, operator in zip(self._node_ids[:-1], self._operators)
+            if len(consumers[node_id]) == 0 and operator._name != "Write"
+        ]
+        if len(unused) > 0:
+            raise ValueError(
+                f"The output of {', '.join(unused)} is not used (gpt only writes the last node)!"
+            )
+
+    def _get_sources(self, operator, sources):
+        """Get the (source name, node ID) pairs of a new node."""
+
+        if sources is None:
+            return self._get_default_sources(len(self._node_ids), operator)
+
+        if isinstance(sources, str):
+            name = (
+                operator._mandatory_source_name
+                if sources == self.INPUT
+                else "sourceProduct"
+            )
+            return [(name, sources)]
+
+        if isinstance(sources, dict):
+            return list(sources.items())
+
+        return [
+            ("sourceProduct" if i == 0 else f"sourceProduct.{i}", refid)
+            for i, refid in enumerate(sources)
+        ]
+
+    def _is_linear(self):
+        """Whether every node takes the output of the previous one."""
+
+        return all(
+            sources == self._get_default_sources(i, operator)
+            for i, (operator, sources) in enumerate(zip(self._operators, self._sources))
+        )
+
+    def add_checkpoint(self):
+        """Mark the output of the last added node as a checkpoint.
+
+        When several graphs that share the nodes before the checkpoint are run with
+        snapista.checkpoint.run_from_checkpoint, the product at the checkpoint is computed once and reused.
+
+        """
+
+        self._checkpoint = len(self._node_ids)
+
+    def get_hash(self):
+        """Get a hash of the graph. Graphs that do the same processing have the same hash.
+
+        Returns:
+            str: A hex digest of the graph.
+
+        """
+
+        if self._hash is not None:
+            return self._hash
+
+        return hashlib.sha1(repr(self._get_node_keys()).encode()).hexdigest()
+
+    def _get_node_keys(self):
+        """Get a key per node that is equal for nodes doing the same processing, no matter the node ID."""
+
+        keys = []
+        for i, (operator, sources) in enumerate(zip(self._operators, self._sources)):
+            if sources == self._get_default_sources(i, operator):
+                keys.append(operator._get_key())
+            else:
+                # the sources by position, so that the key doesn't depend on the node IDs
+                keys.append(
+                    (
+                        operator._get_key(),
+                        tuple(
+                            (
+                                name,
+                                (
+                                    refid
+                                    if refid not in self._node_ids
+                                    else self._node_ids.index(refid)
+                                ),
+                            )
+                            for name, refid in sources
+                        ),
+                    )
+                )
+
+        return keys
+
+    def _get_default_sources(self, index, operator):
+        """The sources the operator would have as the node at the index without the sources argument."""
+
+        if index == 0:
+            # if it's the first operator added, its source is ${source}
+            return [(operator._mandatory_source_name, self.INPUT)]
+
+        # if not, then its source is grabbed from the previous operator
+        return [("sourceProduct", self._node_ids[index - 1])]
+
     def save(self, file):
         """Save the graph to a file.
 
         Args:
             file (str): Name of the file.
 
+        Raises:
+            ValueError: If gpt can't run the graph (see validate).
+
         """
 
+        self.validate()
+
         with open(file, "w") as f:
             f.write(lxml.etree.tostring(self._xml, pretty_print=True).decode())
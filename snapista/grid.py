@@ -0,0 +1,129 @@
+""" This file contains functions to read the target grid of a reference product, for Reproject.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Reproject.collocate_with makes every gpt run open the whole reference product, only to read its grid.
+ Instead, the grid (CRS, position of the upper-left corner, pixel size, and size) is read once from the metadata
+ of the reference product – the .dim of a BEAM-DIMAP product, gdalinfo for anything else – and cached, and
+ Reproject.set_grid gives it to gpt as plain parameters.
+
+"""
+
+import json
+import pathlib
+import threading
+import subprocess
+
+import lxml.etree
+
+from snapista._cache import get_cache_folder
+
+_lock = threading.Lock()
+
+
+def get_grid(product, refresh=False):
+    """Get the grid of a product, from the cache if it has been read before (and the product has not changed).
+
+    Args:
+        product (str or os.PathLike): A BEAM-DIMAP product (.dim), or any raster gdalinfo can read (e.g. GeoTIFF).
+        refresh (bool): Read the metadata even if the grid is cached.
+
+    Returns:
+        dict: crs (WKT), easting and northing (of the upper-left corner), pixel_size_x, pixel_size_y, width,
+            and height.
+
+    Raises:
+        ValueError: If the product is not on a map grid (e.g. it is not georeferenced, or it is rotated).
+
+    """
+
+    product = pathlib.Path(product).resolve()
+    stat = product.stat()
+    key = f"{product}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    file = get_cache_folder() / "grids.json"
+
+    with _lock:
+        grids = json.loads(file.read_text()) if file.exists() else {}
+        if key in grids and not refresh:
+            return grids[key]
+
+    if product.suffix == ".dim":
+        grid = _read_dimap_grid(product)
+    else:
+        grid = _read_gdal_grid(product)
+
+    with _lock:
+        grids = json.loads(file.read_text()) if file.exists() else {}
+        # the grids of older versions of the product are of no use anymore
+        grids = {
+            cached: value
+            for cached, value in grids.items()
+            if not cached.startswith(f"{product}:")
+        }
+        grids[key] = grid
+
+        temporary = file.with_suffix(".tmp")
+        temporary.write_text(json.dumps(grids, indent=4))
+        temporary.replace(file)
+
+    return grid
+
+
+def _read_dimap_grid(dim):
+    """Read the grid from the .dim file: the WKT, the image-to-model transform, and the raster size."""
+
+    document = lxml.etree.parse(str(dim))
+
+    wkt = document.findtext("Coordinate_Reference_System/WKT")
+    transform = document.findtext("Geoposition/IMAGE_TO_MODEL_TRANSFORM")
+    if not wkt or not transform:
+        raise ValueError(
+            f"{dim.name} is not on a map grid (e.g. it is not reprojected)!"
+        )
+
+    # a Java AffineTransform flat matrix: m00, m10, m01, m11, m02, m12
+    m00, m10, m01, m11, m02, m12 = (float(value) for value in transform.split(","))
+
+    return _make_grid(
+        dim,
+        wkt.strip(),
+        (m02, m00, m01, m12, m10, m11),
+        int(document.findtext("Raster_Dimensions/NCOLS")),
+        int(document.findtext("Raster_Dimensions/NROWS")),
+    )
+
+
+def _read_gdal_grid(file):
+    """Read the grid with gdalinfo."""
+
+    process = subprocess.run(
+        ["gdalinfo", "-json", str(file)], capture_output=True, check=True
+    )
+    info = json.loads(process.stdout)
+
+    wkt = info.get("coordinateSystem", {}).get("wkt")
+    if not wkt or "geoTransform" not in info:
+        raise ValueError(f"{file.name} is not on a map grid!")
+
+    return _make_grid(file, wkt, info["geoTransform"], *info["size"])
+
+
+def _make_grid(product, wkt, transform, width, height):
+    """Make the grid out of a GDAL geotransform (x0, pixel width, row rotation, y0, column rotation, pixel height)."""
+
+    x0, pixel_width, row_rotation, y0, column_rotation, pixel_height = transform
+
+    if row_rotation != 0 or column_rotation != 0:
+        raise ValueError(f"The grid of {product.name} is rotated!")
+
+    return {
+        "crs": wkt,
+        "easting": x0,
+        "northing": y0,
+        "pixel_size_x": abs(pixel_width),
+        "pixel_size_y": abs(pixel_height),
+        "width": width,
+        "height": height,
+    }
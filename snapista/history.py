@@ -0,0 +1,214 @@
+""" This file contains the definition of the RunHistory class – a local database of past gpt runs.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The history is used to estimate how long a job will take, so that parallel batches can start with the longest jobs
+ (longest processing time first). This way a batch does not end with one huge scene processed while the other
+ workers sit idle.
+
+"""
+
+import re
+import time
+import heapq
+import sqlite3
+import pathlib
+import threading
+import contextlib
+
+from snapista._cache import get_cache_folder
+
+
+class RunHistory:
+    """A SQLite database of past gpt runs: graph hash, product type, input size, wall time, and peak memory.
+
+    Examples:
+        ```python
+        gpt = snapista.GPT(gpt_path)
+        gpt.history = snapista.RunHistory()
+
+        gpt.run(graph, products, workers=4, dry_run=True)  # look at the estimates
+        gpt.run(graph, products, workers=4)
+        ```
+
+    """
+
+    def __init__(self, file=None):
+        """Open (or create) a history database.
+
+        Args:
+            file (str): Path to the database. By default, history.sqlite in the snapista cache folder.
+
+        """
+
+        self.file = (
+            get_cache_folder() / "history.sqlite"
+            if file is None
+            else pathlib.Path(file)
+        )
+        self._lock = threading.Lock()
+
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    graph_hash TEXT,
+                    product_type TEXT,
+                    input_size INTEGER,
+                    wall_time REAL,
+                    peak_memory INTEGER,
+                    returncode INTEGER,
+                    finished REAL
+                )
+                """)
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS runs_graph ON runs (graph_hash, product_type)"
+            )
+
+    def __repr__(self):
+        return f"RunHistory({self.file.as_posix()})"
+
+    def record(self, graph, input_, wall_time, peak_memory, returncode=0):
+        """Record a finished run.
+
+        Args:
+            graph (Graph): The graph that was run.
+            input_ (str or os.PathLike): The input product.
+            wall_time (float): Wall time of the run in seconds.
+            peak_memory (int): Peak resident memory of the run in bytes.
+            returncode (int): The return code of gpt.
+
+        """
+
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    graph.get_hash(),
+                    get_product_type(input_),
+                    get_input_size(input_),
+                    wall_time,
+                    peak_memory,
+                    returncode,
+                    time.time(),
+                ),
+            )
+
+    def estimate(self, graph, input_):
+        """Estimate the wall time of running the graph for the input.
+
+        The estimate is the seconds per byte of the successful runs that are most alike (same graph and product
+        type, then same graph, then same product type, then everything), times the size of the input.
+
+        Returns:
+            float: The estimated wall time in seconds, None if there is no history to estimate from.
+
+        """
+
+        size = get_input_size(input_)
+        graph_hash = graph.get_hash()
+        product_type = get_product_type(input_)
+
+        conditions = (
+            ("graph_hash = ? AND product_type = ?", (graph_hash, product_type)),
+            ("graph_hash = ?", (graph_hash,)),
+            ("product_type = ?", (product_type,)),
+            ("1", ()),
+        )
+
+        with self._lock, self._connect() as connection:
+            for condition, parameters in conditions:
+                wall_time, input_size = connection.execute(
+                    "SELECT SUM(wall_time), SUM(input_size) FROM runs "
+                    f"WHERE returncode = 0 AND {condition}",
+                    parameters,
+                ).fetchone()
+                if wall_time is not None and input_size:
+                    return wall_time / input_size * size
+
+        return None
+
+    def plan(self, graph, inputs, workers=1):
+        """Order the inputs longest processing time first and estimate the makespan.
+
+        Inputs without an estimate are ordered by size, after the ones with an estimate.
+
+        Args:
+            graph (Graph): The graph to run.
+            inputs (list): The inputs.
+            workers (int): The number of gpt runs executed in parallel.
+
+        Returns:
+            tuple: List of (input, estimated seconds or None) in the order to run them,
+                and the estimated makespan in seconds (None if nothing could be estimated).
+
+        """
+
+        estimates = [(input_, self.estimate(graph, input_)) for input_ in inputs]
+        estimates.sort(
+            key=lambda item: (
+                item[1] is not None,
+                item[1] if item[1] is not None else get_input_size(item[0]),
+            ),
+            reverse=True,
+        )
+
+        known = [estimate for _, estimate in estimates if estimate is not None]
+        makespan = get_makespan(known, workers) if len(known) > 0 else None
+
+        return estimates, makespan
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open a connection, commit when the block succeeds (roll back otherwise), and close it."""
+
+        connection = sqlite3.connect(self.file, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def get_makespan(durations, workers):
+    """Simulate running jobs in the given order on a number of workers, each job going to the first free worker.
+
+    Returns:
+        float: The time when the last job finishes.
+
+    """
+
+    finishes = [0.0] * workers
+    for duration in durations:
+        heapq.heapreplace(finishes, finishes[0] + duration)
+
+    return max(finishes)
+
+
+def get_product_type(input_):
+    """Get the product type from the name of a Sentinel product (e.g. 'MSIL1C' or 'OL_1_EFR'), or its suffix."""
+
+    name = pathlib.Path(input_).name
+    match = re.match(r"S\d[A-Z_]?_(.+?)_+\d{8}T\d{6}", name)
+
+    if match is not None:
+        return match.group(1).strip("_")
+
+    return pathlib.Path(input_).suffix.lstrip(".") or "unknown"
+
+
+def get_input_size(input_):
+    """Get the size of the input in bytes. For folders (and BEAM-DIMAP products) all the files are counted."""
+
+    input_ = pathlib.Path(input_)
+
+    if input_.suffix == ".dim" and input_.with_suffix(".data").is_dir():
+        return input_.stat().st_size + get_input_size(input_.with_suffix(".data"))
+
+    if input_.is_dir():
+        return sum(file.stat().st_size for file in input_.rglob("*") if file.is_file())
+
+    if input_.exists():
+        return input_.stat().st_size
+
+    return 0
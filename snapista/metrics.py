@@ -0,0 +1,249 @@
+""" This file contains the definition of the Metrics class – counters and a timeline of batch runs.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The metrics are written as a Prometheus textfile (for the node exporter textfile collector), and the timeline
+ as a Chrome trace (open it in Perfetto or chrome://tracing) with a span per product and per phase:
+ extract, serialize, queue (with a Scheduler), gpt, and move.
+
+ Without a Metrics object set on GPT nothing is recorded; the only cost is checking for None.
+
+"""
+
+import os
+import json
+import time
+import pathlib
+import threading
+import contextlib
+
+from snapista.history import get_input_size
+
+_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+
+class Metrics:
+    """Counters of the jobs, and the timeline of their phases.
+
+    Examples:
+        ```python
+        gpt = snapista.GPT(gpt_path)
+        gpt.metrics = snapista.Metrics(
+            textfile='/var/lib/node_exporter/textfile/snapista.prom',
+            trace='Data/trace.json',
+        )
+        gpt.run(graph, products, workers=4)
+        ```
+
+    """
+
+    def __init__(self, textfile=None, trace=None, interval=10.0, labels=None):
+        """Create new metrics.
+
+        Args:
+            textfile (str): Where to write the Prometheus metrics, None to keep them in memory.
+            trace (str): Where to write the Chrome trace, None to keep it in memory.
+            interval (float): Seconds between writes while jobs are running. The files are always written
+                at the end of a batch.
+            labels (dict): Labels to add to every Prometheus metric, e.g. {'host': 'node1'}.
+
+        """
+
+        self.textfile = None if textfile is None else pathlib.Path(textfile)
+        self.trace = None if trace is None else pathlib.Path(trace)
+        self.interval = interval
+        self.labels = {} if labels is None else dict(labels)
+
+        self.queued = 0
+        self.running = 0
+        self.jobs = {"done": 0, "failed": 0, "error": 0}
+        self.input_bytes = 0
+        self.durations = [0] * (len(_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.phases = {}  # phase -> (count, seconds)
+        self.events = []
+
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._threads = {}
+        self._written = 0.0
+
+    def __repr__(self):
+        return f"Metrics({self.jobs})"
+
+    def job_queued(self):
+        with self._lock:
+            self.queued += 1
+
+    def job_started(self, queued=False):
+        with self._lock:
+            if queued:
+                self.queued -= 1
+            self.running += 1
+
+    def job_finished(self, result):
+        """Count a finished job (a snapista.Result) and write the files when it's time to."""
+
+        size = get_input_size(result.input)
+
+        with self._lock:
+            self.running -= 1
+            self.jobs[result.status] = self.jobs.get(result.status, 0) + 1
+            self.input_bytes += size
+
+            duration = result.finished - result.started
+            self.duration_sum += duration
+            self.durations[_get_bucket(duration)] += 1
+
+            write = time.monotonic() - self._written >= self.interval
+
+        if write:
+            self.write()
+
+    @contextlib.contextmanager
+    def span(self, name, product=None, category="phase"):
+        """Time a phase of a job.
+
+        Args:
+            name (str): The phase, e.g. 'gpt'.
+            product (pathlib.Path): The product the phase is for.
+            category (str): 'phase', or 'job' for the span of a whole job.
+
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                tid = self._threads.setdefault(
+                    threading.get_ident(), len(self._threads) + 1
+                )
+                self.events.append(
+                    {
+                        "name": name,
+                        "cat": category,
+                        "ph": "X",
+                        "ts": round((start - self._start) * 1e6),
+                        "dur": round((end - start) * 1e6),
+                        "pid": os.getpid(),
+                        "tid": tid,
+                        "args": {} if product is None else {"product": product.name},
+                    }
+                )
+                if category == "phase":
+                    count, seconds = self.phases.get(name, (0, 0.0))
+                    self.phases[name] = (count + 1, seconds + end - start)
+
+    def write(self):
+        """Write the Prometheus textfile and the Chrome trace (the ones that have a path)."""
+
+        with self._lock:
+            self._written = time.monotonic()
+            text = self._get_text()
+            trace = self._get_trace() if self.trace is not None else None
+
+        if self.textfile is not None:
+            _write_atomically(self.textfile, text)
+        if trace is not None:
+            _write_atomically(self.trace, json.dumps(trace))
+
+    def get_text(self):
+        """Get the metrics in the Prometheus text format."""
+
+        with self._lock:
+            return self._get_text()
+
+    def _get_text(self):
+        def labels(**extra):
+            pairs = {**self.labels, **extra}
+            if len(pairs) == 0:
+                return ""
+            return (
+                "{" + ",".join(f'{key}="{value}"' for key, value in pairs.items()) + "}"
+            )
+
+        lines = [
+            "# HELP snapista_jobs_queued Jobs waiting for a worker.",
+            "# TYPE snapista_jobs_queued gauge",
+            f"snapista_jobs_queued{labels()} {self.queued}",
+            "# HELP snapista_jobs_running Jobs being processed.",
+            "# TYPE snapista_jobs_running gauge",
+            f"snapista_jobs_running{labels()} {self.running}",
+            "# HELP snapista_jobs_total Finished jobs by status (done, failed, error).",
+            "# TYPE snapista_jobs_total counter",
+        ]
+        lines += [
+            f"snapista_jobs_total{labels(status=status)} {count}"
+            for status, count in self.jobs.items()
+        ]
+
+        lines += [
+            "# HELP snapista_input_bytes_total Size of the processed inputs.",
+            "# TYPE snapista_input_bytes_total counter",
+            f"snapista_input_bytes_total{labels()} {self.input_bytes}",
+            "# HELP snapista_job_duration_seconds Duration of the jobs.",
+            "# TYPE snapista_job_duration_seconds histogram",
+        ]
+        total = 0
+        for bound, count in zip((*_BUCKETS, "+Inf"), self.durations):
+            total += count
+            lines.append(
+                f"snapista_job_duration_seconds_bucket{labels(le=bound)} {total}"
+            )
+        lines += [
+            f"snapista_job_duration_seconds_sum{labels()} {self.duration_sum:.3f}",
+            f"snapista_job_duration_seconds_count{labels()} {total}",
+            "# HELP snapista_phase_seconds_total Time spent in each phase of the jobs.",
+            "# TYPE snapista_phase_seconds_total counter",
+        ]
+        lines += [
+            f"snapista_phase_seconds_total{labels(phase=phase)} {seconds:.3f}"
+            for phase, (_, seconds) in self.phases.items()
+        ]
+        lines += [
+            "# HELP snapista_phases_total Number of times each phase ran.",
+            "# TYPE snapista_phases_total counter",
+        ]
+        lines += [
+            f"snapista_phases_total{labels(phase=phase)} {count}"
+            for phase, (count, _) in self.phases.items()
+        ]
+        lines += [
+            "# HELP snapista_last_update_timestamp_seconds When the metrics were written.",
+            "# TYPE snapista_last_update_timestamp_seconds gauge",
+            f"snapista_last_update_timestamp_seconds{labels()} {time.time():.0f}",
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def _get_trace(self):
+        names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": f"worker {tid}"},
+            }
+            for tid in self._threads.values()
+        ]
+
+        return {"traceEvents": names + self.events, "displayTimeUnit": "ms"}
+
+
+def _get_bucket(duration):
+    for i, bound in enumerate(_BUCKETS):
+        if duration <= bound:
+            return i
+
+    return len(_BUCKETS)
+
+
+def _write_atomically(file, text):
+    # the textfile collector must never read half a file
+    temporary = file.with_name(f".{file.name}.tmp")
+    temporary.write_text(text)
+    temporary.replace(file)
@@ -3,18 +3,52 @@
 This version of snapista is my personal take on what is originally presented here:
     https://github.com/snap-contrib/snapista
 
+ The operator modules (and lxml with them) are only imported when an operator is accessed for the first time.
+ Operators that are not defined by hand are generated from the cached gpt descriptions (see GPT.describe_operators).
+
 """
 
+import importlib
+
+from snapista.operators._parameter import Parameter
 from snapista.operators._operator import Operator
 
-from snapista.operators._subset import Subset
-from snapista.operators._resample import Resample
-from snapista.operators._c2rcc_msi import C2RCC_MSI
-from snapista.operators._collocate import Collocate
-from snapista.operators._reproject import Reproject
-from snapista.operators._band_maths import BandMaths
-from snapista.operators._band_select import BandSelect
-from snapista.operators._land_sea_mask import LandSeaMask
-from snapista.operators._add_elevation import AddElevation
-from snapista.operators._import_vector import ImportVector
-from snapista.operators._add_land_cover import AddLandCover
+# operator -> module that defines it
+_MODULES = {
+    "Subset": "_subset",
+    "Resample": "_resample",
+    "C2RCC_MSI": "_c2rcc_msi",
+    "Collocate": "_collocate",
+    "Reproject": "_reproject",
+    "BandMaths": "_band_maths",
+    "BandSelect": "_band_select",
+    "LandSeaMask": "_land_sea_mask",
+    "AddElevation": "_add_elevation",
+    "ImportVector": "_import_vector",
+    "AddLandCover": "_add_land_cover",
+    "Write": "_write",
+    "GenericOperator": "_generic",
+}
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        module = importlib.import_module(f"snapista.operators.{_MODULES[name]}")
+        operator = getattr(module, name)
+        globals()[name] = operator  # next time it's found without __getattr__
+        return operator
+
+    if not name.startswith("_"):
+        from snapista.operators import _registry
+
+        operator = _registry.get_operator_class(name)
+        if operator is not None:
+            return operator
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    from snapista.operators import _registry
+
+    return sorted({*globals(), *_MODULES, *_registry.get_operator_attribute_names()})
@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class AddElevation(Operator):
@@ -22,15 +20,28 @@ class AddElevation(Operator):
 
     """
 
+    dem_name = Parameter("demName", str, default="SRTM 3Sec")
+    dem_resampling_method = Parameter(
+        "demResamplingMethod",
+        str,
+        default="BICUBIC_INTERPOLATION",
+        values=(
+            "NEAREST_NEIGHBOUR",
+            "BILINEAR_INTERPOLATION",
+            "CUBIC_CONVOLUTION",
+            "BISINC_5_POINT_INTERPOLATION",
+            "BISINC_11_POINT_INTERPOLATION",
+            "BISINC_21_POINT_INTERPOLATION",
+            "BICUBIC_INTERPOLATION",
+        ),
+    )
+    external_dem_file = Parameter("externalDEMFile", str, file=True)
+    external_dem_no_data_value = Parameter("externalDEMNoDataValue", float, default=0)
+    elevation_band_name = Parameter("elevationBandName", str, default="elevation")
+
     def __init__(self):
         super(AddElevation, self).__init__(name="AddElevation", short_name=None)
 
-        self.dem_name = "SRTM 3Sec"
-        self.dem_resampling_method = "BICUBIC_INTERPOLATION"
-        self.elevation_band_name = "elevation"
-        self.external_dem_file = None
-        self.external_dem_no_data_value = 0
-
     @staticmethod
     def get_available_dem_names():
         """Get a list of possible DEM names."""
@@ -64,28 +75,3 @@ class AddElevation(Operator):
         ]
 
         return dem_resampling_methods
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        parameters = lxml.etree.Element("parameters")
-
-        dem_name = lxml.etree.SubElement(parameters, "demName")
-        dem_name.text = self.dem_name
-
-        dem_resampling_method = lxml.etree.SubElement(parameters, "demResamplingMethod")
-        dem_resampling_method.text = self.dem_resampling_method
-
-        if self.external_dem_file is not None:
-            external_dem_file = lxml.etree.SubElement(parameters, "externalDEMFile")
-            external_dem_file.text = self.external_dem_file
-
-            external_dem_no_data_value = lxml.etree.SubElement(
-                parameters, "externalDEMNoDataValue"
-            )
-            external_dem_no_data_value.text = str(self.external_dem_no_data_value)
-
-        elevation_band_name = lxml.etree.SubElement(parameters, "elevationBandName")
-        elevation_band_name.text = self.elevation_band_name
-
-        return parameters
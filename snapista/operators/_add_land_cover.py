@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class AddLandCover(Operator):
@@ -20,13 +18,28 @@ class AddLandCover(Operator):
 
     """
 
+    land_cover_names = Parameter(
+        "landCoverNames", list, default=["AAFC Canada Sand Pct"]
+    )
+    external_files = Parameter("externalFiles", list, default=[], file=True)
+    resampling_method = Parameter(
+        "resamplingMethod",
+        str,
+        default="NEAREST_NEIGHBOUR",
+        values=(
+            "NEAREST_NEIGHBOUR",
+            "BILINEAR_INTERPOLATION",
+            "CUBIC_CONVOLUTION",
+            "BISINC_5_POINT_INTERPOLATION",
+            "BISINC_11_POINT_INTERPOLATION",
+            "BISINC_21_POINT_INTERPOLATION",
+            "BICUBIC_INTERPOLATION",
+        ),
+    )
+
     def __init__(self):
         super(AddLandCover, self).__init__(name="AddLandCover", short_name=None)
 
-        self.external_files = []
-        self.land_cover_names = ["AAFC Canada Sand Pct"]
-        self.resampling_method = "NEAREST_NEIGHBOUR"
-
     @staticmethod
     def get_available_land_cover_names():
         """Get a list of possible land cover names."""
@@ -71,21 +84,3 @@ class AddLandCover(Operator):
         ]
 
         return dem_resampling_methods
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        parameters = lxml.etree.Element("parameters")
-
-        if len(self.land_cover_names) > 0:
-            land_cover_names = lxml.etree.SubElement(parameters, "landCoverNames")
-            land_cover_names.text = ",".join(self.land_cover_names)
-
-        if len(self.external_files) > 0:
-            external_files = lxml.etree.SubElement(parameters, "externalFiles")
-            external_files.text = ",".join(self.external_files)
-
-        resampling_method = lxml.etree.SubElement(parameters, "resamplingMethod")
-        resampling_method.text = self.resampling_method
-
-        return parameters
@@ -32,6 +32,8 @@ class BandMaths(Operator):
 
     """
 
+    __slots__ = ("_target_bands",)
+
     def __init__(self):
         super(BandMaths, self).__init__(name="BandMaths", short_name="BandMaths")
 
@@ -55,7 +57,8 @@ class BandMaths(Operator):
     def _get_parameters_as_xml_node(self):
         """Generate the <parameters> node to include in the graph."""
 
-        parameters = lxml.etree.Element("parameters")
+        # target bands are not simple values, so they are not described by Parameter
+        parameters = super(BandMaths, self)._get_parameters_as_xml_node()
         target_bands = lxml.etree.SubElement(parameters, "targetBands")
         variables = lxml.etree.SubElement(
             parameters, "variables"
@@ -85,3 +88,8 @@ class BandMaths(Operator):
             no_data_value.text = str(band.no_data_value)
 
         return parameters
+
+    def _get_key(self):
+        """Get a hashable key that is equal for operators doing the same processing."""
+
+        return super(BandMaths, self)._get_key() + (tuple(self._target_bands),)
@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class BandSelect(Operator):
@@ -21,30 +19,9 @@ class BandSelect(Operator):
 
     """
 
+    selected_polarizations = Parameter("selectedPolarisations", list, default=[])
+    source_bands = Parameter("sourceBands", list, default=[])
+    band_name_pattern = Parameter("bandNamePattern", str)
+
     def __init__(self):
         super(BandSelect, self).__init__(name="BandSelect", short_name="BandSelect")
-
-        self.band_name_pattern = None
-        self.selected_polarizations = []
-        self.source_bands = []
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        parameters = lxml.etree.Element("parameters")
-
-        if len(self.selected_polarizations) > 0:
-            selected_polarizations = lxml.etree.SubElement(
-                parameters, "selectedPolarisations"
-            )
-            selected_polarizations.text = ",".join(self.selected_polarizations)
-
-        if len(self.source_bands) > 0:
-            source_bands = lxml.etree.SubElement(parameters, "sourceBands")
-            source_bands.text = ",".join(self.source_bands)
-
-        if self.band_name_pattern is not None:
-            band_name_pattern = lxml.etree.SubElement(parameters, "bandNamePattern")
-            band_name_pattern.text = self.band_name_pattern
-
-        return parameters
@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class Collocate(Operator):
@@ -51,60 +49,29 @@ class Collocate(Operator):
 
     """
 
+    source_product_paths = Parameter("sourceProductPaths", list, default=[])
+    master_product_name = Parameter("masterProductName", str)
+    target_product_type = Parameter("targetProductType", str, default="COLLOCATED")
+    rename_master_components = Parameter("renameMasterComponents", bool, default=True)
+    rename_slave_components = Parameter("renameSlaveComponents", bool, default=True)
+    master_component_pattern = Parameter(
+        "masterComponentPattern", str, default="${ORIGINAL_NAME}_M"
+    )
+    slave_component_pattern = Parameter(
+        "slaveComponentPattern", str, default="${ORIGINAL_NAME}_S${SLAVE_NUMBER_ID}"
+    )
+    resampling_type = Parameter("resamplingType", str, default="NEAREST_NEIGHBOUR")
+
     def __init__(self):
         super(Collocate, self).__init__(name="Collocate", short_name="Collocate")
 
-        self.master_component_pattern = "${ORIGINAL_NAME}_M"
-        self.master_product_name = None
-        self.rename_master_components = True
-        self.rename_slave_components = True
-        self.resampling_type = "NEAREST_NEIGHBOUR"
-        self.slave_component_pattern = "${ORIGINAL_NAME}_S${SLAVE_NUMBER_ID}"
-        self.source_product_paths = []
-        self.target_product_type = "COLLOCATED"
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        assert self.master_product_name is not None
-        assert len(self.source_product_paths) > 0
-
-        parameters = lxml.etree.Element("parameters")
+    def _validate(self):
+        """Check that the master is set for the products to collocate.
 
-        source_product_paths = lxml.etree.SubElement(parameters, "sourceProductPaths")
-        source_product_paths.text = ",".join(map(str, self.source_product_paths))
-
-        master_product_name = lxml.etree.SubElement(parameters, "masterProductName")
-        master_product_name.text = str(self.master_product_name)
-
-        target_product_type = lxml.etree.SubElement(parameters, "targetProductType")
-        target_product_type.text = self.target_product_type
-
-        rename_master_components = lxml.etree.SubElement(
-            parameters, "renameMasterComponents"
-        )
-        rename_master_components.text = (
-            "true" if self.rename_master_components else "false"
-        )
-
-        rename_slave_components = lxml.etree.SubElement(
-            parameters, "renameSlaveComponents"
-        )
-        rename_slave_components.text = (
-            "true" if self.rename_slave_components else "false"
-        )
-
-        master_component_pattern = lxml.etree.SubElement(
-            parameters, "masterComponentPattern"
-        )
-        master_component_pattern.text = self.master_component_pattern
-
-        slave_component_pattern = lxml.etree.SubElement(
-            parameters, "slaveComponentPattern"
-        )
-        slave_component_pattern.text = self.slave_component_pattern
+        Without source_product_paths, the products come from the sources of the node in the graph
+        (see Graph.add_node).
 
-        resampling_type = lxml.etree.SubElement(parameters, "resamplingType")
-        resampling_type.text = self.resampling_type
+        """
 
-        return parameters
+        if len(self.source_product_paths) > 0 and self.master_product_name is None:
+            raise ValueError("Collocate: master_product_name is not set!")
@@ -0,0 +1,74 @@
+""" This file contains the definition of the GenericOperator class – the base for generated operators.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+"""
+
+from snapista.operators import Operator, Parameter
+
+# gpt parameter type -> Python type
+_TYPES = {
+    "boolean": bool,
+    "int": int,
+    "long": int,
+    "short": int,
+    "byte": int,
+    "double": float,
+    "float": float,
+}
+
+
+class GenericOperator(Operator):
+    """SNAP gpt operator generated from the description gpt gives with `gpt <op> -h`.
+
+    Notes:
+        The parameters are set through the attributes named as the gpt parameters in snake_case
+        (e.g. geoRegion -> geo_region). Parameters set to None or empty lists are left for gpt to default.
+
+    """
+
+    _gpt_name = None
+    _description = {"description": "", "sources": [], "parameters": []}
+
+    def __init__(self):
+        super(GenericOperator, self).__init__(name=self._gpt_name, short_name=None)
+
+        sources = self._description["sources"]
+        mandatory = [source["name"] for source in sources if source["mandatory"]]
+        if len(mandatory) > 0:
+            self._mandatory_source_name = mandatory[0]
+        elif len(sources) > 0:
+            self._mandatory_source_name = sources[0]["name"]
+
+
+def make_parameter(description):
+    """Make a Parameter out of the description of a gpt parameter (see _registry.parse_operator_help)."""
+
+    type_ = list if "," in description["type"] else _TYPES.get(description["type"], str)
+
+    interval = None
+    if description["interval"] is not None:
+        interval = tuple(
+            None if bound.strip() in ("", "*") else float(bound)
+            for bound in description["interval"].strip("[]()").split(",")
+        )
+
+    parameter = Parameter(
+        description["name"],
+        type_,
+        interval=interval,
+        values=description["values"],
+        file=description["type"] == "file",
+    )
+
+    if description["default"] is not None:
+        try:
+            parameter.default = parameter.convert(description["default"])
+        except ValueError:
+            # a default gpt advertises but that does not pass its own checks (e.g. NaN for an int), left to gpt
+            parameter.default = None
+    elif type_ is list:
+        parameter.default = []
+
+    return parameter
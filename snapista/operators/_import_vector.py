@@ -7,9 +7,7 @@ This version of snapista is my personal take on what is originally presented her
 
 import pathlib
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class ImportVector(Operator):
@@ -21,23 +19,14 @@ class ImportVector(Operator):
 
     """
 
+    vector_file = Parameter("vectorFile", str, default="", file=True)
+    separate_shapes = Parameter("separateShapes", bool, default=True)
+
     def __init__(self):
         super(ImportVector, self).__init__(name="Import-Vector", short_name=None)
 
-        self.separate_shapes = True
-        self.vector_file = ""
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        assert pathlib.Path(self.vector_file).is_file()
-
-        parameters = lxml.etree.Element("parameters")
-
-        vector_file = lxml.etree.SubElement(parameters, "vectorFile")
-        vector_file.text = str(self.vector_file)
-
-        separate_shapes = lxml.etree.SubElement(parameters, "separateShapes")
-        separate_shapes.text = "true" if self.separate_shapes else "false"
+    def _validate(self):
+        """Check that the vector file exists."""
 
-        return parameters
+        if not pathlib.Path(self.vector_file).is_file():
+            raise ValueError(f"ImportVector: {self.vector_file} is not a file!")
@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class LandSeaMask(Operator):
@@ -29,40 +27,20 @@ class LandSeaMask(Operator):
 
     """
 
+    source_bands = Parameter("sourceBands", list, default=[])
+    mask_out_land = Parameter("landMask", bool, default=True)
+    use_srtm = Parameter("useSRTM", bool, default=True)
+    geometry = Parameter("geometry", str, default="")
+    invert_geometry = Parameter("invertGeometry", bool, default=False)
+    shoreline_extension = Parameter(
+        "shorelineExtension", int, default=0, interval=(0, None)
+    )
+
     def __init__(self):
         super(LandSeaMask, self).__init__(name="Land-Sea-Mask", short_name="masked")
 
-        self.geometry = ""
-        self.invert_geometry = False
-        self.mask_out_land = True
-        self.shoreline_extension = 0
-        self.source_bands = []
-        self.use_srtm = True
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        assert len(self.geometry) > 0 or self.use_srtm
-
-        parameters = lxml.etree.Element("parameters")
-
-        if len(self.source_bands) > 0:
-            source_bands = lxml.etree.SubElement(parameters, "sourceBands")
-            source_bands.text = ",".join(self.source_bands)
-
-        land_mask = lxml.etree.SubElement(parameters, "landMask")
-        land_mask.text = "true" if self.mask_out_land else "false"
-
-        use_srtm = lxml.etree.SubElement(parameters, "useSRTM")
-        use_srtm.text = "true" if self.use_srtm else "false"
-
-        geometry = lxml.etree.SubElement(parameters, "geometry")
-        geometry.text = self.geometry
-
-        invert_geometry = lxml.etree.SubElement(parameters, "invertGeometry")
-        invert_geometry.text = "true" if self.invert_geometry else "false"
-
-        shoreline_extension = lxml.etree.SubElement(parameters, "shorelineExtension")
-        shoreline_extension.text = str(self.shoreline_extension)
+    def _validate(self):
+        """Check that there is something to make the mask from."""
 
-        return parameters
+        if len(self.geometry) == 0 and not self.use_srtm:
+            raise ValueError("LandSeaMask: set the geometry or use SRTM!")
@@ -5,9 +5,61 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
+from snapista.operators._parameter import Parameter
 
-class Operator:
-    """SNAP gpt operator."""
+
+class _OperatorMeta(type):
+    """Collects the Parameter declarations of an operator class and adds the slots to keep their values in."""
+
+    def __new__(mcs, name, bases, namespace):
+        parameters = [
+            value for value in namespace.values() if isinstance(value, Parameter)
+        ]
+
+        slots = tuple(namespace.get("__slots__", ()))
+        namespace["__slots__"] = slots + tuple(
+            f"_p_{key}"
+            for key, value in namespace.items()
+            if isinstance(value, Parameter)
+        )
+
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        inherited = [
+            parameter
+            for base in bases
+            for parameter in getattr(base, "_parameters", ())
+            if parameter.name not in namespace
+        ]
+        cls._parameters = tuple(inherited + parameters)
+
+        cls._all_slots = tuple(
+            slot
+            for klass in reversed(cls.__mro__)
+            for slot in klass.__dict__.get("__slots__", ())
+        )
+
+        return cls
+
+
+class Operator(metaclass=_OperatorMeta):
+    """SNAP gpt operator.
+
+    Notes:
+        The parameters of an operator are declared with snapista.operators.Parameter class attributes.
+        Setting an attribute that is not declared raises an AttributeError, so typos don't go unnoticed.
+
+    """
+
+    # parameters that don't change the processing, left out of the key (e.g. the output file of Write)
+    _unkeyed = ()
+
+    __slots__ = (
+        "_name",
+        "_short_name",
+        "_mandatory_source_name",
+        "_additional_sources",
+    )
 
     def __init__(self, name, short_name):
         """Create an operator for a SNAP gpt graph."""
@@ -23,9 +75,53 @@ class Operator:
         # {'lxml_element': <lxml.etree.Element>, 'name': 'collocateWith', 'value': <path>}
         # this way the graph will be able to generate
 
+        for parameter in self._parameters:
+            setattr(self, parameter.slot, parameter.get_default())
+
     def __repr__(self):
         return f"{self._name}"
 
+    def __copy__(self):
+        cls = type(self)
+        copy = cls.__new__(cls)
+
+        for slot in cls._all_slots:
+            if hasattr(self, slot):
+                value = getattr(self, slot)
+                setattr(copy, slot, list(value) if isinstance(value, list) else value)
+
+        return copy
+
+    def _validate(self):
+        """Check the parameters that depend on each other. Raise a ValueError if something is wrong."""
+
     def _get_parameters_as_xml_node(self):
-        """Each operator should know how to spit out its own <parameters> node for the xml graph."""
-        raise NotImplementedError
+        """Generate the <parameters> node to include in the graph."""
+
+        import lxml.etree
+
+        self._validate()
+
+        parameters = lxml.etree.Element("parameters")
+
+        for parameter in self._parameters:
+            text = parameter.to_text(getattr(self, parameter.slot))
+            if text is not None:
+                lxml.etree.SubElement(parameters, parameter.xml_name).text = text
+
+        return parameters
+
+    def _get_key(self):
+        """Get a hashable key that is equal for operators doing the same processing."""
+
+        return (
+            self._name,
+            tuple(
+                (parameter.xml_name, parameter.to_key(getattr(self, parameter.slot)))
+                for parameter in self._parameters
+                if parameter.name not in self._unkeyed
+            ),
+            tuple(
+                (source["name"], source["value"]) for source in self._additional_sources
+            ),
+        )
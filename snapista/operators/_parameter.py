@@ -0,0 +1,164 @@
+""" This file contains the definition of the Parameter class – a declarative description of an operator parameter.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+"""
+
+
+class Parameter:
+    """A parameter of a gpt operator.
+
+    Parameters are declared as class attributes of operators, and the values are kept in the instance slots.
+    The same declaration drives the conversion of the values set by the user, their validation,
+    the <parameters> node of the xml graph, and the hash of the operator.
+
+    Args:
+        xml_name (str): The name of the parameter in the xml graph, e.g. 'geoRegion'.
+        type_ (type): One of bool, int, float, str, or list. Values are converted to it when set.
+        default: The default value. None (or an empty list) means the parameter is left out of the graph.
+        interval (tuple): The valid interval (min, max), inclusive. Either end can be None.
+        values (tuple): The valid values.
+        file (bool): Whether the parameter is a path to a file that has to exist.
+
+    Examples:
+        ```python
+        class Subset(Operator):
+            geo_region = Parameter("geoRegion", str)
+            sub_sampling_x = Parameter("subSamplingX", int, default=1, interval=(1, None))
+        ```
+
+    """
+
+    __slots__ = (
+        "name",
+        "slot",
+        "xml_name",
+        "type_",
+        "default",
+        "interval",
+        "values",
+        "file",
+        "_owner",
+    )
+
+    def __init__(
+        self,
+        xml_name,
+        type_=str,
+        default=None,
+        interval=None,
+        values=None,
+        file=False,
+    ):
+        self.name = None
+        self.slot = None
+        self.xml_name = xml_name
+        self.type_ = type_
+        self.default = default
+        self.interval = interval
+        self.values = None if values is None else tuple(values)
+        self.file = file
+        self._owner = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = f"_p_{name}"
+        self._owner = owner.__name__
+        self.default = self.convert(self.default)
+
+    def __repr__(self):
+        return f"Parameter({self.xml_name!r}, {self.type_.__name__})"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.slot)
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, self.convert(value))
+
+    def get_default(self):
+        """Get a fresh copy of the default value."""
+
+        return list(self.default) if isinstance(self.default, list) else self.default
+
+    def convert(self, value):
+        """Convert and validate a value for the parameter.
+
+        Raises:
+            ValueError: If the value can not be converted or is invalid.
+
+        """
+
+        if value is None:
+            return None
+
+        try:
+            if self.type_ is bool:
+                if isinstance(value, str):
+                    value = {"true": True, "false": False}[value.lower()]
+                else:
+                    value = bool(value)
+            elif self.type_ is list:
+                value = [value] if isinstance(value, str) else list(value)
+            elif self.type_ is str:
+                value = str(value)
+            else:
+                value = self.type_(value)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(
+                f"{self._owner}.{self.name} must be {self.type_.__name__}, got {value!r}!"
+            )
+
+        problem = self.check(value)
+        if problem is not None:
+            raise ValueError(problem)
+
+        return value
+
+    def check(self, value):
+        """Check a value against the valid interval and the valid values.
+
+        Returns:
+            str: The description of the problem, or None if the value is valid.
+
+        """
+
+        if value is None:
+            return None
+
+        if self.interval is not None:
+            low, high = self.interval
+            if (low is not None and value < low) or (high is not None and value > high):
+                return f"{self._owner}.{self.name} must be within [{low}, {high}], got {value}!"
+
+        if self.values is not None:
+            invalid = [
+                v
+                for v in (value if isinstance(value, list) else [value])
+                if v not in self.values
+            ]
+            if len(invalid) > 0:
+                return f"{self._owner}.{self.name} must be one of {', '.join(map(repr, self.values))}, got {value!r}!"
+
+        return None
+
+    def to_text(self, value):
+        """Convert a value into the text of the xml element, None if the parameter should be left out."""
+
+        if value is None:
+            return None
+
+        if self.type_ is bool:
+            return "true" if value else "false"
+
+        if self.type_ is list:
+            return ",".join(map(str, value)) if len(value) > 0 else None
+
+        return str(value)
+
+    def to_key(self, value):
+        """Convert a value into something hashable."""
+
+        return tuple(map(str, value)) if isinstance(value, list) else value
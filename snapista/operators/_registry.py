@@ -0,0 +1,258 @@
+""" This file contains the registry of the operators that are generated from gpt's own descriptions.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The hand-written operators cover only a fraction of what gpt can do. The rest are described by `gpt <op> -h`.
+ Calling gpt for every operator takes a while (a JVM per call), so the descriptions are parsed once per SNAP
+ installation and cached on disk as json. Operator classes are generated from the cache on first access.
+
+"""
+
+import re
+import json
+import hashlib
+import pathlib
+import subprocess
+
+from snapista._cache import get_cache_folder
+
+# the cache of the last described SNAP installation is the one used to generate operators
+_CURRENT = "operators-current.json"
+
+_operators = None  # operator name -> description, loaded lazily from the cache
+_classes = {}  # attribute name -> generated class
+
+
+def describe_operators(gpt, refresh=False):
+    """Parse the descriptions of all gpt operators and cache them on disk.
+
+    Args:
+        gpt (str or os.PathLike): Path to the SNAP gpt executable.
+        refresh (bool): Call gpt even if the installation has already been described.
+
+    Returns:
+        dict: Operator name -> description (a dictionary with 'description', 'sources', and 'parameters').
+
+    """
+
+    global _operators
+
+    gpt = pathlib.Path(gpt).resolve()
+    cache = get_cache_folder() / f"operators-{_get_installation_key(gpt)}.json"
+
+    if cache.exists() and not refresh:
+        operators = json.loads(cache.read_text())
+    else:
+        process = subprocess.run([gpt, "-h"], capture_output=True, check=True)
+        operators = {}
+        for name in parse_operator_names(process.stdout.decode()):
+            process = subprocess.run([gpt, name, "-h"], capture_output=True)
+            if process.returncode == 0:
+                operators[name] = parse_operator_help(process.stdout.decode())
+
+        cache.write_text(json.dumps(operators, indent=1))
+
+    (get_cache_folder() / _CURRENT).write_text(json.dumps({"cache": cache.name}))
+
+    _operators = operators
+    _classes.clear()
+
+    return operators
+
+
+def get_operator_class(attribute):
+    """Get a generated operator class by its attribute name (the gpt name with non-word characters as '_').
+
+    Returns:
+        type: The operator class, or None if there is no such operator in the cache.
+
+    """
+
+    if attribute in _classes:
+        return _classes[attribute]
+
+    for name, description in _load_operators().items():
+        if get_attribute_name(name) == attribute:
+            _classes[attribute] = _generate_operator_class(name, description)
+            return _classes[attribute]
+
+    return None
+
+
+def get_operator_attribute_names():
+    """Get the attribute names of all operators in the cache."""
+
+    return [get_attribute_name(name) for name in _load_operators()]
+
+
+def get_attribute_name(name):
+    """Turn a gpt operator name (e.g. 'Land-Sea-Mask', 'c2rcc.msi') into a valid Python name."""
+
+    return re.sub(r"\W", "_", name)
+
+
+def get_parameter_attribute_name(name):
+    """Turn a gpt parameter name (e.g. 'geoRegion', 'subSamplingX') into a snake_case Python name."""
+
+    # names that start with an acronym glued to a word, like TSMfac or CHLexp
+    match = re.match(r"^([A-Z]{2,})([a-z].*)$", name)
+    if match is not None:
+        return (
+            f"{match.group(1).lower()}_{get_parameter_attribute_name(match.group(2))}"
+        )
+
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_", name).lower()
+
+
+def parse_operator_names(text):
+    """Parse the list of operators from the output of `gpt -h`."""
+
+    names = []
+    listing = False
+
+    for line in text.splitlines():
+        if line.startswith("Operators:"):
+            listing = True
+        elif listing and line.startswith("  "):
+            names.append(line.split()[0])
+        elif listing and line.strip() != "":
+            break
+
+    return names
+
+
+def parse_operator_help(text):
+    """Parse the output of `gpt <op> -h`.
+
+    Returns:
+        dict: Description of the operator, its sources and parameters.
+            Each parameter has 'name', 'type', 'description', 'default', 'interval', and 'values' keys.
+
+    """
+
+    sections = {}
+    section = None
+
+    for line in text.splitlines():
+        if re.match(r"^\S.*:$", line):
+            section = line[:-1]
+            sections[section] = []
+        elif section is not None:
+            sections[section].append(line)
+
+    sources = []
+    for option in _split_options(sections.get("Source Options", [])):
+        sources.append(
+            {
+                "name": option["name"],
+                "mandatory": "This is a mandatory source." in option["text"],
+            }
+        )
+
+    parameters = []
+    for option in _split_options(sections.get("Parameter Options", [])):
+        text = option["text"]
+
+        default = re.search(r"Default value is '(.*?)'\.", text)
+        interval = re.search(r"Valid interval is ([\[(].*?[\])])\.", text)
+        values = re.search(r"Value must be one of (.*?)\.(?:\s|$)", text)
+
+        description = re.sub(
+            r"\s*(Default value is|Valid interval is|Value must be one of|This is a mandatory parameter).*",
+            "",
+            text,
+            flags=re.DOTALL,
+        )
+
+        parameters.append(
+            {
+                "name": option["name"],
+                "type": option["type"],
+                "description": " ".join(description.split()),
+                "default": None if default is None else default.group(1),
+                "interval": None if interval is None else interval.group(1),
+                "values": (
+                    None if values is None else re.findall(r"'(.*?)'", values.group(1))
+                ),
+                "mandatory": "This is a mandatory parameter." in text,
+            }
+        )
+
+    description = " ".join(" ".join(sections.get("Description", [])).split())
+
+    return {"description": description, "sources": sources, "parameters": parameters}
+
+
+def _split_options(lines):
+    """Split the lines of a 'Source Options' or 'Parameter Options' section into options."""
+
+    options = []
+
+    for line in lines:
+        match = re.match(r"^\s+-[SP](\w+)=<(.*?)>\s*(.*)$", line)
+        if match is not None:
+            name, type_, text = match.groups()
+            options.append({"name": name, "type": type_, "text": text})
+        elif len(options) > 0 and line.strip() != "":
+            options[-1]["text"] += " " + line.strip()
+
+    return options
+
+
+def _get_installation_key(gpt):
+    """A key that changes when gpt is moved, reinstalled, or updated."""
+
+    key = hashlib.sha1(str(gpt).encode())
+    key.update(str(gpt.stat().st_mtime_ns).encode())
+
+    version = gpt.parent.parent / "VERSION.txt"
+    if version.exists():
+        key.update(version.read_bytes())
+
+    return key.hexdigest()[:16]
+
+
+def _load_operators():
+    """Load the descriptions of the operators of the current SNAP installation from the cache."""
+
+    global _operators
+
+    if _operators is None:
+        _operators = {}
+        current = get_cache_folder() / _CURRENT
+        if current.exists():
+            cache = get_cache_folder() / json.loads(current.read_text())["cache"]
+            if cache.exists():
+                _operators = json.loads(cache.read_text())
+
+    return _operators
+
+
+def _generate_operator_class(name, description):
+    """Generate an operator class from the gpt description."""
+
+    from snapista.operators._generic import GenericOperator, make_parameter
+
+    attributes = "\n".join(
+        f"        {get_parameter_attribute_name(parameter['name'])} ({parameter['type']}): "
+        f"{parameter['description']}"
+        for parameter in description["parameters"]
+    )
+    docstring = f"{description['description']}\n\n    Attributes:\n{attributes}\n\n    Notes:\n        Generated from `gpt {name} -h`.\n"
+
+    namespace = {
+        "__doc__": docstring,
+        "__module__": "snapista.operators",
+        "_gpt_name": name,
+        "_description": description,
+    }
+
+    for parameter in description["parameters"]:
+        namespace[get_parameter_attribute_name(parameter["name"])] = make_parameter(
+            parameter
+        )
+
+    return type(GenericOperator)(
+        get_attribute_name(name), (GenericOperator,), namespace
+    )
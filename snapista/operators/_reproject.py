@@ -7,7 +7,7 @@ This version of snapista is my personal take on what is originally presented her
 
 import lxml.etree
 
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class Reproject(Operator):
@@ -18,26 +18,47 @@ class Reproject(Operator):
         crs (str): Text specifying the target CRS, either in WKT or as an authority code.  AUTO authority can be used
             with code 42001 (UTM), and 42002 (Transverse Mercator) where the scene center is used as reference.
             Examples: EPSG:4326, AUTO:42001
+        easting (float): The easting of the reference pixel.
+        height (int): The height of the target product.
         include_tie_point_grids (bool): Whether tie-point grids should be included in the output product.
+        northing (float): The northing of the reference pixel.
+        pixel_size_x (float): The pixel size in X direction given in CRS units.
+        pixel_size_y (float): The pixel size in Y direction given in CRS units.
+        reference_pixel_x (float): The X-position of the reference pixel.
+        reference_pixel_y (float): The Y-position of the reference pixel.
         resampling (str): The method used for resampling of floating-point raster data: 'Nearest', 'Bilinear', 'Bicubic'
+        width (int): The width of the target product.
 
     Notes:
         If colocate_with property is set, the graph will automatically add the needed source variable and GPT will
         automatically be called with the needed source.
 
-        Unused parameters: easting, elevationModelName, height, noDataValue, northing, orientation, orthorectify,
-        pixelSizeX, pixelSizeY, referencePixelX, referencePixelY, tileSizeX, tileSizeY, width, wktFile.
+        To reproject onto the grid of a reference product without opening it in every gpt run, use set_grid instead.
+
+        Unused parameters: elevationModelName, noDataValue, orientation, orthorectify, tileSizeX, tileSizeY, wktFile.
 
     """
 
+    __slots__ = ("_collocate_with",)
+
+    crs = Parameter("crs", str, default="EPSG:4326")
+    resampling = Parameter(
+        "resampling", str, default="Nearest", values=("Nearest", "Bilinear", "Bicubic")
+    )
+    include_tie_point_grids = Parameter("includeTiePointGrids", bool, default=True)
+    add_delta_bands = Parameter("addDeltaBands", bool, default=False)
+    reference_pixel_x = Parameter("referencePixelX", float)
+    reference_pixel_y = Parameter("referencePixelY", float)
+    easting = Parameter("easting", float)
+    northing = Parameter("northing", float)
+    pixel_size_x = Parameter("pixelSizeX", float, interval=(0, None))
+    pixel_size_y = Parameter("pixelSizeY", float, interval=(0, None))
+    width = Parameter("width", int, interval=(1, None))
+    height = Parameter("height", int, interval=(1, None))
+
     def __init__(self):
         super(Reproject, self).__init__(name="Reproject", short_name="Reprojected")
 
-        self.add_delta_bands = False
-        self.crs = "EPSG:4326"
-        self.include_tie_point_grids = True
-        self.resampling = "Nearest"
-
         self._collocate_with = None
 
     @property
@@ -60,26 +81,30 @@ class Reproject(Operator):
 
         self._additional_sources = [additional_source]
 
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
+    def set_grid(self, grid):
+        """Reproject onto a grid given as parameters, instead of collocating with a product.
 
-        parameters = lxml.etree.Element("parameters")
+        Args:
+            grid (dict or str or os.PathLike): A grid from snapista.grid.get_grid, or the reference product
+                to read it from (it is read once and cached).
 
-        if self.crs is not None:
-            crs = lxml.etree.SubElement(parameters, "crs")
-            crs.text = self.crs
+        """
 
-        resampling = lxml.etree.SubElement(parameters, "resampling")
-        resampling.text = self.resampling
+        if not isinstance(grid, dict):
+            from snapista.grid import get_grid
 
-        include_tie_point_grids = lxml.etree.SubElement(
-            parameters, "includeTiePointGrids"
-        )
-        include_tie_point_grids.text = (
-            "true" if self.include_tie_point_grids else "false"
-        )
+            grid = get_grid(grid)
 
-        add_delta_bands = lxml.etree.SubElement(parameters, "addDeltaBands")
-        add_delta_bands.text = "true" if self.add_delta_bands else "false"
-
-        return parameters
+        self._collocate_with = None
+        self._additional_sources = []
+
+        self.crs = grid["crs"]
+        # the upper-left corner of the upper-left pixel
+        self.reference_pixel_x = 0.0
+        self.reference_pixel_y = 0.0
+        self.easting = grid["easting"]
+        self.northing = grid["northing"]
+        self.pixel_size_x = grid["pixel_size_x"]
+        self.pixel_size_y = grid["pixel_size_y"]
+        self.width = grid["width"]
+        self.height = grid["height"]
@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class Resample(Operator):
@@ -34,52 +32,42 @@ class Resample(Operator):
 
     """
 
+    reference_band = Parameter("referenceBand", str)
+    target_width = Parameter("targetWidth", int, interval=(1, None))
+    target_height = Parameter("targetHeight", int, interval=(1, None))
+    target_resolution = Parameter("targetResolution", int, interval=(1, None))
+    upsampling = Parameter(
+        "upsampling", str, default="Nearest", values=("Nearest", "Bilinear", "Bicubic")
+    )
+    downsampling = Parameter(
+        "downsampling",
+        str,
+        default="First",
+        values=("First", "Min", "Max", "Mean", "Median"),
+    )
+    flag_downsampling = Parameter(
+        "flagDownsampling",
+        str,
+        default="First",
+        values=("First", "FlagAnd", "FlagOr", "FlagMedianAnd", "FlagMedianOr"),
+    )
+    resample_on_pyramid_levels = Parameter(
+        "resampleOnPyramidLevels", bool, default=True
+    )
+
     def __init__(self):
         super(Resample, self).__init__(name="Resample", short_name="resampled")
 
         self._mandatory_source_name = "sourceProduct"
 
-        self.downsampling = "First"
-        self.flag_downsampling = "First"
-        self.reference_band = None
-        self.resample_on_pyramid_levels = True
-        self.target_height = None
-        self.target_resolution = None
-        self.target_width = None
-        self.upsampling = "Nearest"
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        parameters = lxml.etree.Element("parameters")
-
-        if self.reference_band is not None:
-            reference_band = lxml.etree.SubElement(parameters, "referenceBand")
-            reference_band.text = self.reference_band
-        else:
-            target_width = lxml.etree.SubElement(parameters, "targetWidth")
-            target_width.text = str(self.target_width)
-
-            target_height = lxml.etree.SubElement(parameters, "targetHeight")
-            target_height.text = str(self.target_height)
-
-            target_resolution = lxml.etree.SubElement(parameters, "targetResolution")
-            target_resolution.text = str(self.target_resolution)
-
-        upsampling = lxml.etree.SubElement(parameters, "upsampling")
-        upsampling.text = self.upsampling
-
-        downsampling = lxml.etree.SubElement(parameters, "downsampling")
-        downsampling.text = self.downsampling
-
-        flag_downsampling = lxml.etree.SubElement(parameters, "flagDownsampling")
-        flag_downsampling.text = self.flag_downsampling
-
-        resample_on_pyramid_levels = lxml.etree.SubElement(
-            parameters, "resampleOnPyramidLevels"
-        )
-        resample_on_pyramid_levels.text = (
-            "true" if self.resample_on_pyramid_levels else "false"
-        )
-
-        return parameters
+    def _validate(self):
+        """Check that either the reference band or the target size is set."""
+
+        if self.reference_band is not None and (
+            self.target_width is not None
+            or self.target_height is not None
+            or self.target_resolution is not None
+        ):
+            raise ValueError(
+                "Resample: set either reference_band or the target size, not both!"
+            )
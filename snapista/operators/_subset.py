@@ -5,9 +5,7 @@ This version of snapista is my personal take on what is originally presented her
 
 """
 
-import lxml.etree
-
-from snapista.operators import Operator
+from snapista.operators import Operator, Parameter
 
 
 class Subset(Operator):
@@ -30,51 +28,14 @@ class Subset(Operator):
 
     """
 
+    source_bands = Parameter("sourceBands", list, default=[])
+    reference_band = Parameter("referenceBand", str)
+    geo_region = Parameter("geoRegion", str)
+    sub_sampling_x = Parameter("subSamplingX", int, default=1, interval=(1, None))
+    sub_sampling_y = Parameter("subSamplingY", int, default=1, interval=(1, None))
+    full_swath = Parameter("fullSwath", bool, default=False)
+    tie_point_grid_names = Parameter("tiePointGridNames", list, default=[])
+    copy_metadata = Parameter("copyMetadata", bool, default=False)
+
     def __init__(self):
         super(Subset, self).__init__(name="Subset", short_name="Subset")
-
-        self.copy_metadata = False
-        self.full_swath = False
-        self.geo_region = None
-        self.reference_band = None
-        self.source_bands = []
-        self.sub_sampling_x = 1
-        self.sub_sampling_y = 1
-        self.tie_point_grid_names = []
-
-    def _get_parameters_as_xml_node(self):
-        """Generate the <parameters> node to include in the graph."""
-
-        parameters = lxml.etree.Element("parameters")
-
-        if len(self.source_bands) > 0:
-            source_bands = lxml.etree.SubElement(parameters, "sourceBands")
-            source_bands.text = ",".join(self.source_bands)
-
-        if self.reference_band is not None:
-            reference_band = lxml.etree.SubElement(parameters, "referenceBand")
-            reference_band.text = self.reference_band
-
-        if self.geo_region is not None:
-            geo_region = lxml.etree.SubElement(parameters, "geoRegion")
-            geo_region.text = self.geo_region
-
-        sub_sampling_x = lxml.etree.SubElement(parameters, "subSamplingX")
-        sub_sampling_x.text = str(self.sub_sampling_x)
-
-        sub_sampling_y = lxml.etree.SubElement(parameters, "subSamplingY")
-        sub_sampling_y.text = str(self.sub_sampling_y)
-
-        full_swath = lxml.etree.SubElement(parameters, "fullSwath")
-        full_swath.text = "true" if self.full_swath else "false"
-
-        if len(self.tie_point_grid_names) > 0:
-            tie_point_grid_names = lxml.etree.SubElement(
-                parameters, "tiePointGridNames"
-            )
-            tie_point_grid_names.text = ",".join(self.tie_point_grid_names)
-
-        copy_metadata = lxml.etree.SubElement(parameters, "copyMetadata")
-        copy_metadata.text = "true" if self.copy_metadata else "false"
-
-        return parameters
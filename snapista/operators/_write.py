@@ -0,0 +1,42 @@
+""" This file contains the definition of the Write operator.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+"""
+
+from snapista.operators import Operator, Parameter
+
+
+class Write(Operator):
+    """Write a product to a file.
+
+    Attributes:
+        clear_cache_after_row_write (bool): Whether to clear the tile cache after a row of tiles is written.
+        delete_output_on_failure (bool): Whether to delete the output if writing fails.
+        file (str): The output file to write to.
+        format_name (str): The name of the output format, e.g. 'BEAM-DIMAP' or 'GeoTIFF'.
+
+    Notes:
+        A graph can have several Write nodes, so that one gpt run writes several outputs (see snapista.fanout).
+
+    """
+
+    # the output is different for every input, the graph does the same processing (see Graph.get_hash)
+    _unkeyed = ("file",)
+
+    file = Parameter("file", str)
+    format_name = Parameter("formatName", str, default="BEAM-DIMAP")
+    clear_cache_after_row_write = Parameter(
+        "clearCacheAfterRowWrite", bool, default=False
+    )
+    delete_output_on_failure = Parameter("deleteOutputOnFailure", bool, default=True)
+
+    def __init__(self):
+        super(Write, self).__init__(name="Write", short_name=None)
+
+    def _validate(self):
+        """Check that the file is set."""
+
+        if not self.file:
+            raise ValueError("Write: file is not set!")
@@ -0,0 +1,345 @@
+""" This file contains the definition of the Pipeline class – gpt graphs and Python steps run one after another.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Some steps have no SNAP operator (custom masks, inference with a model), so the processing is split into
+ gpt runs with Python in between. The products are passed between the steps as BEAM-DIMAP: the Python steps work
+ on the memory-mapped band files, in place, without converting them to another format and back.
+
+ Every stage has its own thread, and the products move from stage to stage through short queues, so that while
+ Python works on one product, gpt is already running the graph for the next one.
+
+"""
+
+import time
+import queue
+import shutil
+import pathlib
+import tempfile
+import threading
+
+from snapista import dimap
+from snapista.graph import Graph
+from snapista.gpt import GPT, Result, _EXTENSIONS
+
+
+class Product:
+    """A BEAM-DIMAP product given to the Python stages of a pipeline.
+
+    Attributes:
+        path (pathlib.Path): The .dim file.
+        input (pathlib.Path): The input of the pipeline the product was made from.
+
+    Examples:
+        ```python
+        def mask_clouds(product):
+            clouds = product['cloud_probability'] > 50
+            for band in ('chl', 'tsm'):
+                product[band][clouds] = numpy.nan  # written to the band file directly
+
+            ndwi = product.add_band('ndwi', like='B3')
+            ndwi[:] = (product['B3'] - product['B8']) / (product['B3'] + product['B8'])
+        ```
+
+    """
+
+    def __init__(self, path, input_):
+        self.path = pathlib.Path(path)
+        self.input = input_
+
+    def __repr__(self):
+        return f"Product({self.path.name})"
+
+    def __getitem__(self, band):
+        """Memory-map a band. Changes to it are written to the band file."""
+
+        return dimap.read_band(self.path, band, mode="r+")
+
+    @property
+    def bands(self):
+        """The names of the bands."""
+
+        return dimap.get_band_names(self.path)
+
+    def add_band(self, band, dtype="float32", **kwargs):
+        """Add a band and memory-map it to fill it in. See snapista.dimap.add_band for the arguments."""
+
+        return dimap.add_band(self.path, band, dtype=dtype, **kwargs)
+
+
+class Pipeline:
+    """Graphs and Python callables run one after another for every input, pipelined across the inputs.
+
+    A Python stage is called with a snapista.pipeline.Product and changes it in place (or adds bands).
+
+    Examples:
+        ```python
+        pipeline = snapista.pipeline.Pipeline(resample_graph, mask_clouds, reproject_graph)
+        results = pipeline.run(gpt, products, output_folder='Data/proc', date_only=True)
+        ```
+
+    """
+
+    def __init__(self, *stages, depth=1):
+        """Create a pipeline.
+
+        Args:
+            *stages (Graph or callable): The stages, in order.
+            depth (int): The number of products waiting between two stages. Every waiting product takes space
+                in the scratch folder.
+
+        """
+
+        if len(stages) == 0:
+            raise ValueError("A pipeline needs at least one stage!")
+
+        for stage in stages:
+            if not isinstance(stage, Graph) and not callable(stage):
+                raise ValueError(f"{stage!r} is neither a Graph nor a callable!")
+
+        self.stages = list(stages)
+        self.depth = depth
+
+    def __repr__(self):
+        return f"Pipeline({' -> '.join(map(_get_name, self.stages))})"
+
+    @property
+    def suffix(self):
+        """The suffix of the outputs, the suffixes of the graphs together."""
+
+        return "".join(
+            stage.suffix for stage in self.stages if isinstance(stage, Graph)
+        )
+
+    def run(
+        self,
+        gpt,
+        input_,
+        output_folder="proc",
+        format_="BEAM-DIMAP",
+        date_only=False,
+        date_time_only=False,
+        prefix=None,
+        suffix=None,
+        output_file_name=None,
+        scratch=None,
+        suppress_stderr=True,
+    ):
+        """Run the pipeline for the inputs.
+
+        Args:
+            gpt (GPT): A snapista GPT object.
+            input_ (str, os.PathLike, or list): Input or list of inputs. A pipeline that starts with a Python
+                stage needs BEAM-DIMAP inputs (they are copied, the stage changes the copy).
+            output_folder (str): Folder to save the outputs to.
+            format_ (str): The format of the outputs. A pipeline that ends with a Python stage writes BEAM-DIMAP.
+            date_only (bool): Drop everything except the date (and suffix) from the output name.
+            date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+            prefix (str): Prefix to use for output.
+            suffix (str): Suffix to use for output. By default, the suffixes of the graphs.
+            output_file_name (str): If given, the automatically generated name will be replaced by this.
+            scratch (str): Folder for the products between the stages. By default, the temporary folder.
+            suppress_stderr (bool): Capture stderr, so that the error is included in the result.
+
+        Returns:
+            list: A snapista.Result per input, in the order they finish. The wall time and the peak memory
+                are the ones of gpt, over all the graph stages.
+
+        """
+
+        if not isinstance(self.stages[-1], Graph) and format_ != "BEAM-DIMAP":
+            raise ValueError(
+                "A pipeline that ends with a Python stage can only write BEAM-DIMAP!"
+            )
+
+        inputs = input_ if isinstance(input_, list) else [input_]
+        naming = {
+            "output_folder": output_folder,
+            "date_only": date_only,
+            "date_time_only": date_time_only,
+            "prefix": prefix,
+            "suffix": self.suffix if suffix is None else suffix,
+            "output_file_name": output_file_name,
+        }
+
+        # one queue in front of every stage, and one for the finished jobs
+        queues = [queue.Queue(maxsize=self.depth) for _ in self.stages]
+        done = queue.Queue()
+
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(
+                    gpt,
+                    i,
+                    queues[i],
+                    queues[i + 1] if i + 1 < len(queues) else done,
+                    format_,
+                    suppress_stderr,
+                ),
+                daemon=True,
+            )
+            for i in range(len(self.stages))
+        ]
+        for thread in threads:
+            thread.start()
+
+        def feed():
+            for product in inputs:
+                queues[0].put(
+                    self._start_job(
+                        gpt, pathlib.Path(product), format_, naming, scratch
+                    )
+                )
+            queues[0].put(None)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        results = []
+        while True:
+            job = done.get()
+            if job is None:
+                break
+            result = self._finish_job(job)
+            GPT._report(result)
+            results.append(result)
+
+        return results
+
+    def _start_job(self, gpt, input_, format_, naming, scratch):
+        """Prepare the job of an input: the output file, and a scratch folder for the products between the stages."""
+
+        job = {
+            "input": input_,
+            "product": input_,
+            "format": format_,
+            "output": None,
+            "error": None,
+            "status": None,
+            "started": time.time(),
+            "wall_time": 0.0,
+            "peak_memory": None,
+            "folder": None,
+        }
+
+        try:
+            job["output"] = gpt._get_output_file(graph=self, input_=input_, **naming)
+            if not isinstance(self.stages[0], Graph) and input_.suffix != ".dim":
+                raise ValueError(
+                    f"{input_.name} is not BEAM-DIMAP, a Python stage can't read it!"
+                )
+            job["folder"] = pathlib.Path(
+                tempfile.mkdtemp(prefix="snapista-", dir=scratch)
+            )
+        except (OSError, ValueError) as error:
+            job["status"], job["error"] = "error", str(error)
+
+        return job
+
+    def _work(self, gpt, i, source, target, format_, suppress_stderr):
+        """Run a stage for the jobs as they come, and pass them on to the next stage."""
+
+        stage = self.stages[i]
+        last = i == len(self.stages) - 1
+
+        while True:
+            job = source.get()
+            if job is None:
+                target.put(None)
+                return
+
+            if job["status"] is None:
+                try:
+                    if isinstance(stage, Graph):
+                        self._run_graph(
+                            gpt, stage, i, job, format_, suppress_stderr, last
+                        )
+                    else:
+                        self._run_callable(gpt, stage, i, job, last)
+                except Exception as error:
+                    # a Python stage can raise anything, the job fails and the others go on
+                    job["status"] = "failed"
+                    job["error"] = f"{_get_name(stage)}: {error}"
+
+            target.put(job)
+
+    def _run_graph(self, gpt, graph, i, job, format_, suppress_stderr, last):
+        output_file = job["output"] if last else job["folder"] / f"stage{i}"
+
+        process = gpt._process(
+            graph=graph,
+            input_=job["product"],
+            output_file=output_file,
+            format_=format_ if last else "BEAM-DIMAP",
+            suppress_stderr=suppress_stderr,
+            suppress_stdout=True,
+        )
+
+        job["wall_time"] += process.wall_time
+        job["peak_memory"] = max(job["peak_memory"] or 0, process.peak_memory)
+
+        if process.returncode != 0:
+            job["status"], job["error"] = "failed", gpt._get_error(process)
+            return
+
+        self._remove_previous(job)
+        job["product"] = (
+            None if last else output_file.with_name(output_file.name + ".dim")
+        )
+
+    def _run_callable(self, gpt, function, i, job, last):
+        product = job["product"]
+
+        # the input of the pipeline is never changed
+        if product == job["input"]:
+            product = dimap.copy_product(product, job["folder"] / f"input{i}.dim")
+
+        with gpt._span(_get_name(function), job["input"]):
+            function(Product(product, job["input"]))
+
+        if last:
+            dimap.move_product(
+                product, job["output"].with_name(job["output"].name + ".dim")
+            )
+            product = None
+
+        job["product"] = product
+
+    @staticmethod
+    def _remove_previous(job):
+        """Remove the product of the previous stage, if it was made by the pipeline."""
+
+        product = job["product"]
+        if product is not None and product != job["input"]:
+            product.unlink(missing_ok=True)
+            shutil.rmtree(dimap.get_data_folder(product), ignore_errors=True)
+
+    def _finish_job(self, job):
+        if job["folder"] is not None:
+            shutil.rmtree(job["folder"], ignore_errors=True)
+
+        output = job["output"]
+        if output is not None and isinstance(self.stages[-1], Graph):
+            output = output.parent / (output.name + _EXTENSIONS.get(job["format"], ""))
+        elif output is not None:
+            output = output.with_name(output.name + ".dim")
+
+        return Result(
+            input=job["input"],
+            output=output,
+            status=job["status"] or "done",
+            error=job["error"],
+            started=job["started"],
+            finished=time.time(),
+            wall_time=job["wall_time"],
+            peak_memory=job["peak_memory"],
+        )
+
+
+def _get_name(stage):
+    if isinstance(stage, Graph):
+        return f"graph{stage.suffix}"
+
+    return getattr(stage, "__name__", repr(stage))
@@ -0,0 +1,316 @@
+""" This file contains the definition of the Placement class – CPU, NUMA, and memory placement of gpt runs.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ When several JVMs run at once, they migrate between sockets and compete for the same cores, and one runaway
+ job can take the whole machine down. With a Placement set on GPT, every concurrent gpt run gets its own slot:
+ a disjoint set of CPUs within one NUMA node (with the memory bound to that node when numactl is installed),
+ and a memory limit – a cgroup (v2) when snapista is allowed to create one, a resource limit otherwise.
+
+"""
+
+import os
+import re
+import queue
+import atexit
+import shutil
+import pathlib
+import resource
+
+_SYSTEM_NODES = pathlib.Path("/sys/devices/system/node")
+_CGROUPS = pathlib.Path("/sys/fs/cgroup")
+
+
+class Placement:
+    """Slots for concurrent gpt runs, each with its own CPUs, NUMA node, and memory limit.
+
+    Examples:
+        ```python
+        gpt = snapista.GPT(gpt_path)
+        gpt.placement = snapista.Placement(workers=4, memory_limit='16G')
+        gpt.placement.report()
+
+        gpt.run(graph, products, workers=4)
+        ```
+
+        The cgroups are removed by close(), at the latest when the interpreter exits. As a context manager:
+
+        ```python
+        with snapista.Placement(workers=4, memory_limit='16G') as placement:
+            gpt.placement = placement
+            gpt.run(graph, products, workers=4)
+        ```
+
+    """
+
+    def __init__(self, workers, memory_limit=None, numa=True):
+        """Split the CPUs of this machine (the ones snapista may use) into slots.
+
+        Args:
+            workers (int): The number of slots, i.e. gpt runs executed at once. A run waits for a free slot.
+            memory_limit (int or str): The memory limit of every run, in bytes or with a K, M, or G suffix.
+            numa (bool): Keep every slot within a NUMA node. Otherwise, the CPUs are split in order.
+
+        """
+
+        self.memory_limit = None if memory_limit is None else _parse_size(memory_limit)
+        self.numactl = shutil.which("numactl")
+        self.taskset = shutil.which("taskset")
+
+        nodes = _get_nodes() if numa else {}
+        if len(nodes) == 0:
+            nodes = {None: sorted(os.sched_getaffinity(0))}
+
+        self.slots = [
+            {"index": i, "node": node, "cpus": cpus, "cgroup": None}
+            for i, (node, cpus) in enumerate(_split(nodes, workers))
+        ]
+
+        self.memory_method = None
+        if self.memory_limit is not None:
+            for slot in self.slots:
+                slot["cgroup"] = _create_cgroup(slot["index"], self.memory_limit)
+            if all(slot["cgroup"] is not None for slot in self.slots):
+                self.memory_method = "cgroup"
+                # the cgroups outlive the process otherwise
+                atexit.register(self.close)
+            else:
+                self.close()
+                self.memory_method = "rlimit"
+
+        self._free = queue.Queue()
+        for slot in self.slots:
+            self._free.put(slot)
+
+    def __repr__(self):
+        return f"Placement({len(self.slots)} slots)"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def report(self):
+        """Print what is applied to the gpt runs of every slot."""
+
+        for slot in self.slots:
+            print(f"slot {slot['index']}: {self.describe(slot)}")
+
+    def describe(self, slot):
+        """Describe what is applied to the gpt runs of a slot.
+
+        Returns:
+            str: For example, 'cpus 0-7 on node 0 (numactl), memory 16.0 GiB (cgroup)'.
+
+        """
+
+        tool = "numactl" if self.numactl else "taskset" if self.taskset else "affinity"
+        text = f"cpus {_format_cpus(slot['cpus'])}"
+        if slot["node"] is not None:
+            text += f" on node {slot['node']}"
+        text += f" ({tool})"
+
+        if self.memory_limit is not None:
+            text += (
+                f", memory {self.memory_limit / 2**30:.1f} GiB ({self.memory_method})"
+            )
+
+        return text
+
+    def acquire(self):
+        """Wait for a free slot."""
+
+        return self._free.get()
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def wrap(self, command, slot):
+        """Prefix the gpt command with numactl or taskset to run it on the CPUs (and memory) of the slot."""
+
+        cpus = _format_cpus(slot["cpus"])
+
+        if self.numactl:
+            prefix = [self.numactl, f"--physcpubind={cpus}"]
+            if slot["node"] is not None:
+                prefix.append(f"--membind={slot['node']}")
+            return prefix + command
+
+        if self.taskset:
+            return [self.taskset, "-c", cpus] + command
+
+        return command
+
+    def get_preexec(self, slot):
+        """Get the function that applies the memory limit of the slot in gpt, after the fork and before the exec.
+
+        This way the limit applies from the first allocation of the JVM, and to everything it starts.
+
+        Returns:
+            callable: The preexec_fn for subprocess.Popen, None when there is no memory limit.
+
+        """
+
+        if self.memory_method == "cgroup":
+            procs = str(slot["cgroup"] / "cgroup.procs")
+
+            def preexec():
+                # only os calls, no locks, in the child of a process with threads
+                fd = os.open(procs, os.O_WRONLY)
+                try:
+                    os.write(fd, b"0")  # 0 is the process that writes
+                finally:
+                    os.close(fd)
+
+            return preexec
+
+        if self.memory_method == "rlimit":
+            limit = self.memory_limit
+
+            def preexec():
+                # the data segment rather than the address space, the JVM reserves much more than it uses
+                resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+            return preexec
+
+        return None
+
+    def attach(self, pid, slot):
+        """Set the affinity of a running gpt, when there is neither numactl nor taskset."""
+
+        if not self.numactl and not self.taskset:
+            try:
+                os.sched_setaffinity(pid, slot["cpus"])
+            except OSError:
+                pass
+
+    def close(self):
+        """Remove the cgroups of the slots."""
+
+        atexit.unregister(self.close)
+
+        for slot in self.slots:
+            if slot["cgroup"] is not None:
+                try:
+                    slot["cgroup"].rmdir()
+                except OSError:
+                    pass
+                slot["cgroup"] = None
+
+
+def _parse_size(size):
+    """Parse a size like 16G (or a number of bytes) into bytes."""
+
+    if isinstance(size, int):
+        return size
+
+    match = re.fullmatch(
+        r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(size), re.IGNORECASE
+    )
+    if match is None:
+        raise ValueError(f"{size} is not a size!")
+
+    power = " KMGT".index(match.group(2).upper() or " ")
+    return int(float(match.group(1)) * 1024**power)
+
+
+def _parse_cpus(text):
+    """Parse a Linux CPU list like 0-3,8-11."""
+
+    cpus = []
+    for part in text.strip().split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part:
+            cpus.append(int(part))
+
+    return cpus
+
+
+def _format_cpus(cpus):
+    """Format CPUs as a Linux CPU list (ranges are joined)."""
+
+    ranges = []
+    for cpu in sorted(cpus):
+        if len(ranges) > 0 and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+
+    return ",".join(
+        str(first) if first == last else f"{first}-{last}" for first, last in ranges
+    )
+
+
+def _get_nodes():
+    """Get the CPUs snapista may use on every NUMA node. Empty if the machine has a single node."""
+
+    allowed = os.sched_getaffinity(0)
+    nodes = {}
+
+    for folder in sorted(_SYSTEM_NODES.glob("node[0-9]*")):
+        try:
+            cpus = _parse_cpus((folder / "cpulist").read_text())
+        except OSError:
+            continue
+        cpus = [cpu for cpu in cpus if cpu in allowed]
+        if len(cpus) > 0:
+            nodes[int(folder.name[4:])] = cpus
+
+    return nodes if len(nodes) > 1 else {}
+
+
+def _split(nodes, workers):
+    """Split the CPUs of the nodes into disjoint slots, spreading the slots over the nodes.
+
+    Returns:
+        list: (node, cpus) for every slot.
+
+    """
+
+    names = list(nodes)
+    counts = {name: 0 for name in names}
+    for i in range(workers):
+        counts[names[i % len(names)]] += 1
+
+    slots = []
+    for name in names:
+        cpus, count = nodes[name], counts[name]
+        if count == 0:
+            continue
+
+        # disjoint when possible, when there are more slots than CPUs they have to share
+        size = max(len(cpus) // count, 1)
+        for i in range(count):
+            start = (i * size) % len(cpus)
+            end = len(cpus) if i == count - 1 and count <= len(cpus) else start + size
+            slots.append((name, cpus[start:end]))
+
+    return slots
+
+
+def _create_cgroup(index, memory_limit):
+    """Create a cgroup (v2) with the memory limit below the one of this process, None if that's not allowed."""
+
+    try:
+        text = pathlib.Path("/proc/self/cgroup").read_text()
+        match = re.search(r"^0::(.*)$", text, flags=re.MULTILINE)
+        if match is None:
+            return None
+
+        cgroup = (
+            _CGROUPS / match.group(1).lstrip("/") / f"snapista-{os.getpid()}-{index}"
+        )
+        cgroup.mkdir(exist_ok=True)
+        try:
+            (cgroup / "memory.max").write_text(str(memory_limit))
+        except OSError:
+            cgroup.rmdir()
+            return None
+    except OSError:
+        return None
+
+    return cgroup
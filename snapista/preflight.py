@@ -0,0 +1,259 @@
+""" This file contains the checks run on a batch before any gpt is started.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ A lot of failed runs take a JVM startup, and sometimes minutes of processing, before gpt rejects them:
+ a parameter out of its range, a missing auxiliary file, a band the product doesn't have, or an input without
+ a date in its name. All of these can be found in milliseconds by looking at the graph and the product metadata.
+
+"""
+
+import re
+import pathlib
+import collections
+
+from snapista import dimap
+from snapista.footprint import read_metadata
+
+Problem = collections.namedtuple("Problem", ["input", "message"])
+Problem.__doc__ = """A problem found by the preflight checks. The input is None for problems of the graph."""
+
+# bands that the SNAP Sentinel-2 reader adds to the ones listed in the metadata
+_S2_BANDS = {
+    "AOT",
+    "WVP",
+    "SCL",
+    "TCI",
+    "sun_zenith",
+    "sun_azimuth",
+    "view_zenith_mean",
+    "view_azimuth_mean",
+}
+
+# operators (gpt names) that keep the bands of their source
+_KEEP_BANDS = {"Resample", "Reproject", "Import-Vector"}
+
+# operators (gpt names) that keep only the sourceBands of their source, all of them if not set
+_SELECT_BANDS = {"Subset", "BandSelect", "Land-Sea-Mask"}
+
+# parameters (xml names) that name bands of the source
+_BAND_PARAMETERS = ("sourceBands", "sourceBandNames", "referenceBand")
+
+
+def check(
+    gpt,
+    graph,
+    inputs,
+    output_folder="proc",
+    date_only=False,
+    date_time_only=False,
+    prefix=None,
+    suffix=None,
+    output_file_name=None,
+):
+    """Check a batch: the graph, the parameters, the auxiliary files, the bands, and the output names.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        graph (Graph): The graph to run.
+        inputs (list): The inputs.
+        output_folder (str): Folder to save the outputs to.
+        date_only (bool): Drop everything except the date (and suffix) from the output name.
+        date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+        prefix (str): Prefix to use for output.
+        suffix (str): Suffix to use for output.
+        output_file_name (str): If given, the automatically generated name will be replaced by this.
+
+    Returns:
+        list: All the problems found (snapista.preflight.Problem), empty if the batch looks fine.
+
+    """
+
+    problems = [Problem(None, message) for message in check_graph(graph)]
+
+    outputs = collections.defaultdict(list)
+    for input_ in inputs:
+        input_ = pathlib.Path(input_)
+
+        if not input_.exists():
+            problems.append(Problem(input_, f"{input_} does not exist!"))
+            continue
+
+        try:
+            output_file = gpt._get_output_file(
+                graph=graph,
+                input_=input_,
+                output_folder=output_folder,
+                date_only=date_only,
+                date_time_only=date_time_only,
+                prefix=prefix,
+                suffix=suffix,
+                output_file_name=output_file_name,
+            )
+            outputs[output_file].append(input_)
+        except ValueError as error:
+            problems.append(Problem(input_, str(error)))
+
+        bands = get_band_names(input_)
+        if bands is not None:
+            problems.extend(
+                Problem(input_, message) for message in check_bands(graph, bands)
+            )
+
+    for output_file, sources in outputs.items():
+        if len(sources) > 1:
+            names = ", ".join(source.name for source in sources)
+            problems.append(
+                Problem(
+                    sources[0], f"{names} would all be written to {output_file.name}!"
+                )
+            )
+
+    return problems
+
+
+def check_graph(graph):
+    """Check the graph and the parameters of its operators.
+
+    Returns:
+        list: The problems found.
+
+    """
+
+    messages = []
+
+    try:
+        graph.validate()
+    except ValueError as error:
+        messages.append(str(error))
+
+    for node_id, operator in zip(graph._node_ids, graph._operators):
+        missing_files = False
+        for parameter in operator._parameters:
+            value = getattr(operator, parameter.slot)
+
+            problem = parameter.check(value)
+            if problem is not None:
+                messages.append(f"{node_id}: {problem}")
+
+            if parameter.file and value:
+                for file in value if isinstance(value, list) else [value]:
+                    if not pathlib.Path(file).exists():
+                        missing_files = True
+                        messages.append(
+                            f"{node_id}: {parameter.name} {file} does not exist!"
+                        )
+
+        try:
+            operator._validate()
+        except ValueError as error:
+            # a missing file is reported above already
+            if not missing_files:
+                messages.append(f"{node_id}: {error}")
+
+    return messages
+
+
+def check_bands(graph, bands):
+    """Check that the bands named in the parameters are in the products they are applied to.
+
+    The bands are followed from the input through the operators whose output bands are known
+    (e.g. Resample keeps the bands, Subset keeps the selected ones). The other nodes are not checked.
+
+    Args:
+        graph (Graph): The graph.
+        bands (list): The band names of the input.
+
+    Returns:
+        list: The problems found.
+
+    """
+
+    messages = []
+    known = {}  # node ID -> band names of its output, None if not known
+
+    for node_id, operator, sources in zip(
+        graph._node_ids, graph._operators, graph._sources
+    ):
+        known[node_id] = None
+        if len(sources) != 1:
+            continue
+
+        refid = sources[0][1]
+        source_bands = set(bands) if refid == graph.INPUT else known.get(refid)
+        if source_bands is None:
+            continue
+
+        selected = []
+        for parameter in operator._parameters:
+            if parameter.xml_name not in _BAND_PARAMETERS:
+                continue
+
+            value = getattr(operator, parameter.slot)
+            names = value if isinstance(value, list) else [value] if value else []
+            missing = [name for name in names if not _has_band(source_bands, name)]
+            if len(missing) > 0:
+                messages.append(
+                    f"{node_id}: {parameter.name} {', '.join(missing)} not in the product!"
+                )
+
+            if parameter.xml_name == "sourceBands":
+                selected = names
+
+        if operator._name in _KEEP_BANDS:
+            known[node_id] = source_bands
+        elif operator._name in _SELECT_BANDS:
+            known[node_id] = set(selected) if len(selected) > 0 else source_bands
+        elif operator._name == "AddElevation":
+            known[node_id] = source_bands | {operator.elevation_band_name}
+
+    return messages
+
+
+def get_band_names(product):
+    """Get the band names of a product from its metadata, without opening it in SNAP.
+
+    Args:
+        product (str or os.PathLike): A BEAM-DIMAP product, or a Sentinel-2 product (.zip, .SAFE, or MTD file).
+
+    Returns:
+        list: The band names, None if they can't be known from the metadata (e.g. for Sentinel-3).
+
+    """
+
+    product = pathlib.Path(product)
+
+    if product.suffix == ".dim":
+        return dimap.get_band_names(product)
+
+    document = read_metadata(product)
+    if document is None:
+        return None
+
+    bands = [
+        element.get("physicalBand")
+        for element in document.iterfind(".//Spectral_Information")
+    ]
+    if len(bands) == 0:
+        return None
+
+    return bands + sorted(_S2_BANDS)
+
+
+def report(problems):
+    """Print the problems, grouped by input."""
+
+    grouped = collections.defaultdict(list)
+    for problem in problems:
+        grouped[problem.input].append(problem.message)
+
+    for input_, messages in grouped.items():
+        print(f"\033[31m✗\033[0m {'graph' if input_ is None else input_.name}")
+        for message in messages:
+            print(f"    {message}")
+
+
+def _has_band(bands, name):
+    # per-band angles and quality flags of the Sentinel-2 reader are not listed in the metadata
+    return name in bands or re.match(r"(view|sun)_|quality_", name) is not None
@@ -0,0 +1,280 @@
+""" This file contains functions to make PNG quicklooks of processed products.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The bands of BEAM-DIMAP outputs are memory-mapped and read with a stride, every n-th pixel of every n-th line.
+ The lines in between are not read at all (the ones that are used are read whole), so a 1024 pixel quicklook of
+ a 10980 × 10980 band reads about a tenth of it. The PNG is written directly (zlib), so neither matplotlib
+ nor Pillow is needed.
+
+ One band is shown with a colormap, three bands as RGB. No-data pixels are transparent.
+
+"""
+
+import math
+import zlib
+import struct
+import pathlib
+import concurrent.futures
+
+import numpy
+
+from snapista import dimap
+
+# colormaps as evenly spaced anchor colors, interpolated to 256 colors
+_COLORMAPS = {
+    "gray": [(0, 0, 0), (255, 255, 255)],
+    "viridis": [
+        (68, 1, 84),
+        (72, 40, 120),
+        (62, 74, 137),
+        (49, 104, 142),
+        (38, 130, 142),
+        (31, 158, 137),
+        (53, 183, 121),
+        (109, 205, 89),
+        (180, 222, 44),
+        (253, 231, 37),
+    ],
+    "turbo": [
+        (48, 18, 59),
+        (70, 107, 227),
+        (40, 187, 236),
+        (50, 242, 152),
+        (164, 252, 60),
+        (237, 208, 58),
+        (251, 128, 34),
+        (210, 49, 5),
+        (122, 4, 3),
+    ],
+}
+
+
+def make_quicklook(
+    product,
+    bands,
+    output=None,
+    size=1024,
+    percentiles=(2, 98),
+    value_range=None,
+    colormap="viridis",
+    overwrite=False,
+):
+    """Make a PNG quicklook of a BEAM-DIMAP product.
+
+    Args:
+        product (str or os.PathLike): Path to the .dim file.
+        bands (str or list): One band, shown with the colormap, or three bands, shown as red, green, and blue.
+        output (str or os.PathLike): Path to the PNG. By default, next to the product with the same name.
+        size (int): The longest side of the quicklook, at most. The band is read with the stride that gets
+            closest to it.
+        percentiles (tuple): The percentiles of the valid pixels mapped to the darkest and the brightest color
+            (per band for RGB).
+        value_range (tuple): Fixed (low, high) values mapped to the darkest and the brightest color instead,
+            in the physical units of the band (after its scaling factor and offset), e.g. (0, 30) for chlorophyll
+            in mg/m³, or (0, 0.3) for scaled S2 reflectance.
+        colormap (str or list): A colormap name (gray, viridis, or turbo), or a list of (r, g, b) anchor colors.
+        overwrite (bool): Make the quicklook even if there is one newer than the product.
+
+    Returns:
+        pathlib.Path: The PNG.
+
+    Examples:
+        ```python
+        snapista.quicklook.make_quicklook('Data/proc/20200101_c2rcc.dim', 'conc_chl', value_range=(0, 30))
+        snapista.quicklook.make_quicklook('Data/proc/20200101_resampled.dim', ['B4', 'B3', 'B2'])
+        ```
+
+    """
+
+    product = pathlib.Path(product)
+    bands = [bands] if isinstance(bands, str) else list(bands)
+    output = product.with_suffix(".png") if output is None else pathlib.Path(output)
+
+    if len(bands) not in (1, 3):
+        raise ValueError(f"A quicklook needs one or three bands, got {len(bands)}!")
+
+    # the quicklook is only made again when the product changed
+    if (
+        not overwrite
+        and output.exists()
+        and output.stat().st_mtime >= product.stat().st_mtime
+    ):
+        return output
+
+    planes, valid = [], None
+    for band in bands:
+        values = read_decimated(product, band, size)
+        # the no-data value is a raw value
+        mask = _get_valid(values, dimap.get_no_data_value(product, band))
+        valid = mask if valid is None else valid & mask
+
+        factor, offset = dimap.get_scaling(product, band)
+        if (factor, offset) != (1.0, 0.0):
+            values = values.astype("f4") * factor + offset
+        planes.append(values)
+
+    planes = [_scale(values, valid, percentiles, value_range) for values in planes]
+
+    if len(planes) == 1:
+        image = _get_colors(colormap)[planes[0]]
+    else:
+        image = numpy.stack(planes, axis=-1)
+
+    alpha = numpy.where(valid, 255, 0).astype("u1")
+    write_png(output, numpy.dstack([image, alpha]))
+
+    return output
+
+
+def make_quicklooks(products, bands, output_folder=None, workers=4, **kwargs):
+    """Make PNG quicklooks of a batch of BEAM-DIMAP products, in parallel.
+
+    Args:
+        products (iterable): The .dim files, or the results of GPT.run_iter / GPT.run (only the done ones are used).
+        bands (str or list): As in make_quicklook.
+        output_folder (str or os.PathLike): Folder to save the quicklooks to. By default, next to the products.
+        workers (int): Number of threads making quicklooks (numpy and zlib release the GIL).
+        **kwargs: The other arguments of make_quicklook.
+
+    Returns:
+        list: The PNGs, in the order of the products (None for a product whose quicklook failed).
+
+    """
+
+    dims = []
+    for product in products:
+        if hasattr(product, "status"):
+            if product.status != "done":
+                continue
+            product = product.output
+        dims.append(pathlib.Path(product))
+
+    if output_folder is not None:
+        pathlib.Path(output_folder).mkdir(parents=True, exist_ok=True)
+
+    def make(dim):
+        output = (
+            None
+            if output_folder is None
+            else pathlib.Path(output_folder) / f"{dim.stem}.png"
+        )
+        try:
+            return make_quicklook(dim, bands, output=output, **kwargs)
+        except (OSError, ValueError, KeyError) as error:
+            print(f"\033[31m✗\033[0m {dim.name}: {error}")
+            return None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(make, dims))
+
+
+def read_decimated(dim, band, size):
+    """Read every n-th pixel of every n-th line of a band, so that its longest side is close to size.
+
+    Only the pages of the band file with the lines that are used are read from the disk.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        band (str): Name of the band.
+        size (int): The longest side of the result, at most.
+
+    Returns:
+        numpy.ndarray: The decimated band, in the native byte order.
+
+    """
+
+    values = dimap.read_band(dim, band)
+    step = max(math.ceil(max(values.shape) / size), 1)
+
+    return numpy.array(values[::step, ::step], dtype=values.dtype.newbyteorder("="))
+
+
+def write_png(file, image):
+    """Write an 8-bit image as a PNG.
+
+    Args:
+        file (str or os.PathLike): Path to the PNG.
+        image (numpy.ndarray): A (lines, samples) gray image, or a (lines, samples, channels) image with
+            2 (gray and alpha), 3 (RGB), or 4 (RGBA) channels, of uint8.
+
+    """
+
+    image = numpy.asarray(image, dtype="u1")
+    if image.ndim == 2:
+        image = image[:, :, numpy.newaxis]
+
+    height, width, channels = image.shape
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+
+    # every line starts with its filter type, 0 (none)
+    lines = numpy.zeros((height, width * channels + 1), dtype="u1")
+    lines[:, 1:] = image.reshape(height, width * channels)
+
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    pathlib.Path(file).write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(lines.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _get_valid(values, no_data):
+    valid = numpy.ones(values.shape, dtype=bool)
+    if values.dtype.kind == "f":
+        valid &= numpy.isfinite(values)
+    if no_data is not None:
+        valid &= values != no_data
+
+    return valid
+
+
+def _scale(values, valid, percentiles, value_range):
+    """Scale the values to 0–255, from the fixed range or from the percentiles of the valid values."""
+
+    if value_range is not None:
+        low, high = value_range
+    elif valid.any():
+        low, high = numpy.percentile(values[valid], percentiles)
+    else:
+        return numpy.zeros(values.shape, dtype="u1")
+
+    scaled = (values.astype("f4") - low) / max(high - low, 1e-12)
+    scaled = numpy.clip(numpy.nan_to_num(scaled), 0, 1)
+
+    return numpy.round(scaled * 255).astype("u1")
+
+
+def _get_colors(colormap):
+    """Get the 256 colors of a colormap, as a (256, 3) array of uint8."""
+
+    if isinstance(colormap, str):
+        if colormap not in _COLORMAPS:
+            raise ValueError(
+                f"There is no colormap {colormap}, use one of {', '.join(_COLORMAPS)} or a list of colors!"
+            )
+        colormap = _COLORMAPS[colormap]
+
+    anchors = numpy.asarray(colormap, dtype="f4")
+    positions = numpy.linspace(0, 255, len(anchors))
+
+    return (
+        numpy.stack(
+            [
+                numpy.interp(numpy.arange(256), positions, anchors[:, channel])
+                for channel in range(3)
+            ],
+            axis=-1,
+        )
+        .round()
+        .astype("u1")
+    )
@@ -0,0 +1,268 @@
+""" This file contains the definition of the Scheduler class – fair shares of a shared host between batches.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ When several people run batches on the same machine, the first big batch takes every worker until it is done.
+ With a Scheduler set on GPT, every gpt run first asks a SQLite queue shared by all the clients for one of a fixed
+ number of slots. A free slot goes to the waiting batch of the highest priority, and among those to the one with the
+ fewest running jobs for its weight (weighted fair share). Nothing is ever stopped: a small urgent batch gets the
+ slots as the jobs of a large backfill finish, and runs alongside it.
+
+ There is no service to start, the clients share the database file. A slot held by a process that is gone
+ (on this host) is freed by the next client that looks at the queue.
+
+"""
+
+import os
+import time
+import socket
+import getpass
+import sqlite3
+import pathlib
+import threading
+import contextlib
+
+_DEFAULT_FILE = pathlib.Path("/var/tmp/snapista-scheduler.sqlite")
+
+
+class Scheduler:
+    """A queue for the gpt runs of the batches of all the users of a host.
+
+    Examples:
+        ```python
+        gpt = snapista.GPT(gpt_path)
+
+        # a large backfill, with a low weight
+        gpt.scheduler = snapista.Scheduler(batch='backfill-2020', weight=1)
+        gpt.run(graph, products, workers=16)
+
+        # meanwhile, in another session: gets slots as soon as backfill jobs finish
+        gpt.scheduler = snapista.Scheduler(batch='urgent', priority=10)
+        gpt.run(graph, few_products, workers=4)
+        ```
+
+    """
+
+    def __init__(
+        self,
+        file=None,
+        batch=None,
+        weight=1.0,
+        priority=0,
+        slots=None,
+        interval=1.0,
+    ):
+        """Open (or create) the queue.
+
+        Args:
+            file (str): Path to the database, the same for all the clients. By default, $SNAPISTA_SCHEDULER,
+                or /var/tmp/snapista-scheduler.sqlite.
+            batch (str): The name the fair share is computed for. By default, the user name, so that every
+                user gets a share.
+            weight (float): The share of the batch, relative to the weights of the other waiting batches.
+            priority (int): Batches of a higher priority get the free slots first.
+            slots (int): The number of gpt runs at once on the host. By default, the number the queue was
+                created with (a quarter of the CPUs).
+            interval (float): Seconds between two looks at the queue while waiting for a slot.
+
+        """
+
+        if weight <= 0:
+            raise ValueError(f"The weight must be positive, got {weight}!")
+
+        if file is None:
+            file = os.environ.get("SNAPISTA_SCHEDULER", _DEFAULT_FILE)
+
+        self.file = pathlib.Path(file)
+        self.batch = getpass.getuser() if batch is None else batch
+        self.weight = float(weight)
+        self.priority = priority
+        self.interval = interval
+
+        self._host = socket.gethostname()
+        self._lock = threading.Lock()
+
+        created = not self.file.exists()
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS requests (
+                    id INTEGER PRIMARY KEY,
+                    batch TEXT,
+                    weight REAL,
+                    priority INTEGER,
+                    host TEXT,
+                    pid INTEGER,
+                    requested REAL,
+                    granted REAL
+                )
+                """)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value)"
+            )
+            if slots is not None:
+                connection.execute(
+                    "INSERT OR REPLACE INTO settings VALUES ('slots', ?)", (slots,)
+                )
+            else:
+                connection.execute(
+                    "INSERT OR IGNORE INTO settings VALUES ('slots', ?)",
+                    (max((os.cpu_count() or 1) // 4, 1),),
+                )
+
+        # every user of the host has to be able to queue
+        if created:
+            try:
+                self.file.chmod(0o666)
+            except OSError:
+                pass
+
+    def __repr__(self):
+        return f"Scheduler({self.batch}, weight {self.weight:g}, priority {self.priority}, {self.file.as_posix()})"
+
+    @property
+    def slots(self):
+        """The number of gpt runs at once on the host."""
+
+        with self._lock, self._connect() as connection:
+            return connection.execute(
+                "SELECT value FROM settings WHERE name = 'slots'"
+            ).fetchone()[0]
+
+    def acquire(self):
+        """Wait for a slot.
+
+        Returns:
+            int: The ticket of the slot, to release it.
+
+        """
+
+        with self._lock, self._connect() as connection:
+            ticket = connection.execute(
+                "INSERT INTO requests (batch, weight, priority, host, pid, requested) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.batch,
+                    self.weight,
+                    self.priority,
+                    self._host,
+                    os.getpid(),
+                    time.time(),
+                ),
+            ).lastrowid
+
+        try:
+            while not self._try_grant(ticket):
+                time.sleep(self.interval)
+        except BaseException:
+            # e.g. KeyboardInterrupt while waiting, the request must not stay in the queue
+            self.release(ticket)
+            raise
+
+        return ticket
+
+    def release(self, ticket):
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM requests WHERE id = ?", (ticket,))
+
+    def status(self):
+        """Get the running and the waiting jobs of every batch in the queue.
+
+        Returns:
+            list: (batch, priority, weight, running, waiting) per batch, the batches that get slots first first.
+
+        """
+
+        with self._lock, self._connect() as connection:
+            self._remove_dead(connection)
+            batches = connection.execute(
+                "SELECT batch, MAX(priority), MAX(weight), COUNT(granted), COUNT(*) - COUNT(granted) "
+                "FROM requests GROUP BY batch"
+            ).fetchall()
+
+        return sorted(batches, key=lambda batch: (-batch[1], batch[3] / batch[2]))
+
+    def report(self):
+        """Print the state of the queue."""
+
+        batches = self.status()
+        running = sum(batch[3] for batch in batches)
+
+        print(f"{running} of {self.slots} slots in use ({self.file.as_posix()})")
+        for batch, priority, weight, batch_running, waiting in batches:
+            print(
+                f"  {batch}: {batch_running} running, {waiting} waiting "
+                f"(priority {priority}, weight {weight:g})"
+            )
+
+    def _try_grant(self, ticket):
+        """Give the ticket a slot if there is a free one, and the ticket is the next to get it."""
+
+        with self._lock, self._connect() as connection:
+            # no other client may grant a slot between the check and the update
+            connection.execute("BEGIN IMMEDIATE")
+            self._remove_dead(connection)
+
+            slots = connection.execute(
+                "SELECT value FROM settings WHERE name = 'slots'"
+            ).fetchone()[0]
+            running = dict(
+                connection.execute(
+                    "SELECT batch, COUNT(*) FROM requests WHERE granted IS NOT NULL GROUP BY batch"
+                ).fetchall()
+            )
+            if sum(running.values()) >= slots:
+                return False
+
+            waiting = connection.execute(
+                "SELECT id, batch, weight, priority FROM requests WHERE granted IS NULL ORDER BY id"
+            ).fetchall()
+
+            # the highest priority, then the batch the furthest below its share, then first come first served
+            next_ticket = min(
+                waiting,
+                key=lambda request: (
+                    -request[3],
+                    running.get(request[1], 0) / request[2],
+                    request[0],
+                ),
+            )[0]
+            if next_ticket != ticket:
+                return False
+
+            connection.execute(
+                "UPDATE requests SET granted = ? WHERE id = ?", (time.time(), ticket)
+            )
+            return True
+
+    def _remove_dead(self, connection):
+        """Remove the requests of the processes of this host that are gone (e.g. killed)."""
+
+        for ticket, pid in connection.execute(
+            "SELECT id, pid FROM requests WHERE host = ?", (self._host,)
+        ).fetchall():
+            if not _is_alive(pid):
+                connection.execute("DELETE FROM requests WHERE id = ?", (ticket,))
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open a connection, commit when the block succeeds (roll back otherwise), and close it."""
+
+        connection = sqlite3.connect(self.file, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # a process of another user
+        return True
+
+    return True
@@ -0,0 +1,206 @@
+""" This file contains functions to load graphs from files – JSON specs, and xml graphs saved by Graph.save.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ A JSON spec lists the nodes with the parameters as the Python attributes of the operators, and optionally
+ the options of the run (output folder, format, naming). For example:
+
+    {
+        "nodes": [
+            {"operator": "Resample", "parameters": {"reference_band": "B2"}},
+            {"operator": "BandMaths", "target_bands": [{"name": "ndwi", "expression": "(B3 - B8) / (B3 + B8)"}]}
+        ],
+        "run": {"format": "GeoTIFF", "date_only": true, "output_folder": "proc"}
+    }
+
+ A node can also have an "id", and "sources" as in Graph.add_node.
+
+"""
+
+import json
+import pathlib
+
+# gpt names of the operators defined by hand that differ from their attribute names
+_OPERATORS = {
+    "c2rcc.msi": "C2RCC_MSI",
+    "Land-Sea-Mask": "LandSeaMask",
+    "Import-Vector": "ImportVector",
+}
+
+# the options of GPT.run a spec can set
+_RUN_OPTIONS = (
+    "output_folder",
+    "format",
+    "date_only",
+    "date_time_only",
+    "prefix",
+    "suffix",
+    "output_file_name",
+    "workers",
+)
+
+
+def load(file):
+    """Load a graph from a JSON spec or an xml graph.
+
+    Args:
+        file (str or os.PathLike): A .json spec, or a graph saved with Graph.save.
+
+    Returns:
+        tuple: The graph, and the options of the run set in the spec (empty for an xml graph).
+
+    Raises:
+        ValueError: If the file does not describe a valid graph.
+
+    """
+
+    file = pathlib.Path(file)
+
+    if file.suffix == ".json":
+        spec = json.loads(file.read_text())
+        return load_spec(spec), get_run_options(spec)
+
+    return load_xml(file), {}
+
+
+def load_spec(spec):
+    """Build a graph from a spec (see the module docstring).
+
+    Args:
+        spec (dict): The spec, as read from JSON.
+
+    Returns:
+        Graph: The graph.
+
+    """
+
+    from snapista import operators
+    from snapista.graph import Graph
+
+    graph = Graph()
+
+    for i, node in enumerate(spec.get("nodes", [])):
+        if "operator" not in node:
+            raise ValueError(f"Node {i} of the spec has no operator!")
+
+        try:
+            operator = getattr(operators, node["operator"])()
+        except AttributeError:
+            raise ValueError(f"There is no operator {node['operator']}!")
+
+        for name, value in node.get("parameters", {}).items():
+            try:
+                setattr(operator, name, value)
+            except AttributeError:
+                raise ValueError(f"{node['operator']} has no parameter {name}!")
+
+        for band in node.get("target_bands", []):
+            band = dict(band)
+            if "type" in band:
+                band["type_"] = band.pop("type")
+            operator.add_target_band(**band)
+
+        graph.add_node(operator, node_id=node.get("id"), sources=node.get("sources"))
+
+    graph.validate()
+
+    return graph
+
+
+def load_xml(file):
+    """Rebuild a graph from an xml graph, as saved by Graph.save.
+
+    The operators are matched by their gpt names, to the ones defined by hand or generated from the gpt
+    descriptions (see GPT.describe_operators). The graph has the same hash as the one that was saved.
+
+    Args:
+        file (str or os.PathLike): The xml graph.
+
+    Returns:
+        Graph: The graph.
+
+    """
+
+    import lxml.etree
+
+    from snapista import operators
+    from snapista.graph import Graph
+    from snapista.operators._registry import get_attribute_name
+
+    graph = Graph()
+
+    for node in lxml.etree.parse(str(file)).iterfind("node"):
+        node_id = node.get("id")
+        name = node.findtext("operator")
+
+        try:
+            operator = getattr(
+                operators, _OPERATORS.get(name, get_attribute_name(name))
+            )()
+        except AttributeError:
+            raise ValueError(
+                f"{node_id}: there is no operator {name} (see GPT.describe_operators)!"
+            )
+
+        parameters = {
+            parameter.xml_name: parameter for parameter in operator._parameters
+        }
+        for element in (
+            node.find("parameters") if node.find("parameters") is not None else []
+        ):
+            if element.tag == "targetBands":
+                for band in element.iterfind("targetBand"):
+                    operator.add_target_band(
+                        name=band.findtext("name"),
+                        expression=band.findtext("expression"),
+                        type_=band.findtext("type", "float32"),
+                        description=band.findtext("description"),
+                        unit=band.findtext("unit"),
+                        no_data_value=band.findtext("noDataValue", "NaN"),
+                    )
+            elif element.tag == "variables":
+                continue
+            elif element.tag in parameters:
+                parameter = parameters[element.tag]
+                value = element.text
+                if parameter.type_ is list and value is not None:
+                    value = value.split(",")
+                setattr(operator, parameter.name, value)
+            else:
+                raise ValueError(f"{node_id}: {name} has no parameter {element.tag}!")
+
+        sources = {}
+        for source in node.find("sources"):
+            if source.get("refid") is not None:
+                sources[source.tag] = source.get("refid")
+            elif (source.text or "").strip() == Graph.INPUT:
+                sources[source.tag] = Graph.INPUT
+            else:
+                # e.g. collocateWith, the path is given to gpt on the command line and is not in the graph
+                raise ValueError(
+                    f"{node_id}: the source {source.tag} is not in the graph, use a JSON spec!"
+                )
+
+        graph.add_node(operator, node_id=node_id, sources=sources)
+
+    graph.validate()
+
+    return graph
+
+
+def get_run_options(spec):
+    """Get the options of the run set in a spec.
+
+    Raises:
+        ValueError: If there is an unknown option.
+
+    """
+
+    options = dict(spec.get("run", {}))
+
+    unknown = [name for name in options if name not in _RUN_OPTIONS]
+    if len(unknown) > 0:
+        raise ValueError(f"Unknown run options in the spec: {', '.join(unknown)}!")
+
+    return options
@@ -0,0 +1,334 @@
+""" This file contains the drivers for stacking long time series of products with the Collocate operator.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ Collocating hundreds of products in a single gpt run takes a lot of memory and a huge command line.
+ Instead, the slaves are collocated with the master in fixed-size groups, the groups are processed in parallel,
+ and then the groups are merged into a single stack.
+
+"""
+
+import re
+import copy
+import pathlib
+import tempfile
+import concurrent.futures
+
+from snapista import dimap
+from snapista.graph import Graph
+from snapista.operators import BandSelect, Subset
+
+# the master bands of a group that only contributes slaves are renamed with it, so that they are never selected
+# as slave bands, even when a master band name happens to match the slave component pattern (e.g. 'x_1')
+_MASTER_MARKER = "__snapista_master"
+
+
+def pattern_to_regex(pattern, named=True):
+    """Convert a Collocate component pattern into a regular expression matching the component names.
+
+    Args:
+        pattern (str): A component pattern, e.g. '${ORIGINAL_NAME}_S${SLAVE_NUMBER_ID}'.
+        named (bool): Whether to use named groups ('name' and 'number'). Java (and gpt) does not understand
+            Python-style named groups, so pass False to get a regex for gpt.
+
+    Returns:
+        str: The regular expression.
+
+    """
+
+    name = r"(?P<name>.+?)" if named else r".+?"
+    number = r"(?P<number>\d+)" if named else r"\d+"
+
+    parts = []
+    for i, piece in enumerate(pattern.split("${ORIGINAL_NAME}")):
+        if i > 0:
+            parts.append(name)
+        parts.append(number.join(map(_escape, piece.split("${SLAVE_NUMBER_ID}"))))
+
+    return "".join(parts)
+
+
+def renumber_slave_bands(dim, slave_component_pattern, offset):
+    """Shift the ${SLAVE_NUMBER_ID} numbers in the names of the slave bands of a BEAM-DIMAP product.
+
+    Args:
+        dim (str or os.PathLike): Path to the .dim file.
+        slave_component_pattern (str): The pattern that was used to name the slave components.
+        offset (int): The number to add to every slave number.
+
+    """
+
+    if offset == 0 or "${SLAVE_NUMBER_ID}" not in slave_component_pattern:
+        return
+
+    regex = pattern_to_regex(slave_component_pattern)
+    mapping = {}
+
+    for band in dimap.get_band_names(dim):
+        match = re.fullmatch(regex, band)
+        if match is not None:
+            mapping[band] = slave_component_pattern.replace(
+                "${ORIGINAL_NAME}", match.group("name")
+            ).replace("${SLAVE_NUMBER_ID}", str(int(match.group("number")) + offset))
+
+    dimap.rename_bands(dim, mapping)
+
+
+def collocate_stack(
+    gpt,
+    collocate,
+    products,
+    output_folder="proc",
+    output_file_name="stack",
+    format_="BEAM-DIMAP",
+    group_size=50,
+    workers=2,
+    suppress_stderr=True,
+):
+    """Collocate a long list of products onto the same master in groups, then merge the groups into one stack.
+
+    Slave bands keep the numbering they would get in a single Collocate run: the slaves of the group g are
+    renumbered by the number of slaves in the groups before it.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        collocate (Collocate): A configured Collocate operator. Its source_product_paths are ignored.
+        products (list): All products to stack. The master is the product with the stem equal to
+            collocate.master_product_name, or the first one if master_product_name is not set.
+        output_folder (str): Folder to save the stack to.
+        output_file_name (str): Name of the stack.
+        format_ (str): The format of the stack, e.g. 'GeoTIFF', 'BEAM-DIMAP'.
+        group_size (int): Maximum number of slaves collocated in one gpt run.
+        workers (int): Number of gpt runs executed in parallel.
+        suppress_stderr (bool): Capture stderr without printing it.
+
+    Returns:
+        pathlib.Path: The stack (without the extension).
+
+    Examples:
+        ```python
+        collocate = snapista.operators.Collocate()
+        collocate.rename_master_components = False
+        collocate.slave_component_pattern = '${ORIGINAL_NAME}_${SLAVE_NUMBER_ID}'
+
+        snapista.stacking.collocate_stack(gpt, collocate, products, group_size=25, workers=4)
+        ```
+
+    """
+
+    if group_size <= 0:
+        raise ValueError(f"The group size must be positive, got {group_size}!")
+
+    products = [pathlib.Path(product) for product in products]
+    master = _get_master(products, collocate.master_product_name)
+    slaves = [product for product in products if product != master]
+    groups = [slaves[i : i + group_size] for i in range(0, len(slaves), group_size)]
+
+    output_folder = pathlib.Path(output_folder)
+    output_folder.mkdir(exist_ok=True)
+
+    if len(groups) <= 1:
+        # small enough for a single run
+        stack = _collocate_group(collocate, master, slaves, select_slaves=False)
+        _run(
+            gpt,
+            stack,
+            master,
+            output_folder / output_file_name,
+            format_,
+            suppress_stderr,
+        )
+        return output_folder / output_file_name
+
+    with tempfile.TemporaryDirectory(dir=output_folder) as temp_dir:
+        temp_dir = pathlib.Path(temp_dir)
+        outputs = [temp_dir / f"group{i}" for i in range(len(groups))]
+
+        print(f"⏳ {output_file_name}: {len(slaves)} slaves in {len(groups)} groups")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _run,
+                    gpt,
+                    # only the first group keeps the master bands, the rest would duplicate them
+                    _collocate_group(collocate, master, group, select_slaves=i > 0),
+                    master,
+                    output,
+                    "BEAM-DIMAP",
+                    True,
+                )
+                for i, (group, output) in enumerate(zip(groups, outputs))
+            ]
+            for future in futures:
+                future.result()
+
+        if collocate.rename_slave_components:
+            offset = 0
+            for group, output in zip(groups, outputs):
+                renumber_slave_bands(
+                    output.with_suffix(".dim"),
+                    collocate.slave_component_pattern,
+                    offset,
+                )
+                offset += len(group)
+
+        merge = copy.copy(collocate)
+        merge.master_product_name = dimap.get_product_name(
+            outputs[0].with_suffix(".dim")
+        )
+        merge.source_product_paths = [output.with_suffix(".dim") for output in outputs]
+        merge.rename_master_components = False
+        merge.rename_slave_components = False
+
+        graph = Graph()
+        graph.add_node(merge)
+
+        _run(
+            gpt,
+            graph,
+            outputs[0].with_suffix(".dim"),
+            output_folder / output_file_name,
+            format_,
+            suppress_stderr,
+        )
+
+    return output_folder / output_file_name
+
+
+def append_to_stack(gpt, collocate, stack, products, suppress_stderr=True):
+    """Add new products to a BEAM-DIMAP stack in place, without collocating the products already in it.
+
+    The new products are collocated onto the grid of the stack (a one-band subset of it), and their bands are
+    moved into the stack, numbered after the slaves already in it. The work depends on the number of new
+    products only, not on the length of the stack.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        collocate (Collocate): The Collocate operator the stack was made with (see collocate_stack).
+            Its source_product_paths and master_product_name are ignored.
+        stack (str or os.PathLike): The stack, as returned by collocate_stack (with or without the .dim).
+        products (list): The products to add.
+        suppress_stderr (bool): Capture stderr without printing it.
+
+    Returns:
+        list: The names of the bands added to the stack.
+
+    Examples:
+        ```python
+        stack = snapista.stacking.collocate_stack(gpt, collocate, products)
+        ...
+        snapista.stacking.append_to_stack(gpt, collocate, stack, [new_product])
+        ```
+
+    """
+
+    stack = pathlib.Path(stack)
+    if stack.suffix != ".dim":
+        stack = stack.with_name(stack.name + ".dim")
+    if not stack.exists():
+        raise ValueError(
+            f"{stack} does not exist, only BEAM-DIMAP stacks can be appended to!"
+        )
+
+    pattern = collocate.slave_component_pattern
+    if not collocate.rename_slave_components or "${SLAVE_NUMBER_ID}" not in pattern:
+        raise ValueError(
+            "Appending needs the slave components renamed with ${SLAVE_NUMBER_ID} in the pattern!"
+        )
+
+    bands = dimap.get_band_names(stack)
+    regex = pattern_to_regex(pattern)
+    slaves = [re.fullmatch(regex, band) for band in bands]
+    numbers = [int(match.group("number")) for match in slaves if match is not None]
+    masters = [band for band, match in zip(bands, slaves) if match is None]
+
+    with tempfile.TemporaryDirectory(dir=stack.parent) as temp_dir:
+        temp_dir = pathlib.Path(temp_dir)
+
+        # the grid of the stack, without reading the whole stack
+        subset = Subset()
+        subset.source_bands = [masters[0] if len(masters) > 0 else bands[0]]
+        graph = Graph()
+        graph.add_node(subset)
+        _run(gpt, graph, stack, temp_dir / "grid", "BEAM-DIMAP", suppress_stderr)
+
+        grid = temp_dir / "grid.dim"
+        graph = _collocate_group(
+            collocate,
+            grid,
+            list(map(pathlib.Path, products)),
+            select_slaves=True,
+            master_product_name=dimap.get_product_name(grid),
+        )
+
+        _run(gpt, graph, grid, temp_dir / "new", "BEAM-DIMAP", suppress_stderr)
+
+        new = temp_dir / "new.dim"
+        renumber_slave_bands(new, pattern, max(numbers) + 1 if len(numbers) > 0 else 0)
+
+        return dimap.append_bands(stack, new)
+
+
+def _collocate_group(
+    collocate, master, slaves, select_slaves, master_product_name=None
+):
+    """Build the graph collocating one group of slaves with the master."""
+
+    group = copy.copy(collocate)
+    group.master_product_name = (
+        master.stem if master_product_name is None else master_product_name
+    )
+    group.source_product_paths = [master, *slaves]
+
+    if select_slaves:
+        group.rename_master_components = True
+        group.master_component_pattern = "${ORIGINAL_NAME}" + _MASTER_MARKER
+
+    graph = Graph()
+    graph.add_node(group)
+
+    if select_slaves:
+        band_select = BandSelect()
+        band_select.band_name_pattern = f"(?!.*{_MASTER_MARKER}$)" + pattern_to_regex(
+            collocate.slave_component_pattern, named=False
+        )
+        graph.add_node(band_select)
+
+    return graph
+
+
+def _run(gpt, graph, input_, output_file, format_, suppress_stderr):
+    """Run one of the stacking steps and raise if it fails."""
+
+    process = gpt._process(
+        graph=graph,
+        input_=input_,
+        output_file=output_file,
+        format_=format_,
+        suppress_stderr=suppress_stderr,
+        suppress_stdout=True,
+    )
+
+    if process.returncode != 0:
+        raise RuntimeError(f"gpt failed to produce {output_file.name}")
+
+
+def _get_master(products, master_product_name):
+    """Find the master among the products."""
+
+    if master_product_name is None:
+        return products[0]
+
+    for product in products:
+        if product.stem == master_product_name:
+            return product
+
+    raise ValueError(f"{master_product_name} is not among the products!")
+
+
+def _escape(text):
+    """Escape the regex special characters in a way that both Python and Java understand."""
+
+    return "".join(f"\\{char}" if char in r"\.^$|?*+()[]{}" else char for char in text)
@@ -0,0 +1,362 @@
+""" This file contains the staging pipeline that runs gpt on local copies of products stored on slow storage.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ gpt does a lot of random reads on its inputs, which is painfully slow on network shares.
+ While gpt processes one product, the next few are copied (or extracted) to a fast local scratch folder.
+ The outputs are written to the scratch folder as well, and moved to the output folder in the background.
+
+"""
+
+import time
+import shutil
+import pathlib
+import zipfile
+import tempfile
+import threading
+import subprocess
+import collections
+import concurrent.futures
+
+from snapista.gpt import Result, _EXTENSIONS
+
+
+def run_staged(
+    gpt,
+    graph,
+    input_,
+    scratch_folder,
+    output_folder="proc",
+    format_="BEAM-DIMAP",
+    date_only=False,
+    date_time_only=False,
+    prefix=None,
+    suffix=None,
+    suppress_stderr=True,
+    prefetch=2,
+    max_scratch_bytes=None,
+):
+    """Run the graph for the inputs, staging them through a local scratch folder.
+
+    Args:
+        gpt (GPT): A snapista GPT object.
+        graph (Graph): A snapista Graph object.
+        input_ (str, os.PathLike, or list): Input or list of inputs.
+        scratch_folder (str): A folder on fast local storage (NVMe, tmpfs). A temporary folder is created in it
+            and removed when the run is over, even if it fails.
+        output_folder (str): Folder to save the outputs to.
+        format_ (str): The extension of the output, e.g. 'GeoTIFF', 'HDF5', 'BEAM-DIMAP'.
+        date_only (bool): Drop everything except the date (and suffix) from the output name.
+        date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+        prefix (str): Prefix to use for output.
+        suffix (str): Suffix to use for output. By default, will consist of a list of applied operators.
+        suppress_stderr (bool): Capture stderr without printing it.
+        prefetch (int): How many inputs to stage ahead of the one being processed.
+        max_scratch_bytes (int): Upper bound of the space taken by the staged inputs and by the outputs that wait
+            to be moved. Inputs wait for space to be freed before being staged. An input larger than the bound is
+            staged only when the scratch is empty.
+
+    """
+
+    inputs = input_ if isinstance(input_, list) else [input_]
+    inputs = [pathlib.Path(product) for product in inputs]
+
+    scratch = pathlib.Path(tempfile.mkdtemp(prefix="snapista-", dir=scratch_folder))
+    budget = _ScratchBudget(max_scratch_bytes)
+
+    stager = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch)
+    mover = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    try:
+        remaining = iter(enumerate(inputs))
+        staged = collections.deque()
+
+        def stage_next():
+            for i, product in remaining:
+                if gpt.metrics is not None:
+                    gpt.metrics.job_queued()
+                staged.append(
+                    (
+                        product,
+                        stager.submit(_stage, product, scratch / f"in{i}", budget, i),
+                    )
+                )
+                return
+
+        for _ in range(prefetch + 1):
+            stage_next()
+
+        moves = []
+        while len(staged) > 0:
+            product, future = staged.popleft()
+            stage_next()
+
+            if gpt.metrics is not None:
+                gpt.metrics.job_started(queued=True)
+            started = time.time()
+
+            def finish(output, status, error=None, process=None):
+                if gpt.metrics is not None:
+                    gpt.metrics.job_finished(
+                        Result(
+                            input=product,
+                            output=output,
+                            status=status,
+                            error=error,
+                            started=started,
+                            finished=time.time(),
+                            wall_time=None if process is None else process.wall_time,
+                            peak_memory=(
+                                None if process is None else process.peak_memory
+                            ),
+                        )
+                    )
+
+            try:
+                output_file = gpt._get_output_file(
+                    graph=graph,
+                    input_=product,
+                    output_folder=output_folder,
+                    date_only=date_only,
+                    date_time_only=date_time_only,
+                    prefix=prefix,
+                    suffix=suffix,
+                )
+            except ValueError as error:
+                print(f"\033[31m✗\033[0m {pathlib.Path(product).name}: {error}")
+                finish(None, "error", str(error))
+                try:
+                    local_input, size = future.result()
+                except (OSError, zipfile.BadZipFile):
+                    continue
+                _remove(local_input.parent)
+                budget.release(size)
+                continue
+
+            local_output_file = scratch / "out" / output_file.name
+            local_output_file.parent.mkdir(exist_ok=True)
+
+            print(f"⏳ {output_file.stem}")
+
+            try:
+                local_input, size = future.result()
+            except (OSError, zipfile.BadZipFile) as error:
+                print(f"\033[31m✗\033[0m {output_file.name}: could not stage ({error})")
+                finish(output_file, "error", f"could not stage ({error})")
+                continue
+
+            try:
+                process = gpt._process(
+                    graph=graph,
+                    input_=local_input,
+                    output_file=local_output_file,
+                    format_=format_,
+                    suppress_stderr=suppress_stderr,
+                    suppress_stdout=True,
+                )
+            # SubprocessError: e.g. the memory limit of the placement could not be applied in the child
+            except (
+                OSError,
+                ValueError,
+                zipfile.BadZipFile,
+                subprocess.SubprocessError,
+            ) as error:
+                _remove_outputs(local_output_file)
+                print(f"\033[31m✗\033[0m {output_file.name}: {error}")
+                finish(output_file, "error", str(error))
+                continue
+            finally:
+                _remove(local_input.parent)
+                budget.release(size)
+
+            if process.returncode == 0:
+                # the output takes scratch space until it is moved, so a slow destination holds staging back
+                output_size = _get_size(local_output_file)
+                budget.reserve(output_size)
+                moves.append(
+                    mover.submit(
+                        _move,
+                        local_output_file,
+                        output_file.parent,
+                        gpt._span("move", pathlib.Path(product)),
+                        budget,
+                        output_size,
+                    )
+                )
+            else:
+                _remove_outputs(local_output_file)
+
+            gpt._print_result(output_file, process, suppress_stderr)
+            finish(
+                output_file.parent / (output_file.name + _EXTENSIONS.get(format_, "")),
+                "done" if process.returncode == 0 else "failed",
+                gpt._get_error(process),
+                process,
+            )
+
+        for move in moves:
+            move.result()
+
+        if gpt.metrics is not None:
+            gpt.metrics.write()
+
+    finally:
+        budget.close()
+        stager.shutdown(wait=True, cancel_futures=True)
+        mover.shutdown(wait=True)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+class _ScratchBudget:
+    """Blocks staging while the staged inputs take up more space than allowed.
+
+    The space is handed out in the order of the inputs: the inputs are processed in order,
+    so letting a later input take the space an earlier one is waiting for would deadlock.
+
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._turn = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, size, turn):
+        if self.max_bytes is None:
+            return
+
+        with self._condition:
+            # something too large for the budget still has to go through at some point
+            self._condition.wait_for(
+                lambda: self._closed
+                or self._turn == turn
+                and (self.used == 0 or self.used + size <= self.max_bytes)
+            )
+            if self._closed:
+                raise InterruptedError("Staging was stopped")
+            self.used += size
+            self._turn += 1
+            self._condition.notify_all()
+
+    def skip(self, turn):
+        if self.max_bytes is None:
+            return
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed or self._turn == turn)
+            self._turn += 1
+            self._condition.notify_all()
+
+    def reserve(self, size):
+        """Count space that is taken already (e.g. an output), without waiting for it."""
+
+        if self.max_bytes is None:
+            return
+
+        with self._condition:
+            self.used += size
+
+    def release(self, size):
+        if self.max_bytes is None:
+            return
+
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+    def close(self):
+        """Wake up everything that waits for space, so that staging can be stopped."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def _stage(product, folder, budget, turn):
+    """Copy or extract the product into the folder.
+
+    Returns:
+        tuple: Path to the staged product and the space it takes.
+
+    """
+
+    try:
+        if product.match("*S3*.zip"):
+            with zipfile.ZipFile(product) as zf:
+                size = sum(info.file_size for info in zf.infolist())
+        elif product.is_dir():
+            size = sum(
+                file.stat().st_size for file in product.rglob("*") if file.is_file()
+            )
+        else:
+            size = product.stat().st_size
+    except (OSError, zipfile.BadZipFile):
+        budget.skip(turn)
+        raise
+
+    budget.acquire(size, turn)
+
+    try:
+        folder.mkdir()
+
+        if product.match("*S3*.zip"):
+            with zipfile.ZipFile(product) as zf:
+                zf.extractall(folder)
+            # the extracted .SEN3 folder is what gpt can read
+            return folder / (product.stem + ".SEN3"), size
+
+        if product.is_dir():
+            return pathlib.Path(shutil.copytree(product, folder / product.name)), size
+
+        return pathlib.Path(shutil.copy2(product, folder / product.name)), size
+
+    except (OSError, zipfile.BadZipFile):
+        _remove(folder)
+        budget.release(size)
+        raise
+
+
+def _move(local_output_file, output_folder, span, budget, size):
+    """Move everything gpt wrote for the output (e.g. .dim and .data) to the output folder."""
+
+    try:
+        with span:
+            for file in local_output_file.parent.glob(local_output_file.name + ".*"):
+                target = output_folder / file.name
+                _remove(target)
+                shutil.move(str(file), str(target))
+    finally:
+        budget.release(size)
+
+
+def _get_size(local_output_file):
+    """The space taken by everything gpt wrote for the output."""
+
+    size = 0
+    for file in local_output_file.parent.glob(local_output_file.name + ".*"):
+        if file.is_dir():
+            size += sum(
+                child.stat().st_size for child in file.rglob("*") if child.is_file()
+            )
+        else:
+            size += file.stat().st_size
+
+    return size
+
+
+def _remove_outputs(local_output_file):
+    """Remove everything gpt wrote for the output."""
+
+    for file in local_output_file.parent.glob(local_output_file.name + ".*"):
+        _remove(file)
+
+
+def _remove(path):
+    """Remove a file or a folder if it exists."""
+
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,386 @@
+""" This file contains functions to compute statistics of the bands of many processed products.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The bands of BEAM-DIMAP outputs are memory-mapped and read in blocks of lines, by a few threads, with a limited
+ number of blocks in flight, so the memory used depends neither on the size of the scenes nor on their number.
+
+ Every block is summarized in an Accumulator: count, mean and sum of squared differences (merged as Chan et al.),
+ min, max, and a sketch of the distribution for the percentiles (as DDSketch: logarithmic bins, so that every
+ percentile is within a relative accuracy of the true one, whatever the number of pixels). Accumulators merge
+ exactly, so the ones of the blocks make the ones of the products, and the ones of the products the combined one.
+
+"""
+
+import math
+import pathlib
+import concurrent.futures
+
+import numpy
+
+from snapista import dimap
+
+# the errors of a product that can't be read: missing files, a bad header, a band file too short for its header,
+# and a corrupt .dim (lxml.etree.XMLSyntaxError is a SyntaxError)
+_ERRORS = (OSError, ValueError, KeyError, SyntaxError)
+
+
+class Accumulator:
+    """Mergeable statistics of the values of a band.
+
+    Attributes:
+        count (int): The number of valid values.
+        total (int): The number of values, valid or not.
+        mean (float): The mean of the valid values.
+        minimum (float): The lowest valid value.
+        maximum (float): The highest valid value.
+
+    Examples:
+        ```python
+        accumulator = snapista.stats.Accumulator()
+        accumulator.add(values, valid=values > 0)
+        accumulator.merge(other)
+
+        accumulator.std, accumulator.get_percentile(98)
+        ```
+
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        """Create an empty accumulator.
+
+        Args:
+            relative_accuracy (float): The relative accuracy of the percentiles.
+
+        """
+
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._m2 = 0.0  # the sum of the squared differences from the mean
+
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        # bin -> count, for the positive values and the (absolute) negative values
+        self._positive = {}
+        self._negative = {}
+        self._zeros = 0
+
+    def __repr__(self):
+        return f"Accumulator({self.count} of {self.total} values)"
+
+    @property
+    def std(self):
+        """The (population) standard deviation of the valid values."""
+
+        return math.sqrt(self._m2 / self.count) if self.count > 0 else math.nan
+
+    @property
+    def valid_fraction(self):
+        """The share of the values that are valid."""
+
+        return self.count / self.total if self.total > 0 else math.nan
+
+    def add(self, values, valid=None):
+        """Add values.
+
+        Args:
+            values (numpy.ndarray): The values.
+            valid (numpy.ndarray): Which values are valid (bool, the same shape). By default, the finite ones.
+
+        """
+
+        values = numpy.asarray(values, dtype="f8")
+        if valid is None:
+            valid = numpy.isfinite(values)
+
+        self.total += values.size
+        values = values[valid & numpy.isfinite(values)]
+        if values.size == 0:
+            return
+
+        block = Accumulator(self.relative_accuracy)
+        block.count = values.size
+        block.mean = float(values.mean())
+        block._m2 = float(((values - block.mean) ** 2).sum())
+        block.minimum = float(values.min())
+        block.maximum = float(values.max())
+
+        # values too close to zero for a bin are counted as zeros
+        tiny = numpy.abs(values) < 1e-12
+        block._zeros = int(tiny.sum())
+        block._positive = block._get_bins(values[(values > 0) & ~tiny])
+        block._negative = block._get_bins(-values[(values < 0) & ~tiny])
+
+        self.merge(block, _total=False)
+
+    def merge(self, other, _total=True):
+        """Add the values of another accumulator (of the same relative accuracy)."""
+
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only accumulators of the same relative accuracy merge!")
+
+        if _total:
+            self.total += other.total
+
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+        for bins, other_bins in (
+            (self._positive, other._positive),
+            (self._negative, other._negative),
+        ):
+            for index, bin_count in other_bins.items():
+                bins[index] = bins.get(index, 0) + bin_count
+        self._zeros += other._zeros
+
+    def get_percentile(self, percentile):
+        """Get a percentile (0–100) of the valid values, within the relative accuracy."""
+
+        if self.count == 0:
+            return math.nan
+
+        rank = percentile / 100 * (self.count - 1)
+
+        # from the most negative value to the most positive one
+        bins = [
+            (-self._get_value(index), n)
+            for index, n in sorted(self._negative.items(), reverse=True)
+        ]
+        bins.append((0.0, self._zeros))
+        bins += [
+            (self._get_value(index), n) for index, n in sorted(self._positive.items())
+        ]
+
+        seen = 0
+        for value, bin_count in bins:
+            seen += bin_count
+            if seen > rank:
+                return min(max(value, self.minimum), self.maximum)
+
+        return self.maximum
+
+    def to_dict(self, percentiles=(2, 50, 98)):
+        """Get the statistics as a dict, e.g. to write them as JSON."""
+
+        return {
+            "count": self.count,
+            "valid_fraction": self.valid_fraction,
+            "mean": self.mean if self.count > 0 else math.nan,
+            "std": self.std,
+            "min": self.minimum if self.count > 0 else math.nan,
+            "max": self.maximum if self.count > 0 else math.nan,
+            **{
+                f"p{percentile:g}": self.get_percentile(percentile)
+                for percentile in percentiles
+            },
+        }
+
+    def _get_bins(self, values):
+        """Count the (positive) values in the logarithmic bins."""
+
+        indices = numpy.ceil(numpy.log(values) / math.log(self._gamma)).astype("i8")
+        indices, counts = numpy.unique(indices, return_counts=True)
+
+        return dict(zip(indices.tolist(), counts.tolist()))
+
+    def _get_value(self, index):
+        """The value of a bin, within the relative accuracy of all the values in it."""
+
+        return 2 * self._gamma**index / (self._gamma + 1)
+
+
+def compute_statistics(
+    products,
+    bands,
+    percentiles=(2, 50, 98),
+    relative_accuracy=0.01,
+    lines=512,
+    workers=4,
+):
+    """Compute statistics of bands, per product and over all the products.
+
+    Args:
+        products (iterable): The .dim files, or the results of GPT.run_iter / GPT.run (only the done ones are used).
+        bands (str or list): The band(s).
+        percentiles (tuple): The percentiles (0–100) to compute.
+        relative_accuracy (float): The relative accuracy of the percentiles.
+        lines (int): The number of lines read at once.
+        workers (int): Number of threads reading blocks (numpy releases the GIL).
+
+    Returns:
+        dict: 'products' – product path -> band -> statistics, 'combined' – band -> statistics, and
+            'failed' – product path -> error, for the products left out because they can't be read.
+            The statistics are count, valid_fraction, mean, std, min, max, and p<percentile>.
+
+    Examples:
+        ```python
+        results = gpt.run(graph, products, workers=4)
+        statistics = snapista.stats.compute_statistics(results, ['conc_chl', 'conc_tsm'])
+
+        statistics['combined']['conc_chl']['p98']
+        ```
+
+    """
+
+    accumulators, failed = compute_accumulators(
+        products, bands, relative_accuracy, lines, workers
+    )
+
+    combined = {}
+    for product in accumulators.values():
+        for band, accumulator in product.items():
+            combined.setdefault(band, Accumulator(relative_accuracy)).merge(accumulator)
+
+    return {
+        "products": {
+            dim.as_posix(): {
+                band: accumulator.to_dict(percentiles)
+                for band, accumulator in product.items()
+            }
+            for dim, product in accumulators.items()
+        },
+        "combined": {
+            band: accumulator.to_dict(percentiles)
+            for band, accumulator in combined.items()
+        },
+        "failed": {dim.as_posix(): error for dim, error in failed.items()},
+    }
+
+
+def compute_accumulators(products, bands, relative_accuracy=0.01, lines=512, workers=4):
+    """Compute the accumulators of bands per product, e.g. to merge them with the ones of another batch.
+
+    A product that can't be read (missing, corrupt, or without one of the bands) is reported and left out.
+
+    Args:
+        See compute_statistics.
+
+    Returns:
+        tuple: Product (pathlib.Path) -> band -> Accumulator, and product -> error for the ones left out.
+
+    """
+
+    bands = [bands] if isinstance(bands, str) else list(bands)
+
+    dims = []
+    for product in products:
+        if hasattr(product, "status"):
+            if product.status != "done":
+                continue
+            product = product.output
+        dims.append(pathlib.Path(product))
+    # a product given twice would be counted twice
+    dims = list(dict.fromkeys(dims))
+
+    accumulators = {
+        dim: {band: Accumulator(relative_accuracy) for band in bands} for dim in dims
+    }
+    failed = {}
+
+    def fail(dim, error):
+        if dim not in failed:
+            failed[dim] = str(error)
+            print(f"\033[31m✗\033[0m {dim.name}: {error}")
+
+    def get_tasks():
+        for dim in dims:
+            try:
+                blocks = [
+                    (band, line, no_data, scaling)
+                    for band, (height, no_data, scaling) in (
+                        (band, _get_band_info(dim, band)) for band in bands
+                    )
+                    for line in range(0, height, lines)
+                ]
+            except _ERRORS as error:
+                fail(dim, error)
+                continue
+
+            for band, line, no_data, scaling in blocks:
+                if dim not in failed:
+                    yield dim, band, line, no_data, scaling
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        for dim, band, line, no_data, scaling in get_tasks():
+            # keep a few blocks in flight, not the whole batch
+            if len(running) >= 2 * workers:
+                _merge_finished(running, accumulators, fail)
+
+            future = executor.submit(
+                _summarize_block,
+                dim,
+                band,
+                line,
+                lines,
+                no_data,
+                scaling,
+                relative_accuracy,
+            )
+            running[future] = (dim, band)
+
+        while len(running) > 0:
+            _merge_finished(running, accumulators, fail)
+
+    # the statistics of a product that failed halfway would be of a part of it
+    for dim in failed:
+        del accumulators[dim]
+
+    return accumulators, failed
+
+
+def _get_band_info(dim, band):
+    """The number of lines, the no-data value, and the scaling of a band."""
+
+    return (
+        dimap.read_band(dim, band).shape[0],
+        dimap.get_no_data_value(dim, band),
+        dimap.get_scaling(dim, band),
+    )
+
+
+def _summarize_block(dim, band, line, lines, no_data, scaling, relative_accuracy):
+    """Read a block of lines of a band and summarize it, in the physical units of the band."""
+
+    values = dimap.read_band(dim, band)[line : line + lines]
+
+    # the no-data value is a raw value
+    valid = numpy.ones(values.shape, dtype=bool)
+    if no_data is not None:
+        valid &= values != no_data
+
+    factor, offset = scaling
+    if (factor, offset) != (1.0, 0.0):
+        values = values * factor + offset
+
+    accumulator = Accumulator(relative_accuracy)
+    accumulator.add(values, valid)
+
+    return accumulator
+
+
+def _merge_finished(running, accumulators, fail):
+    """Wait for blocks to finish, and merge them into the accumulators of their products."""
+
+    finished, _ = concurrent.futures.wait(
+        running, return_when=concurrent.futures.FIRST_COMPLETED
+    )
+    for future in finished:
+        dim, band = running.pop(future)
+        try:
+            accumulators[dim][band].merge(future.result())
+        except _ERRORS as error:
+            fail(dim, error)
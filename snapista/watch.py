@@ -0,0 +1,323 @@
+""" This file contains the definition of the Watcher class – a daemon that processes products as they arrive.
+
+This version of snapista is my personal take on what is originally presented here:
+    https://github.com/snap-contrib/snapista
+
+ The inbox is watched with inotify on Linux (polled on other systems). A new product is queued once it has stopped
+ changing for a while, i.e. once it is fully written. A limited number of workers run gpt on the queued products,
+ and the inputs are moved to the done or failed folder afterwards. When the queue is full, new products simply
+ wait in the inbox.
+
+"""
+
+import os
+import time
+import queue
+import select
+import shutil
+import ctypes
+import ctypes.util
+import pathlib
+import threading
+
+# inotify events that mean something appeared in or changed in the watched folder
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+
+
+class Watcher:
+    """Watch a folder for new products and run a graph for each of them.
+
+    Attributes:
+        ignore (tuple): Patterns of the names in the inbox that are never processed (temporary download files).
+
+    Examples:
+        ```python
+        watcher = snapista.Watcher(
+            gpt,
+            graph,
+            inbox='Data/inbox',
+            output_folder='Data/proc',
+            workers=2,
+            date_only=True,
+            prefix='S2_',
+        )
+        watcher.run()  # until Ctrl+C
+        ```
+
+    """
+
+    def __init__(
+        self,
+        gpt,
+        graph,
+        inbox,
+        output_folder="proc",
+        done_folder=None,
+        failed_folder=None,
+        format_="BEAM-DIMAP",
+        date_only=False,
+        date_time_only=False,
+        prefix=None,
+        suffix=None,
+        workers=1,
+        queue_size=8,
+        settle_time=5.0,
+        poll_interval=2.0,
+    ):
+        """Create a new watcher.
+
+        Args:
+            gpt (GPT): A snapista GPT object.
+            graph (Graph): A snapista Graph object to run for every product.
+            inbox (str): The folder to watch.
+            output_folder (str): Folder to save the outputs to.
+            done_folder (str): Where to move the processed inputs. By default, 'done' in the inbox.
+            failed_folder (str): Where to move the inputs that failed. By default, 'failed' in the inbox.
+            format_ (str): The extension of the output, e.g. 'GeoTIFF', 'HDF5', 'BEAM-DIMAP'.
+            date_only (bool): Drop everything except the date (and suffix) from the output name.
+            date_time_only (bool): Drop everything except the date and time (and suffix) from the output name.
+            prefix (str): Prefix to use for output.
+            suffix (str): Suffix to use for output. By default, will consist of a list of applied operators.
+            workers (int): Number of gpt runs executed in parallel.
+            queue_size (int): How many products can wait for a worker. The rest wait in the inbox.
+            settle_time (float): Seconds a product must stay unchanged to be considered fully written.
+            poll_interval (float): Seconds between checks of the inbox. With inotify, the inbox is also checked
+                as soon as something happens in it.
+
+        """
+
+        self.gpt = gpt
+        self.graph = graph
+        self.inbox = pathlib.Path(inbox)
+        self.output_folder = output_folder
+        self.done_folder = pathlib.Path(
+            self.inbox / "done" if done_folder is None else done_folder
+        )
+        self.failed_folder = pathlib.Path(
+            self.inbox / "failed" if failed_folder is None else failed_folder
+        )
+        self.format_ = format_
+        self.naming = {
+            "date_only": date_only,
+            "date_time_only": date_time_only,
+            "prefix": prefix,
+            "suffix": suffix,
+        }
+        self.workers = workers
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.ignore = (".*", "*.part", "*.tmp", "*.crdownload", "*.partial")
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._seen = {}  # product -> (signature, time the signature was first seen)
+        self._taken = set()  # products that are queued or being processed
+        self._failed = (
+            set()
+        )  # products that could not be moved out of the inbox, never processed again
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Watcher({self.inbox.as_posix()})"
+
+    def run(self):
+        """Watch the inbox until stop() is called or the process is interrupted."""
+
+        self.done_folder.mkdir(parents=True, exist_ok=True)
+        self.failed_folder.mkdir(parents=True, exist_ok=True)
+
+        workers = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        inotify = _Inotify.create(self.inbox)
+        print(
+            f"👀 {self.inbox.as_posix()} ({'inotify' if inotify is not None else 'polling'})"
+        )
+
+        try:
+            while not self._stop.is_set():
+                self._scan()
+
+                if inotify is not None:
+                    # wakes up as soon as something happens in the inbox
+                    inotify.wait(timeout=self.poll_interval)
+                else:
+                    self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            # the queued products stay in the inbox for the next run, only the ones being processed are finished
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in workers:
+                self._queue.put(None)
+            for worker in workers:
+                worker.join()
+            if inotify is not None:
+                inotify.close()
+
+    def stop(self):
+        """Stop watching. The products that are being processed are finished first."""
+
+        self._stop.set()
+
+    def _scan(self):
+        """Look at the inbox and queue the products that stopped changing."""
+
+        now = time.monotonic()
+        listed = set(self.inbox.iterdir())
+        present = set()
+
+        with self._lock:
+            # a failed product that was removed from the inbox may come back, and is processed again then
+            self._failed &= listed
+
+        for product in listed:
+            if product in (self.done_folder, self.failed_folder) or any(
+                product.match(pattern) for pattern in self.ignore
+            ):
+                continue
+
+            with self._lock:
+                if product in self._taken or product in self._failed:
+                    continue
+
+            present.add(product)
+
+            try:
+                signature = _get_signature(product)
+            except OSError:
+                # e.g. vanished or not readable, it is looked at again in the next scan
+                continue
+
+            previous = self._seen.get(product)
+            if previous is None or previous[0] != signature:
+                self._seen[product] = (signature, now)
+            elif now - previous[1] >= self.settle_time:
+                with self._lock:
+                    self._taken.add(product)
+                try:
+                    # backpressure: when all workers are busy and the queue is full, the product waits in the inbox
+                    self._queue.put_nowait(product)
+                except queue.Full:
+                    with self._lock:
+                        self._taken.discard(product)
+                    continue
+                del self._seen[product]
+
+        for product in set(self._seen) - present:
+            del self._seen[product]
+
+    def _work(self):
+        """Process queued products until a None is received."""
+
+        while True:
+            product = self._queue.get()
+            if product is None:
+                return
+
+            try:
+                self._process(product)
+            except Exception as error:
+                # e.g. the product could not be moved out of the inbox, the worker must go on with the next ones
+                print(f"\033[31m✗\033[0m {product.name}: {error}")
+                with self._lock:
+                    # otherwise it would be settled and processed again, over and over
+                    self._failed.add(product)
+            finally:
+                with self._lock:
+                    self._taken.discard(product)
+
+    def _process(self, product):
+        """Run the graph for a product and move it to the done or failed folder."""
+
+        print(f"⏳ {product.name}")
+
+        result = self.gpt._run_job(
+            graph=self.graph,
+            input_=product,
+            format_=self.format_,
+            suppress_stderr=True,
+            suppress_stdout=True,
+            output_kwargs={"output_folder": self.output_folder, **self.naming},
+        )
+        self.gpt._report(result)
+
+        folder = self.done_folder if result.status == "done" else self.failed_folder
+        target = folder / product.name
+        if target.is_dir():
+            shutil.rmtree(target)
+        shutil.move(str(product), str(target))
+
+
+class _Inotify:
+    """A minimal inotify wrapper, used only to wake up as soon as something happens in the inbox."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    @classmethod
+    def create(cls, folder):
+        """Start watching the folder. Returns None when inotify is not available."""
+
+        name = ctypes.util.find_library("c")
+        if name is None:
+            return None
+
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+
+        if fd < 0:
+            return None
+
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(folder), mask) < 0:
+            os.close(fd)
+            return None
+
+        return cls(fd)
+
+    def wait(self, timeout):
+        """Wait for events (or the timeout) and discard them, the inbox is rescanned anyway."""
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            # give the writer a moment, events tend to come in bursts
+            time.sleep(0.05)
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _get_signature(product):
+    """Size and modification time of a file, or of all the files in a folder (e.g. .SEN3 or .SAFE)."""
+
+    if product.is_dir():
+        files = [file.stat() for file in product.rglob("*") if file.is_file()]
+        return (
+            len(files),
+            sum(stat.st_size for stat in files),
+            max((stat.st_mtime_ns for stat in files), default=0),
+        )
+
+    stat = product.stat()
+    return 1, stat.st_size, stat.st_mtime_ns